@@ -1,9 +1,12 @@
-import threading
 import os
+import threading
+import time
 
 from .app_view import AppView 
 import config
-from services import CalculationService, capitalizar_string, create_word_doc, create_relatorio, ipca_calculation
+import services
+from services.profiling import stage
+from services.validation import validate_form_data
 
 class AppController:
     def __init__(self, view: AppView):
@@ -11,6 +14,16 @@ class AppController:
         self.worker_thread = None
         self.thread_result = None
         self.thread_error = None
+
+        # Perfil de desempenho do último cálculo (quando medido)
+        self.profiler = None
+
+        # Dados censitários compartilhados por todos os cálculos da sessão
+        self.dataset = None
+        self.dataset_lock = threading.Lock()
+        self.warmup_thread = None
+        self.warmup_error = None
+        self.warmup_seconds = None
         
         self.placeholder_lat = config.PLACEHOLDER_LAT
         self.placeholder_lon = config.PLACEHOLDER_LON
@@ -32,48 +45,7 @@ class AppController:
 
     def _validate_form(self, data: dict) -> list[str]:
         """Valida os dados do formulário. Retorna uma lista de erros."""
-        campos_a_validar = [
-            ("numero_processo", "Número do processo", [""]),
-            ("servico", "Serviço", [""]),
-            ("entidade", "Entidade", [""]),
-            ("finalidade", "Finalidade", [""]),
-            ("consulta_publica", "Consulta Pública", [""]),
-            ("uf_atual", "UF Atual", [""]),
-            ("municipio_atual", "Município Atual", [""]),
-            ("classe_atual", "Classe Atual", [""]),
-            ("canal_atual", "Canal Atual", [""]),
-            ("latitude_atual", "Latitude Atual", ["", self.placeholder_lat]),
-            ("longitude_atual", "Longitude Atual", ["", self.placeholder_lon]),
-            ("uf_proposta", "UF Proposta", [""]),
-            ("municipio_proposto", "Município Proposto", [""]),
-            ("classe_proposta", "Classe Proposta", [""]),
-            ("canal_proposto", "Canal Proposto", [""]),
-            ("latitude_proposta", "Latitude Proposta", ["", self.placeholder_lat]),
-            ("longitude_proposta", "Longitude Proposta", ["", self.placeholder_lon]),
-        ]
-        
-        # Campos que são condicionais
-        campos_condicionais = [
-            ("cnpj", "CNPJ", [""]),
-            ("fistel", "Fistel", [""]),
-            ("endereco", "Endereço", [""]),
-            ("cep", "CEP", [""]),
-        ]
-
-        # Verifica o valor do checkbox
-        if data.get("incluir_enderecamento"):
-            campos_a_validar.extend(campos_condicionais)
-        
-        campos_invalidos = []
-        for key, nome_campo, valores_invalidos in campos_a_validar:
-            valor = data.get(key, "").strip() 
-            if valor in valores_invalidos:
-                campos_invalidos.append(nome_campo)
-        
-        if not data.get("output_directory"):
-            campos_invalidos.append("Pasta de Saída")
-            
-        return campos_invalidos
+        return validate_form_data(data, self.placeholder_lat, self.placeholder_lon)
 
 
     def handle_generate_pdf(self):
@@ -91,65 +63,131 @@ class AppController:
         self.view.toggle_buttons(enabled=False)
         self.view.show_loading()
 
-        self.worker_thread = threading.Thread(target=self._pdf_task, args=(form_data,))
+        profiling, cprofile = self.view.get_profiling_options()
+        self.worker_thread = threading.Thread(target=self._pdf_task, args=(form_data, profiling, cprofile))
         self.worker_thread.start()
 
         self.view.after(100, self._check_thread)
 
 
-    def _pdf_task(self, data: dict):
+    def handle_class_sweep(self):
+        """Lida com o clique no botão 'Comparar Classes': calcula todas as classes acima da atual."""
+        form_data = self.view.get_form_data()
+
+        campos_invalidos = validate_form_data(
+            form_data, self.placeholder_lat, self.placeholder_lon,
+            require_output_directory=False, require_proposed_class=False
+        )
+        if campos_invalidos:
+            mensagem = "Os seguintes campos são obrigatórios e não foram preenchidos (ou ainda contêm o valor padrão):\n\n"
+            mensagem += "\n".join(f"- {nome}" for nome in campos_invalidos)
+            self.view.show_warning("Campos Incompletos", mensagem)
+            return
+
+        self.view.toggle_buttons(enabled=False)
+        self.view.show_loading("Comparando classes...")
+
+        self.worker_thread = threading.Thread(target=self._sweep_task, args=(form_data,))
+        self.worker_thread.start()
+
+        self.view.after(100, lambda: self._check_sweep_thread(form_data["classe_atual"]))
+
+
+    def _sweep_task(self, data: dict):
+        """Executa a varredura de classes sobre o dataset da sessão."""
+        self.thread_result = None
+        self.thread_error = None
+
+        try:
+            self.thread_result = services.sweep_form(self._get_dataset(), data, config.PATH_IPCA_JSON)
+        except Exception as e:
+            print(f"Erro na thread: {e}")
+            self.thread_error = e
+
+
+    def _check_sweep_thread(self, current_class: str):
+        """Verifica se a varredura terminou e mostra a tabela de classes."""
+        if self.worker_thread.is_alive():
+            self.view.after(100, lambda: self._check_sweep_thread(current_class))
+            return
+
+        self.view.hide_loading()
+        self.view.toggle_buttons(enabled=True)
+
+        if self.thread_error:
+            self.view.show_error("Erro ao Comparar Classes", f"Ocorreu uma falha:\n\n{self.thread_error}")
+        elif not self.thread_result:
+            self.view.show_info("Comparar Classes", f"Não há classes acima da classe atual ({current_class}).")
+        else:
+            self.view.show_sweep(current_class, self.thread_result)
+
+
+    def start_warmup(self):
+        """
+        Inicia, em segundo plano, a importação dos módulos pesados e a carga dos
+        dados censitários, para que o primeiro cálculo encontre tudo pronto.
+        """
+        self.view.set_status("Carregando dados censitários em segundo plano...")
+
+        self.warmup_thread = threading.Thread(target=self._warmup_task, daemon=True)
+        self.warmup_thread.start()
+
+        self.view.after(200, self._check_warmup)
+
+
+    def _warmup_task(self):
+        """Importa os módulos de cálculo, carrega o dataset e atualiza o cache do IPCA se estiver vencido."""
+        inicio = time.perf_counter()
+        try:
+            services.preload()
+            services.get_ipca_store(config.PATH_IPCA_JSON).index()
+            self._get_dataset().warm_up()
+            self.warmup_seconds = time.perf_counter() - inicio
+        except Exception as e:
+            print(f"Erro no carregamento dos dados: {e}")
+            self.warmup_error = e
+
+
+    def _check_warmup(self):
+        """Verifica se o carregamento em segundo plano terminou e atualiza o status."""
+        if self.warmup_thread.is_alive():
+            self.view.after(200, self._check_warmup)
+        elif self.warmup_error:
+            self.view.set_status(f"Falha ao carregar os dados censitários: {self.warmup_error}")
+        else:
+            self.view.set_status(f"Dados censitários carregados ({self.warmup_seconds:.1f} s).")
+
+
+    def _get_dataset(self) -> "services.CensusDataset":
+        """Carrega os dados censitários na primeira chamada e os reutiliza nas seguintes."""
+        with self.dataset_lock:
+            if self.dataset is None:
+                self.dataset = services.CensusDataset(**config.dataset_paths())
+            return self.dataset
+
+
+    def _pdf_task(self, data: dict, profiling: bool = False, cprofile: bool = False):
         """
         Executa o fluxo completo: prepara dados, calcula promoção de classe, 
-        aplica correção IPCA e gera documentos (relatório PDF e ofício DOCX opcional)
+        aplica correção IPCA e gera documentos (relatório PDF e ofício DOCX opcional).
+        Com 'profiling', mede cada etapa (e, com 'cprofile', grava os .prof na pasta de saída).
         """
         self.thread_result = None
         self.thread_error = None
+        self.profiler = None
         
         try:
-            dados_processados = {
-                "numero_processo": data["numero_processo"],
-                "servico": capitalizar_string(data["servico"]),
-                "entidade": capitalizar_string(data["entidade"]),
-                "finalidade": capitalizar_string(data["finalidade"]),
-                "consulta_publica": data["consulta_publica"],
-                "uf_atual": str(data["uf_atual"]).upper(),
-                "municipio_atual": data["municipio_atual"],
-                "classe_atual": str(data["classe_atual"]).upper(),
-                "canal_atual": data["canal_atual"],
-                "latitude_atual": data["latitude_atual"],
-                "longitude_atual": data["longitude_atual"],
-                "uf_proposta": str(data["uf_proposta"]).upper(),
-                "municipio_proposto": data["municipio_proposto"],
-                "classe_proposta": str(data["classe_proposta"]).upper(),
-                "canal_proposto": data["canal_proposto"],
-                "latitude_proposta": data["latitude_proposta"],
-                "longitude_proposta": data["longitude_proposta"]
-            }
-            
-            output_directory = data["output_directory"]
-            
-            calculo = CalculationService(config.PATH_SHP, config.PATH_UF_JSON, dados_processados)
-            resultado_calculo_promocao = calculo.get_results()
-            ipca_value, ipca_date = ipca_calculation(resultado_calculo_promocao['vpc'], config.PATH_IPCA_JSON)
-            resultado_calculo_promocao['ipca'] = ipca_value
-            resultado_calculo_promocao['data_ipca'] = ipca_date
-            
-            # Adicionamos o estado do checkbox aos resultados.
-            resultado_calculo_promocao['incluir_enderecamento'] = data['incluir_enderecamento']
-            if data['incluir_enderecamento']:
-                resultado_calculo_promocao["cnpj"] = data['cnpj']
-                resultado_calculo_promocao['fistel'] = data['fistel']
-                resultado_calculo_promocao['endereco'] = data['endereco']
-                resultado_calculo_promocao['cep'] = data['cep']
-
-
-            numero_processo_tratado = data["numero_processo"].replace('/', '-').replace('.', '_')
-            caminho_arquivo_relatorio = os.path.join(output_directory, f"relatorio_{numero_processo_tratado}.pdf")
-            create_relatorio(config.PATH_UF_JSON, caminho_arquivo_relatorio, resultado_calculo_promocao)
-
-            if data['incluir_enderecamento']:
-                caminho_arquivo_oficio_editavel = os.path.join(output_directory, f"oficio_{numero_processo_tratado}.docx")
-                create_word_doc(caminho_arquivo_oficio_editavel, resultado_calculo_promocao)
+            if profiling:
+                cprofile_dir = None
+                if cprofile:
+                    from services.report_pipeline import output_file_stem
+                    cprofile_dir = os.path.join(data["output_directory"], f"perfil_{output_file_stem(data['numero_processo'])}")
+                self.profiler = services.Profiler(cprofile_dir=cprofile_dir)
+
+                with self.profiler, stage("gerar documentos"):
+                    self._generate_documents(data)
+            else:
+                self._generate_documents(data)
 
             self.thread_result = "Relatório gerado com sucesso!"
 
@@ -158,6 +196,36 @@ class AppController:
             self.thread_error = e
 
 
+    def _generate_documents(self, data: dict):
+        services.generate_documents(
+            self._get_dataset(),
+            data,
+            data["output_directory"],
+            config.PATH_IPCA_JSON
+        )
+
+
+    def handle_export_profile(self, kind: str):
+        """Exporta o perfil do último cálculo em JSON ou no formato de trace do Chrome."""
+        if self.profiler is None:
+            return
+
+        extension = ".json"
+        initialfile = "perfil.json" if kind == "json" else "perfil_trace.json"
+        path = self.view.ask_save_file("Exportar perfil de desempenho", self.view.get_output_path(), initialfile, extension)
+        if not path:
+            return
+
+        try:
+            if kind == "json":
+                self.profiler.export_json(path)
+            else:
+                self.profiler.export_chrome_trace(path)
+            self.view.set_status(f"Perfil exportado em '{path}'.")
+        except OSError as e:
+            self.view.show_error("Erro ao Exportar", f"Não foi possível gravar o perfil:\n\n{e}")
+
+
     def _check_thread(self):
         """Verifica se a thread de trabalho terminou."""
         if self.worker_thread.is_alive():
@@ -166,6 +234,9 @@ class AppController:
             self.view.hide_loading()
             self.view.toggle_buttons(enabled=True)
 
+            if self.profiler is not None:
+                self.view.show_profile(self.profiler.sorted_records())
+
             if self.thread_error:
                 self.view.show_error(
                     "Erro ao Gerar PDF",
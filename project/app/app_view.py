@@ -1,3 +1,4 @@
+import locale
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import messagebox, filedialog, END
@@ -57,6 +58,14 @@ class AppView(ttk.Window):
         )
         self.submit_button.pack(side=LEFT, padx=10)
 
+        self.sweep_button = ttk.Button(
+            button_frame,
+            text="Comparar Classes",
+            command=lambda: self.controller.handle_class_sweep(),
+            bootstyle="info"
+        )
+        self.sweep_button.pack(side=LEFT, padx=10)
+
         self.clear_button = ttk.Button(
             button_frame,
             text="Limpar Campos",
@@ -65,6 +74,14 @@ class AppView(ttk.Window):
         )
         self.clear_button.pack(side=LEFT, padx=10, pady=5)
 
+        # --- PAINEL DE DESEMPENHO (recolhível) ---
+        self.lf_profiling = self.create_profiling_section(self)
+        self.lf_profiling.pack(fill=X, padx=10, pady=(1, 5))
+
+        # --- BARRA DE STATUS ---
+        self.status_var = ttk.StringVar(value="")
+        ttk.Label(self, textvariable=self.status_var, bootstyle="secondary").pack(side=BOTTOM, fill=X, padx=10, pady=(0, 5))
+
 
     def set_controller(self, controller):
         """Define o controlador para esta view."""
@@ -147,6 +164,139 @@ class AppView(ttk.Window):
         return frame
 
 
+    def create_profiling_section(self, parent):
+        """Cria o painel recolhível 'Desempenho' (tempos e memória por etapa)."""
+        frame = ttk.Frame(parent)
+
+        self.profiling_toggle = ttk.Button(
+            frame,
+            text="▸ Desempenho",
+            command=self.toggle_profiling_panel,
+            bootstyle="secondary-link"
+        )
+        self.profiling_toggle.pack(anchor=W)
+
+        self.profiling_body = ttk.Frame(frame, padding=5)
+
+        options = ttk.Frame(self.profiling_body)
+        options.pack(fill=X)
+        self.profiling_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options, text="Medir desempenho (mais lento)", variable=self.profiling_var, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+        self.cprofile_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options, text="Salvar cProfile (.prof) na pasta de saída", variable=self.cprofile_var, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+
+        columns = ("tempo", "cpu", "memoria", "thread")
+        self.profiling_tree = ttk.Treeview(self.profiling_body, columns=columns, height=8)
+        self.profiling_tree.heading("#0", text="Etapa")
+        self.profiling_tree.heading("tempo", text="Tempo (s)")
+        self.profiling_tree.heading("cpu", text="CPU (s)")
+        self.profiling_tree.heading("memoria", text="Pico de memória (MB)")
+        self.profiling_tree.heading("thread", text="Thread")
+        self.profiling_tree.column("#0", width=260)
+        for column in columns:
+            self.profiling_tree.column(column, width=90, anchor=E)
+        self.profiling_tree.pack(fill=X, pady=5)
+
+        buttons = ttk.Frame(self.profiling_body)
+        buttons.pack(anchor=E)
+        self.export_json_button = ttk.Button(
+            buttons,
+            text="Exportar JSON",
+            command=lambda: self.controller.handle_export_profile("json"),
+            bootstyle="info-outline",
+            state="disabled"
+        )
+        self.export_json_button.pack(side=LEFT, padx=5)
+        self.export_trace_button = ttk.Button(
+            buttons,
+            text="Exportar trace (Chrome)",
+            command=lambda: self.controller.handle_export_profile("trace"),
+            bootstyle="info-outline",
+            state="disabled"
+        )
+        self.export_trace_button.pack(side=LEFT, padx=5)
+
+        return frame
+
+
+    def toggle_profiling_panel(self):
+        """Mostra ou esconde o conteúdo do painel de desempenho."""
+        if self.profiling_body.winfo_ismapped():
+            self.profiling_body.pack_forget()
+            self.profiling_toggle.config(text="▸ Desempenho")
+        else:
+            self.profiling_body.pack(fill=X)
+            self.profiling_toggle.config(text="▾ Desempenho")
+
+
+    def get_profiling_options(self) -> tuple[bool, bool]:
+        """Retorna (medir desempenho, salvar cProfile)."""
+        return self.profiling_var.get(), self.cprofile_var.get()
+
+
+    def show_profile(self, records):
+        """Exibe as etapas medidas (StageRecord), aninhadas pela etapa de origem."""
+        self.profiling_tree.delete(*self.profiling_tree.get_children())
+
+        for record in records:
+            memory = "" if record.memory_peak is None else f"{record.memory_peak / 2**20:.1f}"
+            parent = "" if record.parent is None else str(record.parent)
+            self.profiling_tree.insert(
+                parent if self.profiling_tree.exists(parent) else "",
+                END,
+                iid=str(record.id),
+                text=record.name if record.error is None else f"{record.name} (erro)",
+                values=(f"{record.wall:.3f}", f"{record.cpu:.3f}", memory, record.thread),
+                open=record.parent is None
+            )
+
+        state = "normal" if records else "disabled"
+        self.export_json_button.config(state=state)
+        self.export_trace_button.config(state=state)
+
+
+    def show_sweep(self, current_class, rows):
+        """Exibe, em uma janela, os resultados de cada classe proposta da varredura."""
+        window = ttk.Toplevel(master=self, title=f"Comparação de classes (classe atual {current_class})")
+        window.transient(self)
+
+        columns = ("canais", "dmax", "municipios", "ptot", "tcp", "vab", "vbc", "vpc", "ipca")
+        headings = ("Canais", "Dmax (km)", "Municípios", "Ptot", "Tcp", "Vab", "Vbc", "Vpc", "Vpc (IPCA)")
+        tree = ttk.Treeview(window, columns=columns, height=min(len(rows), 12))
+        tree.heading("#0", text="Classe")
+        tree.column("#0", width=70)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=110 if column in ("vab", "vbc", "vpc", "ipca") else 80, anchor=E)
+
+        # Valores no formato do relatório (locale pt_BR definido na geração do PDF)
+        def money(value):
+            return "-" if value is None or isinstance(value, str) else locale.format_string("%.2f", value, grouping=True)
+
+        for row in rows:
+            tree.insert("", END, text=row["classe_proposta"], values=(
+                row["canais"] or "-",
+                locale.format_string("%.1f", row["dmax"]),
+                len(row["municipios_afetados"]),
+                locale.format_string("%d", row["ptot"], grouping=True),
+                row["tcp"],
+                money(row["valor_ab"]),
+                money(row["valor_bc"]),
+                money(row["vpc"]),
+                money(row["ipca"])
+            ))
+        tree.pack(fill=BOTH, expand=True, padx=10, pady=10)
+
+        ipca_dates = {row["data_ipca"] for row in rows if row["data_ipca"]}
+        if ipca_dates:
+            ttk.Label(window, text=f"Correção pelo IPCA até {', '.join(sorted(ipca_dates))}.", bootstyle="secondary").pack(anchor=W, padx=10)
+        ttk.Button(window, text="Fechar", command=window.destroy, bootstyle="secondary").pack(pady=(5, 10))
+
+
     def _create_form_entry(self, parent, label_text, row, col_offset=0, placeholder=""):
         ttk.Label(parent, text=label_text).grid(row=row, column=col_offset, sticky=W, padx=5, pady=5)
         entry = ttk.Entry(parent)
@@ -263,16 +413,22 @@ class AppView(ttk.Window):
         return self.output_dir_var.get()
 
 
+    def set_status(self, message: str):
+        """Atualiza o texto da barra de status."""
+        self.status_var.set(message)
+
+
     def toggle_buttons(self, enabled: bool):
         """Ativa ou desativa os botões principais."""
         state = "normal" if enabled else "disabled"
         self.submit_button.config(state=state)
+        self.sweep_button.config(state=state)
         self.clear_button.config(state=state)
 
 
-    def show_loading(self):
+    def show_loading(self, title="Gerando PDF..."):
         """Mostra a janela de progresso."""
-        self.loading_window = ttk.Toplevel(master=self, title="Gerando PDF...")
+        self.loading_window = ttk.Toplevel(master=self, title=title)
         self.loading_window.geometry("300x100")
         self.loading_window.transient(self)
         self.loading_window.grab_set()
@@ -311,6 +467,17 @@ class AppView(ttk.Window):
         return messagebox.askyesno(title, message, parent=self)
 
 
+    def ask_save_file(self, title, initialdir, initialfile, extension) -> str | None:
+        return filedialog.asksaveasfilename(
+            title=title,
+            initialdir=initialdir,
+            initialfile=initialfile,
+            defaultextension=extension,
+            filetypes=[(extension.upper().lstrip("."), f"*{extension}")],
+            parent=self
+        )
+
+
     def ask_directory(self, initialdir) -> str | None:
         return filedialog.askdirectory(
             title="Selecione a pasta para salvar o PDF",
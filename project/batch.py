@@ -0,0 +1,39 @@
+import argparse
+from pathlib import Path
+
+import config
+from services.batch import run_batch
+
+
+def main():
+    """
+    Processamento em lote, sem interface gráfica: gera o relatório (e o
+    ofício, quando houver endereçamento) para cada linha do arquivo de
+    entrada.
+    """
+    parser = argparse.ArgumentParser(description="Gera relatórios de promoção de classe em lote a partir de um arquivo CSV ou JSON.")
+    parser.add_argument("entrada", type=Path, help="Arquivo CSV ou JSON com as mesmas chaves do formulário.")
+    parser.add_argument("--saida", default=config.get_default_download_path(), help="Pasta onde os documentos serão gravados.")
+    parser.add_argument("--processos", type=int, default=None, help="Quantidade de processos paralelos (padrão: número de núcleos).")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Arquivo de checkpoint (padrão: <saida>/lote_checkpoint.jsonl).")
+    parser.add_argument("--resumo", type=Path, default=None, help="Arquivo CSV de resumo (padrão: <saida>/lote_resumo.csv).")
+    parser.add_argument("--refazer-erros", action="store_true", help="Processa novamente as linhas que terminaram com erro.")
+    args = parser.parse_args()
+
+    dataset_paths = config.dataset_paths()
+
+    run_batch(
+        args.entrada,
+        args.saida,
+        dataset_paths,
+        config.PATH_IPCA_JSON,
+        (config.PLACEHOLDER_LAT, config.PLACEHOLDER_LON),
+        max_workers=args.processos,
+        path_checkpoint=args.checkpoint,
+        path_summary=args.resumo,
+        retry_errors=args.refazer_erros
+    )
+
+
+if __name__ == "__main__":
+    main()
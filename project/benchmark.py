@@ -0,0 +1,65 @@
+import argparse
+import json
+from pathlib import Path
+
+import config
+from services.benchmark import (BENCHMARK_CLASSES, append_record, benchmark_record, compare_records, default_history_path,
+                                read_records, run_benchmark)
+from services.synthetic_census import default_synthetic_path, synthetic_dataset_paths
+from synthetic_data import build_synthetic_data
+
+
+def print_results(record: dict):
+    print(f"{'Etapa':<26}{'Classe':<8}{'dmax':>7}{'Mediana (ms)':>15}{'Mínimo (ms)':>14}{'Média (ms)':>13}")
+    for result in record['resultados']:
+        print(f"{result['etapa']:<26}{result['classe']:<8}{result['dmax']:>7.1f}"
+              f"{result['mediana'] * 1000:>15.2f}{result['minimo'] * 1000:>14.2f}{result['media'] * 1000:>13.2f}")
+
+
+def print_comparison(previous: dict, record: dict):
+    print(f"\nComparação com a execução de {previous['data']} (commit {previous['commit']}):")
+    for item in compare_records(previous, record):
+        flag = "  <- regressão" if item['regressao'] else ""
+        print(f"{item['etapa']:<26}{item['classe']:<8}{item['anterior'] * 1000:>10.2f} ms -> "
+              f"{item['atual'] * 1000:>10.2f} ms ({item['variacao']:+.1%}){flag}")
+
+
+def main():
+    """
+    Mede o tempo das etapas do cálculo sobre uma base sintética (gerada se
+    ainda não existir) e grava a execução no histórico para comparação.
+    """
+    parser = argparse.ArgumentParser(description="Mede o desempenho das etapas do cálculo e do relatório.")
+    parser.add_argument("--dados", type=Path, default=default_synthetic_path(), help="Pasta da base sintética (gerada por synthetic_data.py; padrão: pasta de cache do usuário).")
+    parser.add_argument("--setores", type=int, default=20_000, help="Quantidade de setores, se a base precisar ser gerada.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições medidas de cada classe.")
+    parser.add_argument("--classes", nargs="+", default=list(BENCHMARK_CLASSES), help="Classes propostas medidas.")
+    parser.add_argument("--historico", type=Path, default=default_history_path(), help="Arquivo JSON Lines com o histórico de execuções (padrão: pasta de cache do usuário).")
+    parser.add_argument("--comparar", action="store_true", help="Compara com a execução anterior sobre a mesma base.")
+    args = parser.parse_args()
+
+    paths = synthetic_dataset_paths(args.dados, config.PATH_UF_JSON)
+    if not paths['path_municipalities'].exists():
+        paths = build_synthetic_data(args.dados, args.setores)
+
+    with open(paths['path_census_sectors'].parent / 'parametros.json', 'r', encoding='utf-8') as file:
+        parameters = json.load(file)
+
+    results, memory = run_benchmark(paths, config.PATH_IPCA_JSON, args.classes, args.repeticoes)
+    record = benchmark_record(results, memory, args.repeticoes, parameters, config.PROJECT_ROOT)
+    print_results(record)
+    print(f"\nMemória do dataset: {memory['total'] / 2**20:.1f} MB")
+
+    if args.comparar:
+        previous = [item for item in read_records(args.historico) if item['dados'] == parameters]
+        if previous:
+            print_comparison(previous[-1], record)
+        else:
+            print("\nNenhuma execução anterior sobre esta base para comparar.")
+
+    append_record(args.historico, record)
+    print(f"\nExecução gravada em '{args.historico}'.")
+
+
+if __name__ == "__main__":
+    main()
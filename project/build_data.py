@@ -0,0 +1,62 @@
+import argparse
+from pathlib import Path
+
+import config
+from services.census_dataset import CensusDataset
+from services.census_store import build_census_store, build_municipality_layer, build_urban_seat_layer
+from services.coverage_cache import data_manifest_path, default_coverage_cache_path, write_data_manifest
+from services.map_geometries import build_simplified_layers
+from services.municipality_index import build_municipality_index
+
+
+def build_all(path_shp: Path, path_census_store: Path, path_municipalities: Path, path_urban_seats: Path,
+              path_municipality_index: Path, path_map_geometries: Path):
+    """Gera todas as bases derivadas a partir do Shapefile 'path_shp'."""
+    total_setores = build_census_store(path_shp, path_census_store)
+    print(f"Setores censitários: {total_setores} linhas gravadas em '{path_census_store}'.")
+
+    total_municipios = build_municipality_layer(path_census_store, path_municipalities)
+    print(f"Municípios: {total_municipios} linhas gravadas em '{path_municipalities}'.")
+
+    total_sedes = build_urban_seat_layer(path_census_store, path_urban_seats)
+    print(f"Sedes urbanas: {total_sedes} linhas gravadas em '{path_urban_seats}'.")
+
+    total_indice = build_municipality_index(path_municipalities, path_municipality_index)
+    print(f"Índice de municípios: {total_indice} nomes gravados em '{path_municipality_index}'.")
+
+    total_geometrias = build_simplified_layers(path_municipalities, path_urban_seats, path_map_geometries)
+    print(f"Geometrias do mapa: {total_geometrias} linhas gravadas em '{path_map_geometries}'.")
+
+    # Conteúdo das bases (versão dos dados do cache de cobertura, sem reler os arquivos a cada execução)
+    path_manifest = data_manifest_path(path_census_store)
+    write_data_manifest([path_census_store, path_municipalities, path_urban_seats, path_municipality_index,
+                         path_map_geometries], path_manifest)
+    print(f"Versão dos dados gravada em '{path_manifest}'.")
+
+
+def main():
+    """
+    Gera, uma única vez, as bases derivadas do Shapefile de setores censitários
+    do IBGE usadas pelo cálculo.
+    """
+    parser = argparse.ArgumentParser(description="Gera as bases derivadas a partir do Shapefile de setores censitários do IBGE.")
+    parser.add_argument("--shp", type=Path, default=config.PATH_SHP, help="Caminho do Shapefile BR_setores_CD2022.shp.")
+    parser.add_argument("--setores", type=Path, default=config.PATH_CENSUS_STORE, help="Caminho do GeoParquet de setores a ser gerado.")
+    parser.add_argument("--municipios", type=Path, default=config.PATH_MUNICIPALITIES, help="Caminho da camada de municípios a ser gerada.")
+    parser.add_argument("--sedes", type=Path, default=config.PATH_URBAN_SEATS, help="Caminho da camada de sedes urbanas a ser gerada.")
+    parser.add_argument("--indice", type=Path, default=config.PATH_MUNICIPALITY_INDEX, help="Caminho do índice de nomes de municípios a ser gerado.")
+    parser.add_argument("--geometrias-mapa", type=Path, default=config.PATH_MAP_GEOMETRIES, help="Caminho das geometrias simplificadas do mapa a serem geradas.")
+    parser.add_argument("--limpar-cache-cobertura", action="store_true", help="Apaga do cache de cobertura as entradas das bases anteriores.")
+    args = parser.parse_args()
+
+    build_all(args.shp, args.setores, args.municipios, args.sedes, args.indice, args.geometrias_mapa)
+
+    if args.limpar_cache_cobertura:
+        dataset = CensusDataset(args.shp, config.PATH_UF_JSON, args.setores, args.municipios, args.sedes,
+                                path_coverage_cache=default_coverage_cache_path())
+        total_apagadas = dataset.coverage_cache.prune()
+        print(f"Cache de cobertura: {total_apagadas} entradas de versões anteriores apagadas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,32 @@ except Exception:
 
 # --- CAMINHOS DE DADOS ---
 PATH_SHP = PROJECT_ROOT / "data" / "mapa" / "BR_setores_CD2022.shp"
+PATH_CENSUS_STORE = PROJECT_ROOT / "data" / "setores_censitarios.parquet"
+PATH_MUNICIPALITIES = PROJECT_ROOT / "data" / "municipios.parquet"
+PATH_URBAN_SEATS = PROJECT_ROOT / "data" / "sedes_urbanas.parquet"
+PATH_MUNICIPALITY_INDEX = PROJECT_ROOT / "data" / "municipios_indice.json"
+PATH_MAP_GEOMETRIES = PROJECT_ROOT / "data" / "geometrias_mapa.parquet"
 PATH_UF_JSON = PROJECT_ROOT / "data" / "uf_code.json"
 PATH_IPCA_JSON = PROJECT_ROOT / "data" / "ipca.json"
 
+
+def dataset_paths() -> dict:
+    """Argumentos do CensusDataset com as bases de 'data/' e o cache de cobertura na pasta de cache do usuário."""
+    # Importado aqui para não carregar o numpy e o shapely junto com a configuração
+    from services.coverage_cache import default_coverage_cache_path
+
+    return {
+        'path_census_sectors': PATH_SHP,
+        'path_uf': PATH_UF_JSON,
+        'path_census_store': PATH_CENSUS_STORE,
+        'path_municipalities': PATH_MUNICIPALITIES,
+        'path_urban_seats': PATH_URBAN_SEATS,
+        'path_municipality_index': PATH_MUNICIPALITY_INDEX,
+        'path_map_geometries': PATH_MAP_GEOMETRIES,
+        'path_coverage_cache': default_coverage_cache_path()
+    }
+
+
 # --- DADOS DO FORMULÁRIO ---
 UFS = [
     "AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", 
@@ -0,0 +1,51 @@
+import argparse
+from pathlib import Path
+
+import config
+from services.census_dataset import CensusDataset
+from services.cost_grid import build_grid, grid_job, render_heatmap, run_cost_grid, write_cost_grid
+
+DEFAULT_OUTPUT = Path(config.get_default_download_path()) / "grade_custos"
+
+
+def main():
+    """
+    Calcula o custo da promoção (Ptot e Vpc) em cada ponto de uma grade de
+    locais candidatos para a estação e grava a grade (GeoParquet) e o mapa
+    de calor (PNG).
+    """
+    parser = argparse.ArgumentParser(description="Gera o mapa de calor do custo da promoção de classe sobre uma grade de locais candidatos.")
+    parser.add_argument("--bbox", type=float, nargs=4, required=True, metavar=("OESTE", "SUL", "LESTE", "NORTE"),
+                        help="Retângulo da grade, em graus decimais (longitudes a oeste e latitudes ao sul negativas).")
+    parser.add_argument("--espacamento", type=float, default=5.0, help="Distância entre os pontos da grade, em km.")
+    parser.add_argument("--uf", required=True, help="UF proposta (sigla).")
+    parser.add_argument("--municipio", required=True, help="Município proposto (usado como município de referência).")
+    parser.add_argument("--classe-atual", required=True, help="Classe atual da estação.")
+    parser.add_argument("--classe-proposta", required=True, help="Classe proposta da estação.")
+    parser.add_argument("--canal", default="", help="Canal proposto (para as classes cujo dmax depende do canal).")
+    parser.add_argument("--processos", type=int, default=None, help="Quantidade de processos paralelos (padrão: número de núcleos).")
+    parser.add_argument("--saida", type=Path, default=DEFAULT_OUTPUT, help="Prefixo dos arquivos gerados (.parquet e .png).")
+    args = parser.parse_args()
+
+    dataset_paths = config.dataset_paths()
+
+    grid = build_grid(tuple(args.bbox), args.espacamento)
+    west, south, east, north = args.bbox
+    job = grid_job(args.uf.upper(), args.municipio, args.classe_atual.upper(), args.classe_proposta.upper(),
+                   args.canal, (south + north) / 2, (west + east) / 2)
+
+    dataset = CensusDataset(**dataset_paths)
+    gdf_grid = run_cost_grid(dataset_paths, job, grid, max_workers=args.processos, dataset=dataset)
+
+    path_grid = args.saida.with_suffix('.parquet')
+    write_cost_grid(gdf_grid, path_grid)
+    print(f"Grade gravada em '{path_grid}'.")
+
+    path_heatmap = args.saida.with_suffix('.png')
+    title = f"Vpc da promoção {job.current_class} → {job.proposed_class} ({args.municipio}/{job.proposed_state})"
+    render_heatmap(gdf_grid, grid, path_heatmap, title, dataset=dataset)
+    print(f"Mapa de calor gravado em '{path_heatmap}'.")
+
+
+if __name__ == "__main__":
+    main()
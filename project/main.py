@@ -1,7 +1,21 @@
+import time
+
+# Marca o início da execução para a medição do tempo de inicialização
+INICIO = time.perf_counter()
+
+import argparse
 import config
 from app import AppView, AppController
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cálculo de Promoção de Classe de Estações.")
+    parser.add_argument(
+        "--medir-inicializacao",
+        action="store_true",
+        help="Mostra o tempo até a primeira tela interativa e encerra a aplicação."
+    )
+    args = parser.parse_args()
+
     default_path = config.get_default_download_path()
     ufs_list = config.UFS
     classes_list = config.CLASSES
@@ -20,4 +34,15 @@ if __name__ == "__main__":
 
     controller = AppController(view)
     view.set_controller(controller)
+
+    if args.medir_inicializacao:
+        def report_startup():
+            print(f"Tempo até a primeira tela interativa: {time.perf_counter() - INICIO:.3f} s")
+            view.destroy()
+
+        view.after_idle(report_startup)
+    else:
+        # O carregamento dos dados começa assim que o loop de eventos estiver ocioso
+        view.after_idle(controller.start_warmup)
+
     view.mainloop()
\ No newline at end of file
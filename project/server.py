@@ -0,0 +1,45 @@
+import argparse
+
+import config
+from services.http_service import create_server
+
+
+def main():
+    """
+    Serviço HTTP local: recebe os dados do formulário em JSON e devolve os
+    resultados do cálculo, o relatório PDF ou o ofício DOCX.
+    """
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de cálculo de promoção de classe.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1).")
+    parser.add_argument("--porta", type=int, default=8765, help="Porta de escuta (padrão: 8765).")
+    parser.add_argument("--processos", type=int, default=2, help="Quantidade de processos de cálculo (padrão: 2).")
+    parser.add_argument("--fila", type=int, default=8, help="Máximo de pedidos em andamento; acima disso responde 503 (padrão: 8).")
+    parser.add_argument("--tempo-limite", type=float, default=120.0, help="Tempo máximo de espera por pedido, em segundos; acima disso responde 504 (padrão: 120).")
+    args = parser.parse_args()
+
+    dataset_paths = config.dataset_paths()
+
+    print("Carregando os dados censitários nos processos de cálculo...")
+    server = create_server(
+        args.host,
+        args.porta,
+        dataset_paths,
+        config.PATH_IPCA_JSON,
+        (config.PLACEHOLDER_LAT, config.PLACEHOLDER_LON),
+        max_workers=args.processos,
+        max_pending=args.fila,
+        request_timeout=args.tempo_limite
+    )
+
+    host, port = server.server_address[:2]
+    print(f"Servidor disponível em http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
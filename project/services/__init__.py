@@ -1,14 +1,51 @@
-from .calculation_service import CalculationService
-from .create_pdf_oficio import create_word_doc
-from .create_pdf import create_relatorio
-from .ipca import ipca_calculation
-from .utils import capitalizar_string, dms_for_decimal
+import importlib
+
+# Os módulos de cálculo e de documentos importam geopandas, matplotlib,
+# reportlab e python-docx; só são carregados no primeiro acesso ao nome.
+_LAZY_EXPORTS = {
+    'CalculationJob': '.calculation_job',
+    'CalculationService': '.calculation_service',
+    'CensusDataset': '.census_dataset',
+    'capitalizar_string': '.utils',
+    'create_relatorio': '.create_pdf',
+    'create_word_doc': '.create_pdf_oficio',
+    'default_coverage_cache_path': '.coverage_cache',
+    'dms_for_decimal': '.utils',
+    'generate_documents': '.report_pipeline',
+    'get_ipca_store': '.ipca_store',
+    'ipca_calculation': '.ipca',
+    'Profiler': '.profiling',
+    'sweep_form': '.class_sweep',
+}
 
 __all__ = [
+    'CalculationJob',
     'CalculationService',
+    'CensusDataset',
     'capitalizar_string',
     'create_relatorio',
     'create_word_doc',
+    'default_coverage_cache_path',
     'dms_for_decimal',
+    'generate_documents',
+    'get_ipca_store',
     'ipca_calculation',
-]
\ No newline at end of file
+    'Profiler',
+    'sweep_form',
+]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def preload():
+    """Importa antecipadamente todos os módulos pesados (usado no aquecimento em segundo plano)."""
+    for name in __all__:
+        getattr(importlib.import_module(__name__), name)
\ No newline at end of file
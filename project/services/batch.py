@@ -0,0 +1,147 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import hashlib
+import json
+import os
+from pathlib import Path
+import traceback
+
+from .report_pipeline import generate_documents
+from .validation import normalize_form_data, validate_form_data
+from .workers import init_worker, worker_dataset
+
+SUMMARY_COLUMNS = ['linha', 'numero_processo', 'status', 'vpc', 'ipca', 'data_ipca', 'arquivos', 'erro']
+
+
+def read_batch_rows(path_input: Path) -> list[dict]:
+    """
+    Lê o arquivo de entrada do lote: JSON (lista de objetos) ou CSV (separado
+    por ';', ',' ou tabulação) com as mesmas chaves do formulário.
+    """
+    path_input = Path(path_input)
+
+    if path_input.suffix.lower() == '.json':
+        with open(path_input, 'r', encoding='utf-8') as file:
+            rows = json.load(file)
+    else:
+        with open(path_input, 'r', newline='', encoding='utf-8-sig') as file:
+            dialect = csv.Sniffer().sniff(file.read(4096), delimiters=';,\t')
+            file.seek(0)
+            rows = list(csv.DictReader(file, dialect=dialect))
+
+    return [normalize_form_data(row) for row in rows]
+
+
+def row_key(data: dict) -> str:
+    """
+    Chave de uma linha no checkpoint: número do processo e SHA-256 dos dados
+    da linha. Não depende da posição da linha no arquivo de entrada.
+    """
+    content = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+    return f"{data.get('numero_processo', '')}:{hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]}"
+
+
+def read_checkpoint(path_checkpoint: Path) -> dict[str, dict]:
+    """Retorna o último registro gravado para cada chave ('row_key') do lote."""
+    records = {}
+    if not Path(path_checkpoint).exists():
+        return records
+
+    with open(path_checkpoint, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Linha incompleta (execução interrompida durante a gravação)
+                continue
+            # Registros sem chave (checkpoints antigos) não valem para nenhuma linha
+            if 'chave' in record:
+                records[record['chave']] = record
+
+    return records
+
+
+def write_summary(path_summary: Path, records: list[dict]):
+    """Grava o resumo do lote em CSV (uma linha por processo)."""
+    with open(path_summary, 'w', newline='', encoding='utf-8-sig') as file:
+        writer = csv.DictWriter(file, fieldnames=SUMMARY_COLUMNS, delimiter=';', extrasaction='ignore')
+        writer.writeheader()
+        for record in sorted(records, key=lambda r: r['linha']):
+            writer.writerow({**record, 'arquivos': ' | '.join(record.get('arquivos', []))})
+
+
+def _process_row(linha: int, key: str, data: dict, output_directory: str, path_ipca: Path, placeholders: tuple) -> dict:
+    """Processa uma linha do lote. Erros são capturados e devolvidos no registro."""
+    record = {'linha': linha, 'chave': key, 'numero_processo': data.get('numero_processo', '')}
+
+    try:
+        campos_invalidos = validate_form_data(data, *placeholders)
+        if campos_invalidos:
+            raise ValueError("Campos obrigatórios não preenchidos: " + ", ".join(campos_invalidos))
+
+        resultado, arquivos = generate_documents(worker_dataset(), data, output_directory, path_ipca)
+        record.update(status='ok', vpc=resultado['vpc'], ipca=resultado['ipca'], data_ipca=resultado['data_ipca'], arquivos=arquivos)
+    except Exception as e:
+        record.update(status='erro', erro=str(e), detalhes=traceback.format_exc())
+
+    return record
+
+
+def run_batch(path_input: Path, output_directory: str, dataset_paths: dict, path_ipca: Path, placeholders: tuple,
+              max_workers: int | None = None, path_checkpoint: Path | None = None, path_summary: Path | None = None,
+              retry_errors: bool = False, progress=print) -> list[dict]:
+    """
+    Executa o fluxo de geração de documentos para todas as linhas de
+    'path_input' em um pool de processos.
+
+    Cada linha concluída é registrada no checkpoint (JSON Lines) com a sua
+    chave ('row_key'); ao executar de novo com o mesmo checkpoint, as linhas
+    cuja chave já foi concluída (e, sem 'retry_errors', também as com erro)
+    são puladas, mesmo que tenham mudado de posição. Linhas alteradas ficam
+    pendentes. Ao final é gravado o resumo em CSV, com as linhas atuais da
+    entrada.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    path_checkpoint = Path(path_checkpoint or Path(output_directory) / 'lote_checkpoint.jsonl')
+    path_summary = Path(path_summary or Path(output_directory) / 'lote_resumo.csv')
+
+    rows = read_batch_rows(path_input)
+    keys = [row_key(data) for data in rows]
+    records = read_checkpoint(path_checkpoint)
+
+    done_status = {'ok'} if retry_errors else {'ok', 'erro'}
+    pending = [
+        (linha, key, data) for linha, (key, data) in enumerate(zip(keys, rows), start=1)
+        if records.get(key, {}).get('status') not in done_status
+    ]
+    progress(f"{len(rows)} linhas no lote, {len(rows) - len(pending)} já processadas, {len(pending)} pendentes.")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(dataset_paths,)) as executor, \
+                open(path_checkpoint, 'a', encoding='utf-8') as checkpoint:
+            futures = [
+                executor.submit(_process_row, linha, key, {**data, 'output_directory': output_directory},
+                                output_directory, path_ipca, placeholders)
+                for linha, key, data in pending
+            ]
+
+            for finished, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                records[record['chave']] = record
+
+                checkpoint.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                checkpoint.flush()
+
+                progress(f"[{finished}/{len(pending)}] linha {record['linha']} ({record['numero_processo']}): {record['status']}")
+
+    # Registros das linhas atuais da entrada, na posição atual (os de linhas removidas ou alteradas ficam de fora)
+    results = [dict(records[key], linha=linha) for linha, key in enumerate(keys, start=1) if key in records]
+    write_summary(path_summary, results)
+
+    total_erros = sum(1 for record in results if record['status'] == 'erro')
+    progress(f"Concluído: {len(results) - total_erros} com sucesso, {total_erros} com erro. Resumo em '{path_summary}'.")
+
+    return results
@@ -0,0 +1,245 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+import json
+import math
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+from .calculation_job import CalculationJob
+from .calculation_service import CalculationService
+from .census_dataset import CensusDataset
+from .census_store import read_municipality_layer
+from .coverage_cache import CoverageCache
+from .create_pdf import create_relatorio
+from .ipca import ipca_calculation
+from .ipca_store import IPCAStore, default_cache_path
+from .utils import decimal_to_dms
+
+# Classes propostas medidas (raios crescentes do contorno protegido, todas com mudança de grupo a partir da C)
+BENCHMARK_CLASSES = ('A4', 'A1', 'E3', 'E1')
+BENCHMARK_CURRENT_CLASS = 'C'
+
+# Município da estação e do município de referência (Campinas/SP)
+BENCHMARK_STATE = 'SP'
+BENCHMARK_MUNICIPALITY_CODE = '3509502'
+
+# Variação da mediana, em relação à execução anterior, considerada regressão
+REGRESSION_THRESHOLD = 0.10
+
+
+def default_history_path() -> Path:
+    """Histórico de execuções, na mesma pasta dos caches do IPCA e da cobertura."""
+    return default_cache_path().with_name('benchmark_resultados.jsonl')
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """Tempos (segundos) de uma etapa para uma classe proposta."""
+
+    stage: str
+    proposed_class: str
+    dmax: float
+    samples: list[float] = field(default_factory=list)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def minimum(self) -> float:
+        return min(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    def to_dict(self) -> dict:
+        return {
+            'etapa': self.stage,
+            'classe': self.proposed_class,
+            'dmax': self.dmax,
+            'mediana': self.median,
+            'minimo': self.minimum,
+            'media': self.mean,
+            'amostras': self.samples
+        }
+
+
+def benchmark_job(dataset: CensusDataset, path_municipalities: Path, proposed_class: str) -> CalculationJob:
+    """
+    Pedido de promoção para 'proposed_class' com a estação no município de
+    referência de SP (ponto interno do município na base usada).
+    """
+    municipalities = read_municipality_layer(path_municipalities)
+    point = municipalities.geometry.loc[int(BENCHMARK_MUNICIPALITY_CODE)].representative_point()
+    name, _, _ = dataset.municipality_table().record(BENCHMARK_MUNICIPALITY_CODE)
+    latitude = decimal_to_dms(point.y, 'N', 'S')
+    longitude = decimal_to_dms(point.x, 'E', 'W')
+
+    return CalculationJob(
+        process_number='53500.000000/2024-00',
+        service='FM',
+        entity='Benchmark',
+        finality='Comercial',
+        public_consultation='1',
+        current_municipality=name,
+        current_state=BENCHMARK_STATE,
+        current_class=BENCHMARK_CURRENT_CLASS,
+        current_channel='200',
+        current_latitude=latitude,
+        current_longitude=longitude,
+        proposed_municipality=name,
+        proposed_state=BENCHMARK_STATE,
+        proposed_class=proposed_class,
+        proposed_channel='200',
+        proposed_latitude=latitude,
+        proposed_longitude=longitude
+    )
+
+
+def _timed(results: dict, name: str, function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    results[name].samples.append(time.perf_counter() - start)
+    return value
+
+
+def _run_once(dataset: CensusDataset, job: CalculationJob, path_ipca: Path, store: IPCAStore, results: dict) -> CalculationService:
+    """Uma repetição de todas as etapas do cálculo e do relatório."""
+    service = _timed(results, 'construcao', CalculationService, dataset, job)
+    service.data_process(service.current_class, service.proposed_class, service.current_latitude,
+                         service.current_longitude, service.proposed_state, service.proposed_municipality_code)
+    _timed(results, 'geo_process', service.geo_process)
+
+    covered_municipalities = service.municipality_table.records(
+        service.covered_municipalities_codes, service.state_abbreviations)
+    _timed(results, 'calculo_promocao_classe', service.calculo_promocao_classe, covered_municipalities)
+    mapa = _timed(results, 'creat_map', service.creat_map)
+    ipca_value, ipca_date = _timed(results, 'ipca_calculation', ipca_calculation, service.Vpc, path_ipca, store)
+
+    # Resultado completo para o relatório (fora da medição)
+    resultado = service.get_results(include_map=False)
+    resultado.update({'mapa': mapa, 'ipca': ipca_value, 'data_ipca': ipca_date, 'incluir_enderecamento': False})
+    _timed(results, 'create_relatorio', create_relatorio, None, resultado)
+    return service
+
+
+def run_benchmark(dataset_paths: dict, path_ipca: Path, classes=BENCHMARK_CLASSES,
+                  repetitions: int = 5) -> tuple[list[BenchmarkResult], dict]:
+    """
+    Mede as etapas do cálculo para cada classe proposta (raios crescentes do
+    contorno protegido): carga do dataset, construção do CalculationService,
+    geo_process, calculo_promocao_classe, creat_map, create_relatorio e
+    ipca_calculation. Cada classe tem uma execução de aquecimento, fora das
+    amostras. O IPCA vem apenas da série local, sem consultas à API.
+    O geo_process é medido sem o cache de cobertura e, em 'geo_process_cache',
+    com o resultado já no cache em memória.
+    Retorna também a memória do dataset ao final ('memory_report').
+    """
+    load = BenchmarkResult('carga_dataset', '-', 0.0)
+    start = time.perf_counter()
+    dataset = CensusDataset(**dataset_paths, coverage_cache_entries=0)
+    dataset.warm_up()
+    load.samples.append(time.perf_counter() - start)
+
+    all_results = [load]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = IPCAStore(Path(cache_dir) / 'ipca_cache.json', path_ipca, ttl=math.inf)
+
+        for proposed_class in classes:
+            job = benchmark_job(dataset, dataset_paths['path_municipalities'], proposed_class)
+            results = {
+                name: BenchmarkResult(name, proposed_class, 0.0)
+                for name in ('construcao', 'geo_process', 'calculo_promocao_classe', 'creat_map',
+                             'ipca_calculation', 'create_relatorio')
+            }
+
+            service = _run_once(dataset, job, path_ipca, store, results)
+            for result in results.values():
+                result.dmax = float(service.dmax_contour)
+                result.samples.clear()
+
+            for _ in range(repetitions):
+                _run_once(dataset, job, path_ipca, store, results)
+            all_results.extend(results.values())
+
+            # Mesma estação com o resultado no cache de cobertura
+            cached = BenchmarkResult('geo_process_cache', proposed_class, float(service.dmax_contour))
+            dataset.coverage_cache = CoverageCache(dataset.version)
+            service.geo_process()
+            for _ in range(repetitions):
+                _timed({cached.stage: cached}, cached.stage, service.geo_process)
+            dataset.coverage_cache = None
+            all_results.append(cached)
+
+    return all_results, dataset.memory_report()
+
+
+def _git_commit(directory: Path) -> str | None:
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=directory,
+                                capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_record(results: list[BenchmarkResult], memory: dict, repetitions: int, dataset_parameters: dict,
+                     source_dir: Path) -> dict:
+    """Execução com o ambiente (data, commit, Python, plataforma), os parâmetros da base e a memória do dataset."""
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(source_dir),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'dados': dataset_parameters,
+        'repeticoes': repetitions,
+        'memoria': memory,
+        'resultados': [result.to_dict() for result in results]
+    }
+
+
+def append_record(path: Path, record: dict):
+    """Acrescenta a execução ao histórico (JSON Lines)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def read_records(path: Path) -> list[dict]:
+    """Execuções gravadas no histórico, da mais antiga para a mais recente."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def compare_records(previous: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> list[dict]:
+    """
+    Compara as medianas de cada etapa e classe com as de uma execução
+    anterior. 'variacao' é relativa à anterior; 'regressao' indica um
+    aumento acima de 'threshold'.
+    """
+    before = {(result['etapa'], result['classe']): result['mediana'] for result in previous['resultados']}
+    comparison = []
+    for result in current['resultados']:
+        key = (result['etapa'], result['classe'])
+        if key not in before or before[key] <= 0:
+            continue
+        change = result['mediana'] / before[key] - 1
+        comparison.append({
+            'etapa': result['etapa'],
+            'classe': result['classe'],
+            'anterior': before[key],
+            'atual': result['mediana'],
+            'variacao': change,
+            'regressao': change > threshold
+        })
+    return comparison
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+
+from .calculation_service import CalculationService
+from .census_dataset import CensusDataset
+
+
+@dataclass(frozen=True, slots=True)
+class CalculationJob:
+    """
+    Pedido de cálculo imutável com os dados do formulário. Não guarda estado
+    intermediário e pode ser executado sobre qualquer CensusDataset já
+    carregado.
+    """
+
+    # Dados do processo
+    process_number: str
+    service: str
+    entity: str
+    finality: str
+    public_consultation: str
+
+    # Dados da estação atual
+    current_municipality: str
+    current_state: str
+    current_class: str
+    current_channel: str
+    current_latitude: str
+    current_longitude: str
+
+    # Dados da situação proposta
+    proposed_municipality: str
+    proposed_state: str
+    proposed_class: str
+    proposed_channel: str
+    proposed_latitude: str
+    proposed_longitude: str
+
+    @classmethod
+    def from_form(cls, data: dict) -> 'CalculationJob':
+        """Cria o pedido a partir do dicionário de dados processados do formulário."""
+        return cls(
+            process_number=data['numero_processo'],
+            service=data['servico'],
+            entity=data['entidade'],
+            finality=data['finalidade'],
+            public_consultation=data['consulta_publica'],
+            current_municipality=data['municipio_atual'],
+            current_state=data['uf_atual'],
+            current_class=data['classe_atual'],
+            current_channel=data['canal_atual'],
+            current_latitude=data['latitude_atual'],
+            current_longitude=data['longitude_atual'],
+            proposed_municipality=data['municipio_proposto'],
+            proposed_state=data['uf_proposta'],
+            proposed_class=data['classe_proposta'],
+            proposed_channel=data['canal_proposto'],
+            proposed_latitude=data['latitude_proposta'],
+            proposed_longitude=data['longitude_proposta']
+        )
+
+    def run(self, dataset: CensusDataset, include_map: bool = True) -> dict:
+        """
+        Executa o cálculo sobre o 'dataset' e retorna o dicionário de
+        resultados. Com 'include_map', o mapa vai em 'mapa' (PNG em bytes).
+        """
+        return CalculationService(dataset, self).get_results(include_map)
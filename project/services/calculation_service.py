@@ -1,20 +1,29 @@
 import geopandas as gpd
-import json
-import matplotlib
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
+import io
 import numpy as np
-import os
-from pathlib import Path
-import pandas as pd
-import re
 import shapely.geometry
-import tempfile
 
+from .census_dataset import CensusDataset
+from .contour import GEOGRAPHIC_CRS, protected_contour
+from .coverage_cache import CoverageResult
+from .map_geometries import choose_tolerance, extent_for_radius, replace_geometries
+from .map_renderer import MapLayers, axes_width_px, render_map
+from .municipality_table import MunicipalityRecord
+from .profiling import profiled, stage
+from .tariff import (
+    CLASS_GROUPS,
+    CLASS_INDEX,
+    GROUP_CHANGE_MATRIX,
+    GROUP_INDEX,
+    NOT_APPLICABLE,
+    PAYMENT_MATRIX,
+    PROMOTION_PERIOD,
+    TCP_MATRIX,
+    VAB_BY_GROUP,
+    VBC_BY_GROUP
+)
 from .utils import dms_for_decimal
 
-matplotlib.use('Agg')
-
 class CalculationService:
     dmax_values = {
             'e': [(range(0, 14), 65.6), (range(14, 47), 58.0), (range(47, 100), 58.0)],
@@ -26,17 +35,7 @@ class CalculationService:
             'a4': 24.0, 'b1': 16.5, 'b2': 12.5
         }
     
-    promotion_period = {
-            'C': {'B2': 0, 'B1': 0, 'A4': 2, 'A3': 2, 'A2': 6, 'A1': 6, 'E3': 8, 'E2': 10, 'E1': 12},
-            'B2': {'B1': 0, 'A4': 0, 'A3': 2, 'A2': 4, 'A1': 4, 'E3': 6, 'E2': 8, 'E1': 10},
-            'B1': {'A4': 0, 'A3': 0, 'A2': 2, 'A1': 2, 'E3': 4, 'E2': 6, 'E1': 8},
-            'A4': {'A3': 0, 'A2': 0, 'A1': 2, 'E3': 4, 'E2': 6, 'E1': 8},
-            'A3': {'A2': 0, 'A1': 0, 'E3': 2, 'E2': 4, 'E1': 6},
-            'A2': {'A1': 0, 'E3': 2, 'E2': 4, 'E1': 6},
-            'A1': {'E3': 0, 'E2': 2, 'E1': 4},
-            'E3': {'E2': 0, 'E1': 2},
-            'E2': {'E1': 0}
-        }
+    promotion_period = PROMOTION_PERIOD
 
     referencias = {
         'B': {
@@ -117,38 +116,57 @@ class CalculationService:
         }
     }
     
-    def __init__(self, path_census_sectors: Path, path_uf: Path, data: dict):
-        self.path_census_sectors = path_census_sectors
-        
-        with open(path_uf, 'r', encoding='utf-8') as file:
-            self.uf_names = json.load(file)
+    @profiled()
+    def __init__(self, dataset: CensusDataset, job):
+        """
+        Cálculo de um único pedido ('job', um CalculationJob) sobre os dados
+        censitários já carregados em 'dataset'. O estado intermediário fica
+        nesta instância; o 'dataset' não é alterado e pode ser reutilizado.
+        """
+        self.dataset = dataset
+        self.uf_names = dataset.uf_names
+        self.municipality_table = dataset.municipality_table()
+        self.coverage_engine = dataset.coverage_engine
 
         # Dados do processo
-        self.process_number = data['numero_processo']
-        self.service = data['servico']
-        self.entity = data['entidade']
-        self.finality = data['finalidade']
-        self.public_consultation = data['consulta_publica']
+        self.process_number = job.process_number
+        self.service = job.service
+        self.entity = job.entity
+        self.finality = job.finality
+        self.public_consultation = job.public_consultation
 
         # Dados da estação atual
-        self.current_municipality = data['municipio_atual']
-        self.current_state = data['uf_atual']
-        self.current_class = data['classe_atual']
-        self.current_channel = data['canal_atual']
-        self.current_latitude = data['latitude_atual']
-        self.current_longitude = data['longitude_atual']
+        self.current_municipality = job.current_municipality
+        self.current_state = job.current_state
+        self.current_class = job.current_class
+        self.current_channel = job.current_channel
+        self.current_latitude = job.current_latitude
+        self.current_longitude = job.current_longitude
 
         # Dados da situação proposta
-        self.proposed_municipality = data['municipio_proposto']
-        self.proposed_state = data['uf_proposta']
-        self.proposed_class = data['classe_proposta']
-        self.proposed_channel = data['canal_proposto']
-        self.proposed_latitude = data['latitude_proposta']
-        self.proposed_longitude = data['longitude_proposta']
-
-        # Mapeia as siglas para os nomes completos
+        self.proposed_municipality = job.proposed_municipality
+        self.proposed_state = job.proposed_state
+        self.proposed_class = job.proposed_class
+        self.proposed_channel = job.proposed_channel
+        self.proposed_latitude = job.proposed_latitude
+        self.proposed_longitude = job.proposed_longitude
+
+        # Mapeia as siglas para os nomes completos (e os nomes para as siglas)
         self.current_name_state = self.uf_names.get(self.current_state)
         self.proposed_name_state = self.uf_names.get(self.proposed_state)
+        self.state_abbreviations = {name.strip(): abbreviation.strip() for abbreviation, name in self.uf_names.items()}
+
+        # Valida os municípios antes de qualquer geoprocessamento
+        self.current_municipality_code = self._get_municipality_code(
+            self.current_municipality,
+            self.current_name_state,
+            "Atual"
+        )
+        self.proposed_municipality_code = self._get_municipality_code(
+            self.proposed_municipality,
+            self.proposed_name_state,
+            "Proposto"
+        )
 
         self.proposed_latitude_decimal = dms_for_decimal(self.proposed_latitude)
         self.proposed_longitude_decimal = dms_for_decimal(self.proposed_longitude)
@@ -157,42 +175,28 @@ class CalculationService:
         # Geodataframe do contorno protegido circular da classe proposta do canal
         self.gdf_protected_contour = self.create_circle_gdf(
             self.proposed_latitude_decimal, self.proposed_longitude_decimal, float(self.dmax_contour))
-        
-        # Geodaframe dos polígonos dos municípios
-        self.gdf_census_municipalities = gpd.read_file(self.path_census_sectors)
-
-        # O 'op='intersects'' garante que apenas as geometrias que se sobrepõem serão incluídas
-        self.intersected_municipalities = gpd.sjoin(self.gdf_census_municipalities, self.gdf_protected_contour, predicate='intersects')
-
-        # Pega os nomes dos estados únicos da coluna 'NM_UF' do geodataframe resultante
-        unique_states = self.intersected_municipalities['NM_UF'].unique()
-
-        # Trabalha com uma fatia menor do geodataframe
-        self.gdf_census_municipalities = self.gdf_census_municipalities[self.gdf_census_municipalities['NM_UF'].isin(unique_states)]
-
-        # DataFrame
-        self.df = pd.DataFrame(self.gdf_census_municipalities)
 
     
     def _get_municipality_code(self, mun_name: str, state_name: str, mun_type: str) -> str:
         """
-        Verifica um município no DataFrame e retorna seu código ('CD_MUN').
-        Levanta um MunicipalityNotFoundError se não for encontrado.
+        Verifica um município no índice de municípios (sem diferenciar acentos
+        e maiúsculas) e retorna seu código ('CD_MUN').
+        Levanta um ValueError, com sugestões de nomes, se não for encontrado.
         """
+        municipality_index = self.dataset.municipality_index()
 
-        # Filtra o DataFrame para encontrar o município
-        matched_municipality = self.df[
-            (self.df['NM_MUN'] == mun_name) & 
-            (self.df['NM_UF'] == state_name)
-        ]
+        code = municipality_index.lookup(state_name, mun_name)
+        if code is not None:
+            return code
 
-        if not matched_municipality.empty:
-            return matched_municipality['CD_MUN'].iloc[0]
-        else:
-            raise ValueError(
-                f"Município {mun_type} '{mun_name}' em '{state_name}' não foi encontrado. "
-                "Verifique a ortografia e se a UF está correta."
-            )
+        message = (
+            f"Município {mun_type} '{mun_name}' em '{state_name}' não foi encontrado. "
+            "Verifique a ortografia e se a UF está correta."
+        )
+        suggestions = municipality_index.suggestions(state_name, mun_name)
+        if suggestions:
+            message += " Você quis dizer: " + ", ".join(suggestions) + "?"
+        raise ValueError(message)
     
 
     def _municipality_state(self, number_municipality, state):
@@ -208,36 +212,34 @@ class CalculationService:
         return 'Referência não encontrada'
     
     def _class_group(self, classe):
-        grupos = {
-            'A': ['B1', 'B2', 'C'],
-            'B': ['A', 'A1', 'A2', 'A3', 'A4', 'B'],
-            'C': ['E1', 'E2', 'E3', 'E']
-        }
-        for grupo, classes in grupos.items():
-            if classe in classes:
-                return grupo
-        return 'classe inexistente'
+        return CLASS_GROUPS.get(classe, 'classe inexistente')
+
+    def _class_indices(self, current_class, proposed_class):
+        # Posições das classes nas matrizes de transição (None se inexistente)
+        return CLASS_INDEX.get(current_class), CLASS_INDEX.get(proposed_class)
+
+    def _missing_class(self, current, proposed):
+        return 'classe atual e proposta inexistente' if current is None and proposed is None else 'classe inexistente'
     
     def _check_class_change(self, current_class, proposed_class):
-        classes = ['C', 'B2', 'B1', 'A4', 'A3', 'A2', 'A1', 'E3', 'E2', 'E1']
-        if current_class in classes and proposed_class in classes:
-            if classes.index(current_class) == classes.index(proposed_class):
-                return "sem mudança de classe"
-            elif classes.index(current_class) < classes.index(proposed_class):
-                return "promoção de classe"
-            else:
-                return "redução de classe"
-        
-        if current_class not in classes and proposed_class not in classes:
-            return 'classe atual e proposta inexistente'
+        current, proposed = self._class_indices(current_class, proposed_class)
+        if current is None or proposed is None:
+            return self._missing_class(current, proposed)
+
+        if current == proposed:
+            return "sem mudança de classe"
+        elif current < proposed:
+            return "promoção de classe"
         else:
-            return 'classe inexistente'
+            return "redução de classe"
 
     def _time_to_target_class(self, current_class, proposed_class):
-        if self._check_class_change(current_class, proposed_class) != "promoção de classe":
+        current, proposed = self._class_indices(current_class, proposed_class)
+        if current is None or proposed is None:
             return "não se aplica"
 
-        return self.promotion_period.get(current_class, {}).get(proposed_class, "não se aplica")
+        tcp = int(TCP_MATRIX[current, proposed])
+        return "não se aplica" if tcp == NOT_APPLICABLE else tcp
     
     def check_change_type(self, current_class, proposed_class):
         if self._check_class_change(current_class, proposed_class) == "promoção de classe":
@@ -245,31 +247,27 @@ class CalculationService:
         return "não se aplica"
     
     def check_group_change(self, current_class, proposed_class):
-        classes = ['C', 'B2', 'B1', 'A4', 'A3', 'A2', 'A1', 'E3', 'E2', 'E1']
-        grupos = ['A', 'B', 'C']
-
-        if current_class in classes and proposed_class in classes:
-            current_group = self._class_group(current_class)
-            proposed_group = self._class_group(proposed_class)
-            if current_group == proposed_group:
-                return f"sem mudança de grupo - {current_group}"
-            elif grupos.index(current_group) < grupos.index(proposed_group):
-                return f"promoção de grupo - {current_group} para {proposed_group}"
-            else:
-                return f"redução de grupo - {current_group} para {proposed_group}"
-        return 'classe atual e proposta inexistente' if current_class not in classes and proposed_class not in classes else 'classe inexistente'
+        current, proposed = self._class_indices(current_class, proposed_class)
+        if current is None or proposed is None:
+            return self._missing_class(current, proposed)
+
+        current_group = self._class_group(current_class)
+        proposed_group = self._class_group(proposed_class)
+        change = GROUP_CHANGE_MATRIX[current, proposed]
+        if change == 0:
+            return f"sem mudança de grupo - {current_group}"
+        elif change > 0:
+            return f"promoção de grupo - {current_group} para {proposed_group}"
+        else:
+            return f"redução de grupo - {current_group} para {proposed_group}"
     
     def check_payment(self, current_class, proposed_class):
-        change = self.check_group_change(current_class, proposed_class)
-        if "redução de grupo" in change:
-            return "sem cobrança"
-        elif "promoção de grupo" in change:
-            return "com cobrança"
-        elif "sem mudança de grupo" in change:
-            return "sem cobrança" if self._time_to_target_class(current_class, proposed_class) in [0, "não se aplica"] else "com cobrança"
-        else:
+        current, proposed = self._class_indices(current_class, proposed_class)
+        if current is None or proposed is None:
             return "não se aplica"
 
+        return "com cobrança" if PAYMENT_MATRIX[current, proposed] else "sem cobrança"
+
     def dmax_cp(self, classe, canal=None):
         classe_lower = classe.lower()
         if classe_lower in self.dmax_values:
@@ -282,36 +280,21 @@ class CalculationService:
             return val
         return 7.5
     
-    def get_municipality_with_code(self, code):
+    def get_municipality_with_code(self, code) -> MunicipalityRecord:
         """
-        Retorna a população total de um município a partir de seu código.
+        Retorna o código, a sigla da UF, o nome e a população total de um
+        município a partir de seu código.
         """
-        # Filtra o GeoDataFrame para incluir apenas os setores censitários do município com o código fornecido.
-        municipality_sectors = self.gdf_census_municipalities[self.gdf_census_municipalities.CD_MUN == code]
-
-        # Soma a população de todos os setores do município.
-        total_municipality_population = municipality_sectors['v0001'].sum()
-
-        # Retorna o nome do município, a UF e a população total.
-        municipality_name = municipality_sectors['NM_MUN'].iloc[0]
-        uf_name = municipality_sectors['NM_UF'].iloc[0]
-
-        return f"{uf_name}/{municipality_name}/{int(total_municipality_population)}"
+        return self.municipality_table.records([code], self.state_abbreviations)[0]
 
 
     def create_circle_gdf(self, latitude, longitude, radius):
-        # Gera um GeoDataFrame de um círculo com centro em (latitude, longitude) e raio em metros.
+        # Gera um GeoDataFrame do contorno protegido (buffer em EPSG:5880) com centro em (latitude, longitude).
         # Latitude e longitude em graus, raio em km.
-
-        circle_center = shapely.geometry.Point(longitude, latitude)
-        gdf_circle_center = gpd.GeoDataFrame(geometry=[circle_center], crs='EPSG:4674')
-        circle_center_utm = gdf_circle_center.to_crs(epsg=5880)
-        circle_utm = circle_center_utm.buffer(radius * 1000)  # raio convertido para metros
-        circle = circle_utm.to_crs('EPSG:4674')
-
-        return gpd.GeoDataFrame(geometry=circle)
+        return gpd.GeoDataFrame(geometry=[protected_contour(latitude, longitude, radius)], crs=GEOGRAPHIC_CRS)
 
     # Cálculo de dados intermediários
+    @profiled()
     def data_process(self, current_class, proposed_class, current_latitude, current_longitude, proposed_sit_state, proposed_sit_city_code):
         self.current_group = self._class_group(current_class)
         self.proposed_group = self._class_group(proposed_class)
@@ -327,178 +310,168 @@ class CalculationService:
         )[1]
         self.change_type = self.check_change_type(current_class, proposed_class)
 
+    @profiled()
     def geo_process(self):
         # Geodataframe da estação na situação proposta
         station_coordinates = shapely.geometry.Point(self.proposed_longitude_decimal, self.proposed_latitude_decimal)
-        self.gdf_station = gpd.GeoDataFrame(geometry=[station_coordinates], crs='EPSG:4674')
-
-        self.teste = self.gdf_census_municipalities.dissolve(by='CD_MUN', aggfunc={'NM_MUN': 'first', 'NM_UF': 'first', 'v0001': 'sum'})
-        self.teste_mun = gpd.sjoin(self.teste, self.gdf_protected_contour, predicate='intersects')
-        
-        codigos_dos_municipios = self.teste_mun.index.unique()
-
-        self.setor_teste = self.gdf_census_municipalities[
-            self.gdf_census_municipalities['CD_MUN'].isin(codigos_dos_municipios)
-        ].copy()
-
-        filtro_urbano_setor_teste = (self.setor_teste['SITUACAO'] == 'Urbana') & (self.setor_teste['NM_NU'].isnull()) & (self.setor_teste['NM_MUN'] == self.setor_teste['NM_DIST'])
-        
-        self.setores_urbanos_teste = self.setor_teste[filtro_urbano_setor_teste].reset_index(drop=True)
-
-        # Municípios que fazem interseção com o contorno protegido da classe do canal
-        self.gdf_municipalities = gpd.sjoin(self.gdf_census_municipalities, self.gdf_protected_contour, predicate='intersects')
-        self.gdf_municipalities = self.gdf_municipalities.drop('index_right', axis=1)
-        self.gdf_municipalities = self.gdf_municipalities.reset_index(drop=True)
-
-        # União das geometrias dos municípios para criar uma máscara
-        gdf_united_municipalities = self.gdf_municipalities.copy()
-        gdf_united_municipalities['Unir'] = 1
-        gdf_united_municipalities = gdf_united_municipalities.dissolve(by='Unir')
-
-        # Setores censitários dos municípios que fazem interseção com o contorno protegido
-        gdf_census_sectors = gpd.read_file(self.path_census_sectors, mask=gdf_united_municipalities)
-
-        # Setores censitários urbanos
-        # Corrigir o contorno urbano pois nem todo o contorno esta sedo pintado de vermelho
-        urban_census_sectors_filter = (gdf_census_sectors.SITUACAO == 'Urbana') & (gdf_census_sectors.NM_NU.isnull()) & (gdf_census_sectors.NM_MUN == gdf_census_sectors.NM_DIST)
-        self.gdf_urban_census_sectors = gdf_census_sectors[urban_census_sectors_filter].reset_index(drop=True)
-
-        # Geodataframe da interseção entre os setores censitários urbanos e o contorno protegido
-        self.gdf_urban_sectors_cp_intersection = self.gdf_urban_census_sectors[self.gdf_urban_census_sectors.intersects(self.gdf_protected_contour.geometry[0])]
-        self.gdf_urban_sectors_cp_intersection = self.gdf_urban_sectors_cp_intersection.reset_index(drop=True)
+        self.gdf_station = gpd.GeoDataFrame(geometry=[station_coordinates], crs=GEOGRAPHIC_CRS)
+
+        # Resultado já calculado para a mesma estação, raio e versão dos dados
+        cache = self.dataset.coverage_cache
+        coverage = None
+        if cache is not None:
+            key = cache.key(self.proposed_latitude_decimal, self.proposed_longitude_decimal, self.dmax_contour)
+            with stage('cache de cobertura'):
+                coverage = cache.get(key)
+
+        if coverage is not None:
+            self._apply_coverage(coverage)
+        else:
+            self._compute_coverage()
+            if cache is not None:
+                cache.put(key, self._coverage_result())
 
-        # Geodataframe dos municípios cujas áreas urbanas são intersectadas pelo contorno protegido
-        self.covered_municipalities_codes = list(self.gdf_urban_sectors_cp_intersection.CD_MUN.unique())
         #    O self.teste está indexado por 'CD_MUN' (do dissolve), por isso usamos .index.isin()
         self.gdf_municipalities_with_urban_area_reached = self.teste[self.teste.index.isin(self.covered_municipalities_codes)]
         self.gdf_municipalities_with_urban_area_reached = self.gdf_municipalities_with_urban_area_reached.reset_index()
         self.gdf_municipalities_with_urban_area_reached['MUNICIPIO-UF'] = np.vectorize(self._municipality_state)(
             self.gdf_municipalities_with_urban_area_reached['NM_MUN'], self.gdf_municipalities_with_urban_area_reached['NM_UF'])
-        
-        covered_municipalities = []
-        for code in self.covered_municipalities_codes:
-            covered_municipalities.append(self.get_municipality_with_code(code))
-    
-    def creat_map(self):
-        fig, ax = plt.subplots(1,1,figsize=(12,10))
-
-        self.teste_mun.plot(ax=ax, color='None', edgecolor='black', linewidth=2)
-
-        self.setores_urbanos_teste.plot(ax=ax, color='None', edgecolor='orange', linewidth=0.5)
-        
-        # Municípios com áreas urbanas atingidas pelo contorno protegido
-        self.gdf_municipalities_with_urban_area_reached.plot(ax=ax, column='MUNICIPIO-UF', categorical=True, edgecolor='black', cmap='turbo', linewidth=0.1, alpha = 0.7, legend=False)
-
-        # Áreas urbanas atingidas pelo contorno protegido
-        self.gdf_urban_sectors_cp_intersection.plot(ax=ax, color='None', edgecolor='red', linewidth=0.5)
 
-        # Estação na situação proposta
-        self.gdf_station.plot(ax=ax, color='yellow', edgecolor='black', linewidth=1.5)
-       
-        # Circunferência do contorno protegido teórico
-        self.gdf_protected_contour.plot(ax = ax, color='none', edgecolor='red', linewidth=1.5, linestyle='dashed')
+    def _compute_coverage(self):
+        # UFs atingidas pelo contorno protegido
+        self.states = self.dataset.states_for_contour(self.gdf_protected_contour)
 
-        plt.title('Municípios com áreas urbanas atingidas pelo contorno protegido da classe proposta', fontsize=13, y=1.01)
+        # Municípios das UFs atingidas (camada pré-calculada ou agrupamento dos setores)
+        self.teste = self.dataset.municipalities_for_states(self.states)
+        with stage('sjoin municipios'):
+            self.teste_mun = gpd.sjoin(self.teste, self.gdf_protected_contour, predicate='intersects')
         
-        temp_dir = tempfile.gettempdir()
+        codigos_dos_municipios = self.teste_mun.index.unique()
 
-        imagem_name = self.process_number.replace('/', '-').replace('.', '_')
-        mapa_filename = f'img_{imagem_name}.png'
-        caminho_salvar_mapa_temp = os.path.join(temp_dir, mapa_filename)
+        if self.coverage_engine is not None:
+            with stage('consulta de cobertura'):
+                # Municípios com sede urbana atingida pelo contorno protegido (consulta no STRtree)
+                self.covered_municipalities_codes = self.coverage_engine.covered_codes(
+                    self.gdf_protected_contour.geometry.iloc[0])
 
-        plt.savefig(caminho_salvar_mapa_temp)
-        plt.close(fig)
+                self.setores_urbanos_teste = self.coverage_engine.urban_seats(codigos_dos_municipios).reset_index()
+                self.gdf_urban_sectors_cp_intersection = self.coverage_engine.urban_seats(self.covered_municipalities_codes).reset_index()
+        else:
+            # Sedes urbanas (uma geometria preparada por município) dos municípios atingidos
+            # (setores compartilhados com o dataset, não devem ser alterados)
+            gdf_census_sectors = self.dataset.sectors_for_states(self.states)
+            with stage('consulta de cobertura'):
+                self.setores_urbanos_teste = self.dataset.urban_seats(
+                    gdf_census_sectors, list(codigos_dos_municipios)).reset_index()
+
+                # Sedes urbanas atingidas pelo contorno protegido
+                self.gdf_urban_sectors_cp_intersection = self.setores_urbanos_teste[self.setores_urbanos_teste.intersects(self.gdf_protected_contour.geometry[0])]
+            self.gdf_urban_sectors_cp_intersection = self.gdf_urban_sectors_cp_intersection.reset_index(drop=True)
+
+            # Geodataframe dos municípios cujas áreas urbanas são intersectadas pelo contorno protegido
+            self.covered_municipalities_codes = list(self.gdf_urban_sectors_cp_intersection.CD_MUN.unique())
+
+    def _coverage_result(self) -> CoverageResult:
+        # Resultado do geoprocessamento guardado no cache de cobertura
+        return CoverageResult(
+            states=tuple(self.states),
+            touched_codes=tuple(int(code) for code in self.teste_mun.index.unique()),
+            covered_codes=tuple(int(code) for code in self.covered_municipalities_codes),
+            population=sum(self.municipality_table.population(code) for code in self.covered_municipalities_codes),
+            seat_codes=self.setores_urbanos_teste['CD_MUN'].to_numpy(dtype=np.int32),
+            seat_geometries=self.setores_urbanos_teste.geometry.to_numpy()
+        )
 
-        return caminho_salvar_mapa_temp
+    def _apply_coverage(self, coverage: CoverageResult):
+        # Refaz as tabelas do geoprocessamento a partir do cache, sem consultas espaciais
+        self.states = list(coverage.states)
+        self.teste = self.dataset.municipalities_for_states(self.states)
+        self.teste_mun = self.teste[self.teste.index.isin(coverage.touched_codes)]
+
+        self.setores_urbanos_teste = gpd.GeoDataFrame(
+            {'CD_MUN': coverage.seat_codes}, geometry=coverage.seat_geometries, crs=GEOGRAPHIC_CRS)
+        self.gdf_urban_sectors_cp_intersection = self.setores_urbanos_teste[
+            self.setores_urbanos_teste['CD_MUN'].isin(coverage.covered_codes)].reset_index(drop=True)
+        self.covered_municipalities_codes = list(coverage.covered_codes)
+    
+    def _map_tolerance(self, width_px: float) -> float | None:
+        """
+        Nível de simplificação das geometrias do mapa, escolhido pela extensão
+        desenhada (municípios atingidos e contorno de raio 'dmax').
+        """
+        contour_bounds = extent_for_radius(
+            self.proposed_latitude_decimal, self.proposed_longitude_decimal, float(self.dmax_contour))
+        if self.teste_mun.empty:
+            return choose_tolerance(contour_bounds, width_px)
+
+        minx, miny, maxx, maxy = self.teste_mun.total_bounds
+        bounds = (min(minx, contour_bounds[0]), min(miny, contour_bounds[1]),
+                  max(maxx, contour_bounds[2]), max(maxy, contour_bounds[3]))
+        return choose_tolerance(bounds, width_px)
+
+    @profiled()
+    def creat_map(self) -> bytes:
+        """Mapa de cobertura em PNG, gerado em memória."""
+        # Geometrias simplificadas para o mapa (o cálculo usa as originais)
+        tolerance = self._map_tolerance(axes_width_px())
+        municipalities = self.dataset.map_geometries('municipios', tolerance)
+        urban_seats = self.dataset.map_geometries('sedes', tolerance)
+
+        gdf_covered_municipalities = replace_geometries(self.gdf_municipalities_with_urban_area_reached, municipalities)
+
+        layers = MapLayers(
+            municipalities=replace_geometries(self.teste_mun, municipalities).geometry.to_numpy(),
+            urban_seats=replace_geometries(self.setores_urbanos_teste, urban_seats).geometry.to_numpy(),
+            covered_municipalities=gdf_covered_municipalities.geometry.to_numpy(),
+            covered_labels=gdf_covered_municipalities['MUNICIPIO-UF'].to_numpy(),
+            covered_urban_seats=replace_geometries(self.gdf_urban_sectors_cp_intersection, urban_seats).geometry.to_numpy(),
+            contour=self.gdf_protected_contour.geometry.iloc[0],
+            station=(self.proposed_longitude_decimal, self.proposed_latitude_decimal)
+        )
 
-    def calculo_promocao_classe(self, population):
-        # Carregamento dos dados populacionais
-        df_populacao = self.gdf_census_municipalities
-        df_populacao['CD_MUN'] = df_populacao['CD_MUN'].astype(str)
+        buffer = io.BytesIO()
+        with stage('desenho do mapa'):
+            render_map(layers, buffer)
 
-        # População dos municípios cobertos
-        df_populacao_municipios_cobertos = df_populacao[df_populacao.CD_MUN.isin(self.covered_municipalities_codes)]
-        df_populacao_municipios_cobertos = df_populacao_municipios_cobertos.reset_index(drop=True)
-        filtro_mun_ref = df_populacao["CD_MUN"] == self.reference_city_code
+        return buffer.getvalue()
 
-        num_population = []
-        for item in population:
-            match = re.search(r'\d+$', item)
-            if match:
-                num_population.append(int(match.group()))
+    @profiled()
+    def calculo_promocao_classe(self, covered_municipalities: list[MunicipalityRecord]):
+        # População dos municípios cobertos e do município de referência (tabela por 'CD_MUN')
+        self.Ptot = sum(municipality.population for municipality in covered_municipalities)
+        self.Pref = self.municipality_table.population(self.reference_city_code)
 
-        # # População dos municípios cobertos
-        self.Ptot = sum(num_population)
-        
-        self.Pref = int(df_populacao[filtro_mun_ref]['v0001'].sum())
-
-        if self.current_group == 'A':
-            if self.proposed_group == 'A':
-                self.Vab, self.Vbc = 0, 0
-            elif self.proposed_group == 'B':
-                self.Vab = self._get_reference_value(self.proposed_state, self.proposed_group, self.reference_city_code)[2]
-                self.Vbc = 0
-            elif self.proposed_group == 'C':
+        # Parcelas cobradas conforme a mudança de grupo e o Tcp (tabelas em tariff.py)
+        self.Vab, self.Vbc = 0, 0
+        if self.current_group in GROUP_INDEX and self.proposed_group in GROUP_INDEX:
+            charged = (GROUP_INDEX[self.current_group], GROUP_INDEX[self.proposed_group], int(self.tcp_value == 0))
+            if VAB_BY_GROUP[charged]:
                 self.Vab = self._get_reference_value(self.proposed_state, 'B', self.reference_city_code)[2]
-                self.Vbc = self._get_reference_value(self.proposed_state, self.proposed_group, self.reference_city_code)[2]
-        elif self.current_group == 'B':
-            if self.proposed_group == 'A':
-                self.Vab, self.Vbc = 0, 0
-            elif self.proposed_group == 'B':
-                if self.tcp_value == 0:
-                    self.Vab, self.Vbc = 0, 0
-                else:
-                    self.Vab = self._get_reference_value(self.proposed_state, 'B', self.reference_city_code)[2]
-                    self.Vbc = 0
-            elif self.proposed_group == 'C':
-                self.Vab = 0
-                self.Vbc = self._get_reference_value(self.proposed_state, self.proposed_group, self.reference_city_code)[2]
-        elif self.current_group == 'C':
-            if self.proposed_group == 'A':
-                self.Vab, self.Vbc = 0, 0
-            elif self.proposed_group == 'B':
-                self.Vab, self.Vbc = 0, 0
-            elif self.proposed_group == 'C':
-                if self.tcp_value == 0:
-                    self.Vab, self.Vbc = 0, 0
-                else:
-                    self.Vab = 0
-                    self.Vbc = self._get_reference_value(self.proposed_state, 'C', self.reference_city_code)[2] 
-                    
+            if VBC_BY_GROUP[charged]:
+                self.Vbc = self._get_reference_value(self.proposed_state, 'C', self.reference_city_code)[2]
+
         if self.tcp_value != 'não se aplica':
-            self.Vpc = (self.Ptot/self.Pref) * (self.Vab + self.Vbc) * (1+int(self.tcp_value)/10)
+            # Sem parcelas cobradas (promoção dentro do grupo A) não há município de referência nem valor
+            charged = self.Vab + self.Vbc
+            self.Vpc = (self.Ptot/self.Pref) * charged * (1+int(self.tcp_value)/10) if charged else 0.0
             self.Vpc = round(self.Vpc,2)
             self.tcp_value = str(self.tcp_value)
         else:
             self.Vpc = 'não se aplica'
     
-    def get_results(self):
-        # Valida e obtém o código do município ATUAL
-        current_municipality_code = self._get_municipality_code(
-            self.current_municipality,
-            self.current_name_state,
-            "Atual"
-        )
-        
-        # Valida e obtém o código do município PROPOSTO
-        proposed_municipality_code = self._get_municipality_code(
-            self.proposed_municipality, 
-            self.proposed_name_state, 
-            "Proposto"
-        )
-
+    def get_results(self, include_map: bool = True):
         # Chame os métodos de processamento de dados e geoprocessamento
-        self.data_process(self.current_class, self.proposed_class, self.current_latitude, self.current_longitude, self.proposed_state, proposed_municipality_code)
+        self.data_process(self.current_class, self.proposed_class, self.current_latitude, self.current_longitude, self.proposed_state, self.proposed_municipality_code)
         
         self.geo_process()
         
-        covered_municipalities = []
-        for code in self.covered_municipalities_codes:
-            covered_municipalities.append(self.get_municipality_with_code(code))
+        # Municípios cobertos (código, sigla da UF, nome e população)
+        covered_municipalities = self.municipality_table.records(self.covered_municipalities_codes, self.state_abbreviations)
         
         self.calculo_promocao_classe(covered_municipalities)
         
-        caminho_mapa_temporario = self.creat_map()
+        # O mapa só é desenhado quando o relatório vai ser gerado
+        mapa = self.creat_map() if include_map else None
 
         result_list = {
             'numero_processo': self.process_number,
@@ -529,7 +502,7 @@ class CalculationService:
             'valor_bc': self.Vbc,
             'ptot': self.Ptot,
             'vpc': self.Vpc,
-            'caminho_mapa_temp': caminho_mapa_temporario
+            'mapa': mapa
         }
 
         return result_list
\ No newline at end of file
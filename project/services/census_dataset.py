@@ -0,0 +1,297 @@
+import geopandas as gpd
+import json
+import pandas as pd
+from pathlib import Path
+import threading
+
+from .census_store import (
+    CENSUS_COLUMNS,
+    compact_census_frame,
+    dissolve_municipalities,
+    frame_memory,
+    intersected_states,
+    read_municipality_layer,
+    read_state_sectors,
+    read_states_in_contour,
+    read_urban_seats
+)
+from .coverage import load_coverage_engine
+from .coverage_cache import MEMORY_ENTRIES, CoverageCache, data_manifest_path, dataset_version
+from .map_geometries import read_simplified_layers
+from .municipality_index import MunicipalityIndex, read_municipality_attributes
+from .municipality_table import MunicipalityTable
+from .profiling import stage
+
+
+class CensusDataset:
+    """
+    Dados censitários carregados uma única vez e compartilhados por vários
+    cálculos (sessão da interface, processamento em lote ou serviço).
+
+    Mantém em memória os setores já lidos (por UF), a camada de municípios,
+    o índice de nomes de municípios, a tabela de população por município,
+    o índice das sedes urbanas e a tabela de UFs. Pode ser usado por várias
+    threads ao mesmo tempo.
+
+    Os resultados do geoprocessamento ficam no cache de cobertura (em
+    memória e, com 'path_coverage_cache', em disco), associado à versão
+    dos arquivos de dados. 'coverage_cache_entries' = 0 desativa o cache.
+    """
+
+    def __init__(self, path_census_sectors: Path, path_uf: Path, path_census_store: Path | None = None,
+                 path_municipalities: Path | None = None, path_urban_seats: Path | None = None,
+                 path_municipality_index: Path | None = None, path_map_geometries: Path | None = None,
+                 path_coverage_cache: Path | None = None, coverage_cache_entries: int = MEMORY_ENTRIES):
+        self.path_census_sectors = path_census_sectors
+        self.path_census_store = path_census_store
+        self.path_municipalities = path_municipalities
+        self.path_urban_seats = path_urban_seats
+        self.path_municipality_index = path_municipality_index
+        self.path_map_geometries = path_map_geometries
+
+        with open(path_uf, 'r', encoding='utf-8') as file:
+            self.uf_names = json.load(file)
+
+        # Índice persistente das sedes urbanas (None se a camada não foi gerada)
+        self.coverage_engine = load_coverage_engine(path_urban_seats) if path_urban_seats is not None else None
+
+        # Versão dos dados e cache de cobertura: criados no primeiro cálculo (ver 'coverage_cache')
+        self.path_coverage_cache = path_coverage_cache
+        self.coverage_cache_entries = coverage_cache_entries
+        self._version = None
+        self._coverage_cache = None
+        self._coverage_cache_ready = False
+
+        self._lock = threading.RLock()
+        self._all_sectors = None
+        self._sectors_by_state = {}
+        self._municipality_layer = None
+        self._municipalities_by_state = {}
+        self._municipality_index = None
+        self._municipality_table = None
+        self._map_geometries = None
+
+
+    @staticmethod
+    def _exists(path: Path | None) -> bool:
+        return path is not None and Path(path).exists()
+
+
+    @property
+    def version(self) -> str:
+        """
+        Versão do conteúdo dos arquivos lidos (o Shapefile só sem a base de
+        setores), calculada uma única vez: pelo manifesto do build_data.py
+        ou, sem ele, pela impressão digital de cada arquivo.
+        """
+        with self._lock:
+            if self._version is None:
+                source = self.path_census_store if self._exists(self.path_census_store) else self.path_census_sectors
+                self._version = dataset_version(
+                    [source, self.path_municipalities, self.path_urban_seats],
+                    data_manifest_path(self.path_census_store) if self.path_census_store is not None else None
+                )
+            return self._version
+
+
+    @property
+    def coverage_cache(self) -> CoverageCache | None:
+        """Cache de cobertura da versão dos dados, criado na primeira consulta (None se desativado)."""
+        with self._lock:
+            if not self._coverage_cache_ready:
+                if self.coverage_cache_entries > 0:
+                    self._coverage_cache = CoverageCache(self.version, self.path_coverage_cache, self.coverage_cache_entries)
+                self._coverage_cache_ready = True
+            return self._coverage_cache
+
+
+    @coverage_cache.setter
+    def coverage_cache(self, cache: CoverageCache | None):
+        with self._lock:
+            self._coverage_cache = cache
+            self._coverage_cache_ready = True
+
+
+    def _read_all_sectors(self) -> gpd.GeoDataFrame:
+        """
+        Lê (uma única vez) o Shapefile completo, usado quando não há
+        GeoParquet: apenas as colunas do cálculo, com tipos compactos.
+        """
+        with self._lock:
+            if self._all_sectors is None:
+                with stage('read_file setores'):
+                    self._all_sectors = compact_census_frame(gpd.read_file(self.path_census_sectors, columns=CENSUS_COLUMNS))
+            return self._all_sectors
+
+
+    def _read_municipality_layer(self) -> gpd.GeoDataFrame:
+        """Lê (uma única vez) a camada de municípios pré-calculada."""
+        with self._lock:
+            if self._municipality_layer is None:
+                with stage('leitura municipios'):
+                    self._municipality_layer = read_municipality_layer(self.path_municipalities)
+            return self._municipality_layer
+
+
+    def municipality_index(self) -> MunicipalityIndex:
+        """
+        Índice de nomes de municípios (criado uma única vez). Usa o índice
+        pré-gerado quando existe; caso contrário, lê apenas os atributos da
+        camada de municípios, do GeoParquet ou do Shapefile.
+        """
+        with self._lock:
+            if self._municipality_index is None:
+                if self._exists(self.path_municipality_index):
+                    self._municipality_index = MunicipalityIndex.from_file(self.path_municipality_index)
+                elif self._municipality_layer is not None:
+                    self._municipality_index = MunicipalityIndex.from_frame(self._municipality_layer)
+                elif self._all_sectors is not None:
+                    self._municipality_index = MunicipalityIndex.from_frame(self._all_sectors)
+                else:
+                    source = next(
+                        (path for path in (self.path_municipalities, self.path_census_store) if self._exists(path)),
+                        self.path_census_sectors
+                    )
+                    self._municipality_index = MunicipalityIndex.from_frame(read_municipality_attributes(source))
+            return self._municipality_index
+
+
+    def municipality_table(self) -> MunicipalityTable:
+        """
+        Tabela 'CD_MUN' -> (NM_MUN, NM_UF, população), criada uma única vez a
+        partir da camada de municípios, dos atributos do GeoParquet ou do
+        Shapefile.
+        """
+        with self._lock:
+            if self._municipality_table is None:
+                if self._exists(self.path_municipalities):
+                    df_source = self._read_municipality_layer()
+                elif self._exists(self.path_census_store):
+                    df_source = pd.read_parquet(self.path_census_store, columns=['CD_MUN', 'NM_MUN', 'NM_UF', 'v0001'])
+                else:
+                    df_source = self._read_all_sectors()
+                self._municipality_table = MunicipalityTable.from_frame(df_source)
+            return self._municipality_table
+
+
+    def map_geometries(self, layer: str, tolerance: float | None):
+        """
+        Geometrias simplificadas da camada 'layer' ('municipios' ou 'sedes')
+        no nível 'tolerance', indexadas por 'CD_MUN', usadas apenas no mapa.
+        Retorna None se o nível não existir ou a base não tiver sido gerada.
+        """
+        if tolerance is None or not self._exists(self.path_map_geometries):
+            return None
+
+        with self._lock:
+            if self._map_geometries is None:
+                self._map_geometries = read_simplified_layers(self.path_map_geometries)
+            return self._map_geometries.get((layer, tolerance))
+
+
+    def memory_report(self) -> dict:
+        """
+        Memória aproximada (bytes) de cada tabela mantida pelo dataset, com
+        o total em 'total'. Tabelas ainda não carregadas não aparecem.
+        """
+        with self._lock:
+            frames = {
+                'setores': self._all_sectors,
+                'setores_por_uf': list(self._sectors_by_state.values()),
+                'municipios': self._municipality_layer,
+                'municipios_por_uf': list(self._municipalities_by_state.values()),
+                'sedes_urbanas': self.coverage_engine.gdf_urban_seats if self.coverage_engine is not None else None,
+                'geometrias_mapa': list(self._map_geometries.values()) if self._map_geometries is not None else None
+            }
+
+        report = {}
+        for name, frame in frames.items():
+            if isinstance(frame, list):
+                if frame:
+                    report[name] = sum(frame_memory(part.to_frame() if isinstance(part, gpd.GeoSeries) else part) for part in frame)
+            elif frame is not None:
+                report[name] = frame_memory(frame)
+
+        report['total'] = sum(report.values())
+        return report
+
+
+    def warm_up(self):
+        """
+        Carrega antecipadamente tudo o que não depende do pedido: a camada de
+        municípios ou, sem o GeoParquet, o Shapefile completo, o índice de
+        nomes e a tabela de população dos municípios.
+        """
+        if self._exists(self.path_municipalities):
+            self._read_municipality_layer()
+        if not self._exists(self.path_census_store):
+            self._read_all_sectors()
+        self.municipality_index()
+        self.municipality_table()
+
+
+    def states_for_contour(self, gdf_contour: gpd.GeoDataFrame) -> list:
+        """Nomes das UFs cujos setores fazem interseção com o contorno protegido."""
+        if self._exists(self.path_census_store):
+            with stage('leitura ufs no contorno'):
+                return read_states_in_contour(self.path_census_store, gdf_contour)
+
+        return intersected_states(self._read_all_sectors(), gdf_contour)
+
+
+    def sectors_for_states(self, states: list) -> gpd.GeoDataFrame:
+        """Setores censitários das UFs informadas (lidos uma única vez por UF)."""
+        if not self._exists(self.path_census_store):
+            gdf_all = self._read_all_sectors()
+            return gdf_all[gdf_all['NM_UF'].isin(states)]
+
+        with self._lock:
+            missing = [state for state in states if state not in self._sectors_by_state]
+            if missing:
+                with stage('leitura setores das ufs'):
+                    gdf_missing = read_state_sectors(self.path_census_store, missing)
+                for state in missing:
+                    self._sectors_by_state[state] = gdf_missing[gdf_missing['NM_UF'] == state]
+
+            frames = [self._sectors_by_state[state] for state in states]
+
+        if not frames:
+            return gpd.GeoDataFrame(columns=CENSUS_COLUMNS + ['geometry'], geometry='geometry', crs='EPSG:4674')
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames)
+
+
+    def sectors_for_contour(self, gdf_contour: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Setores censitários de todas as UFs atingidas pelo contorno protegido."""
+        return self.sectors_for_states(self.states_for_contour(gdf_contour))
+
+
+    def municipalities_for_states(self, states: list) -> gpd.GeoDataFrame:
+        """
+        Municípios das UFs informadas, indexados por 'CD_MUN'. Usa a camada
+        pré-calculada quando disponível e, se não existir, agrupa os setores
+        de cada UF (uma única vez).
+        """
+        if self._exists(self.path_municipalities):
+            gdf_layer = self._read_municipality_layer()
+            return gdf_layer[gdf_layer['NM_UF'].isin(states)]
+
+        with self._lock:
+            for state in states:
+                if state not in self._municipalities_by_state:
+                    gdf_state = self.sectors_for_states([state])
+                    with stage('dissolve municipios'):
+                        self._municipalities_by_state[state] = dissolve_municipalities(gdf_state)
+            frames = [self._municipalities_by_state[state] for state in states]
+
+        if not frames:
+            return dissolve_municipalities(self.sectors_for_states([]))
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames)
+
+
+    def urban_seats(self, gdf_sectors: gpd.GeoDataFrame, codes: list) -> gpd.GeoDataFrame:
+        """Sedes urbanas (geometrias preparadas) dos municípios 'codes'."""
+        return read_urban_seats(gdf_sectors, codes, self.path_urban_seats)
@@ -0,0 +1,173 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import shapely
+
+# Colunas do Shapefile do IBGE efetivamente usadas pelo cálculo
+CENSUS_COLUMNS = ['CD_MUN', 'NM_MUN', 'NM_UF', 'NM_DIST', 'NM_NU', 'SITUACAO', 'v0001']
+
+# Quantidade de setores por grupo de linhas do GeoParquet
+ROW_GROUP_SIZE = 20_000
+
+# Grade (graus, ~1 cm) em que as coordenadas dos setores são gravadas
+COORDINATE_PRECISION = 1e-7
+
+# Colunas de texto guardadas em memória como categorias
+CATEGORY_COLUMNS = ['NM_UF', 'NM_NU', 'SITUACAO']
+
+
+def compact_census_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte, no próprio 'df', as colunas para tipos compactos: 'CD_MUN'
+    (coluna ou índice) em int32, nomes em categorias e 'v0001' no menor
+    inteiro que comporta os valores. 'NM_MUN' e 'NM_DIST' compartilham as
+    categorias, para que continuem comparáveis entre si.
+    """
+    if 'CD_MUN' in df.columns:
+        df['CD_MUN'] = df['CD_MUN'].astype(np.int32)
+    elif df.index.name == 'CD_MUN':
+        df.index = df.index.astype(np.int32)
+
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    names = [column for column in ('NM_MUN', 'NM_DIST') if column in df.columns]
+    if names:
+        categories = pd.unique(np.concatenate([df[column].dropna().to_numpy(dtype=object) for column in names]))
+        dtype = pd.CategoricalDtype(categories)
+        for column in names:
+            df[column] = df[column].astype(dtype)
+
+    if 'v0001' in df.columns:
+        df['v0001'] = pd.to_numeric(df['v0001'].fillna(0), downcast='unsigned')
+
+    return df
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """
+    Memória aproximada (bytes) da tabela: colunas e índice (incluindo os
+    textos) e, nas GeoDataFrames, as coordenadas (dois doubles por vértice).
+    """
+    total = int(df.memory_usage(index=True, deep=True).sum())
+    if isinstance(df, gpd.GeoDataFrame):
+        total += int(shapely.get_num_coordinates(df.geometry.values).sum()) * 16
+    return total
+
+
+def build_census_store(path_census_sectors: Path, path_census_store: Path, row_group_size: int = ROW_GROUP_SIZE):
+    """
+    Converte o Shapefile dos setores censitários em um GeoParquet compactado.
+
+    Mantém apenas as colunas usadas pelo serviço e ordena as linhas por UF e,
+    dentro de cada UF, pela curva de Hilbert. Assim cada grupo de linhas cobre
+    uma região compacta e a coluna 'bbox' permite ler apenas os grupos que
+    tocam o contorno protegido. As coordenadas são arredondadas para a grade
+    de 'COORDINATE_PRECISION' graus (vértices repetidos são eliminados).
+    """
+    gdf = gpd.read_file(path_census_sectors, columns=CENSUS_COLUMNS)
+    gdf['geometry'] = shapely.set_precision(gdf.geometry.values, COORDINATE_PRECISION)
+
+    gdf['_hilbert'] = gdf.geometry.hilbert_distance()
+    gdf = gdf.sort_values(['NM_UF', '_hilbert']).drop(columns='_hilbert').reset_index(drop=True)
+
+    Path(path_census_store).parent.mkdir(parents=True, exist_ok=True)
+    gdf.to_parquet(
+        path_census_store,
+        index=False,
+        compression='zstd',
+        write_covering_bbox=True,
+        row_group_size=row_group_size
+    )
+
+    return len(gdf)
+
+
+def dissolve_municipalities(gdf_sectors: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Agrupa os setores por 'CD_MUN', somando a população ('v0001')."""
+    return gdf_sectors.dissolve(by='CD_MUN', aggfunc={'NM_MUN': 'first', 'NM_UF': 'first', 'v0001': 'sum'})
+
+
+def build_municipality_layer(path_census_store: Path, path_municipalities: Path):
+    """
+    Gera a camada de municípios (uma geometria por 'CD_MUN', com 'NM_MUN',
+    'NM_UF' e a população somada) a partir do GeoParquet de setores.
+    """
+    gdf_sectors = gpd.read_parquet(path_census_store, columns=['CD_MUN', 'NM_MUN', 'NM_UF', 'v0001', 'geometry'])
+    gdf_municipalities = dissolve_municipalities(gdf_sectors)
+
+    Path(path_municipalities).parent.mkdir(parents=True, exist_ok=True)
+    gdf_municipalities.to_parquet(path_municipalities, compression='zstd', write_covering_bbox=True)
+
+    return len(gdf_municipalities)
+
+
+def read_municipality_layer(path_municipalities: Path) -> gpd.GeoDataFrame:
+    """Lê a camada de municípios pré-calculada, indexada por 'CD_MUN' (tipos compactos)."""
+    return compact_census_frame(gpd.read_parquet(path_municipalities, columns=['CD_MUN', 'NM_MUN', 'NM_UF', 'v0001', 'geometry']))
+
+
+def urban_seat_filter(gdf_sectors: gpd.GeoDataFrame):
+    """Máscara dos setores urbanos da sede municipal (distrito-sede, fora de núcleos)."""
+    return (gdf_sectors['SITUACAO'] == 'Urbana') & (gdf_sectors['NM_NU'].isnull()) & (gdf_sectors['NM_MUN'] == gdf_sectors['NM_DIST'])
+
+
+def dissolve_urban_seats(gdf_sectors: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Une os setores urbanos da sede de cada município em um único polígono válido."""
+    gdf_urban = gdf_sectors[urban_seat_filter(gdf_sectors)]
+    gdf_seats = gdf_urban[['CD_MUN', 'NM_MUN', 'NM_UF', 'geometry']].dissolve(by='CD_MUN', aggfunc={'NM_MUN': 'first', 'NM_UF': 'first'})
+    gdf_seats['geometry'] = gdf_seats.geometry.make_valid()
+
+    return gdf_seats
+
+
+def build_urban_seat_layer(path_census_store: Path, path_urban_seats: Path):
+    """Gera a camada de sedes urbanas (um polígono por 'CD_MUN') a partir do GeoParquet de setores."""
+    gdf_sectors = gpd.read_parquet(path_census_store, columns=CENSUS_COLUMNS + ['geometry'])
+    gdf_seats = dissolve_urban_seats(gdf_sectors)
+
+    Path(path_urban_seats).parent.mkdir(parents=True, exist_ok=True)
+    gdf_seats.to_parquet(path_urban_seats, compression='zstd', write_covering_bbox=True)
+
+    return len(gdf_seats)
+
+
+def read_urban_seats(gdf_sectors: gpd.GeoDataFrame, codes: list, path_urban_seats: Path | None = None) -> gpd.GeoDataFrame:
+    """
+    Retorna as sedes urbanas dos municípios 'codes', indexadas por 'CD_MUN' e
+    com as geometrias já preparadas para testes de interseção repetidos.
+    Sem a camada pré-calculada, une os setores urbanos desses municípios.
+    """
+    if path_urban_seats is not None and Path(path_urban_seats).exists() and codes:
+        # No arquivo 'CD_MUN' é texto
+        gdf_seats = compact_census_frame(gpd.read_parquet(
+            path_urban_seats, columns=['CD_MUN', 'NM_MUN', 'NM_UF', 'geometry'],
+            filters=[('CD_MUN', 'in', [str(code) for code in codes])]))
+    else:
+        gdf_seats = dissolve_urban_seats(gdf_sectors[gdf_sectors['CD_MUN'].isin(codes)])
+
+    shapely.prepare(np.asarray(gdf_seats.geometry.values))
+
+    return gdf_seats
+
+
+def intersected_states(gdf_sectors: gpd.GeoDataFrame, gdf_contour: gpd.GeoDataFrame) -> list:
+    """Retorna os nomes das UFs cujos setores fazem interseção com o contorno."""
+    intersected = gpd.sjoin(gdf_sectors, gdf_contour, predicate='intersects')
+    return list(intersected['NM_UF'].unique())
+
+
+def read_states_in_contour(path_census_store: Path, gdf_contour: gpd.GeoDataFrame) -> list:
+    """
+    Descobre as UFs atingidas pelo contorno lendo do GeoParquet apenas os
+    grupos de linhas que intersectam o retângulo envolvente do contorno.
+    """
+    gdf_bbox = gpd.read_parquet(path_census_store, columns=['NM_UF', 'geometry'], bbox=tuple(gdf_contour.total_bounds))
+    return intersected_states(gdf_bbox, gdf_contour)
+
+
+def read_state_sectors(path_census_store: Path, states: list) -> gpd.GeoDataFrame:
+    """Lê do GeoParquet somente os setores das UFs informadas (tipos compactos)."""
+    return compact_census_frame(gpd.read_parquet(path_census_store, columns=CENSUS_COLUMNS + ['geometry'], filters=[('NM_UF', 'in', states)]))
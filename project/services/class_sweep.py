@@ -0,0 +1,127 @@
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+import shapely
+
+from .calculation_job import CalculationJob
+from .calculation_service import CalculationService
+from .census_dataset import CensusDataset
+from .contour import protected_contours
+from .ipca import ipca_calculation
+from .ipca_store import IPCAStore, get_ipca_store
+from .profiling import profiled, stage
+from .report_pipeline import prepare_form_data
+from .tariff import CLASS_INDEX, CLASSES
+
+
+@dataclass(frozen=True, slots=True)
+class SweepCandidate:
+    """Classe proposta (e faixa de canais, quando o dmax depende do canal) avaliada na varredura."""
+
+    proposed_class: str
+    channel: str
+    channels: str | None  # Faixa de canais (ex.: '14 a 46'); None se o dmax não depende do canal
+    dmax: float
+
+
+def sweep_candidates(current_class: str, proposed_channel: str) -> list[SweepCandidate]:
+    """
+    Classes acima de 'current_class', com uma entrada por faixa de canais
+    quando o dmax da classe depende do canal. As demais usam
+    'proposed_channel'. Ordenadas da menor para a maior classe.
+    """
+    current = CLASS_INDEX.get(str(current_class).upper())
+    if current is None:
+        raise ValueError(f"Classe atual '{current_class}' inexistente.")
+
+    candidates = []
+    for proposed_class in CLASSES[current + 1:]:
+        dmax = CalculationService.dmax_values.get(proposed_class.lower())
+        if isinstance(dmax, list):
+            for channels, value in dmax:
+                candidates.append(SweepCandidate(
+                    proposed_class, str(channels.start), f'{channels.start} a {channels.stop - 1}', value))
+        else:
+            candidates.append(SweepCandidate(proposed_class, proposed_channel, None, dmax))
+
+    return candidates
+
+
+def _covered_codes_by_radius(service: CalculationService, radii: list[float]) -> list[list]:
+    """
+    Municípios cobertos para cada raio, a partir das sedes atingidas pelo
+    maior contorno (o geo_process de 'service'): os contornos menores estão
+    contidos no maior, então basta testar essas sedes contra cada contorno.
+    """
+    seats = service.gdf_urban_sectors_cp_intersection
+    codes = seats['CD_MUN'].to_numpy()
+    contours = protected_contours(service.proposed_latitude_decimal, service.proposed_longitude_decimal, radii)
+    reached = shapely.intersects(contours[:, None], seats.geometry.to_numpy()[None, :])
+
+    return [sorted(np.unique(codes[row]).tolist()) for row in reached]
+
+
+@profiled()
+def sweep_classes(dataset: CensusDataset, job: CalculationJob, path_ipca: Path,
+                  store: IPCAStore | None = None) -> list[dict]:
+    """
+    Calcula, de uma só vez, os resultados de todas as classes propostas
+    acima da classe atual de 'job' (e de cada faixa de canais): municípios
+    cobertos, Ptot, Tcp, Vab, Vbc, Vpc e Vpc corrigido pelo IPCA.
+
+    O geoprocessamento é feito uma única vez, no maior contorno protegido;
+    cada classe usa apenas as sedes urbanas atingidas por ele. A classe
+    proposta de 'job' é ignorada.
+    """
+    candidates = sweep_candidates(job.current_class, job.proposed_channel)
+    if not candidates:
+        return []
+
+    if store is None:
+        store = get_ipca_store(path_ipca)
+
+    widest = max(candidates, key=lambda candidate: candidate.dmax)
+    service = CalculationService(dataset, replace(job, proposed_class=widest.proposed_class, proposed_channel=widest.channel))
+    service.geo_process()
+
+    with stage('cobertura por classe'):
+        covered_codes = _covered_codes_by_radius(service, [candidate.dmax for candidate in candidates])
+
+    results = []
+    for candidate, codes in zip(candidates, covered_codes):
+        # Mesmo cálculo do pedido individual, com os municípios cobertos pelo contorno da classe
+        service.data_process(service.current_class, candidate.proposed_class, service.current_latitude,
+                             service.current_longitude, service.proposed_state, service.proposed_municipality_code)
+        covered_municipalities = service.municipality_table.records(codes, service.state_abbreviations)
+        service.calculo_promocao_classe(covered_municipalities)
+
+        ipca_value, ipca_date = (None, None)
+        if service.Vpc != 'não se aplica':
+            ipca_value, ipca_date = ipca_calculation(service.Vpc, path_ipca, store)
+
+        results.append({
+            'classe_proposta': candidate.proposed_class,
+            'canais': candidate.channels,
+            'dmax': candidate.dmax,
+            'grupo_proposto': service.proposed_group,
+            'tipo_mudanca': service.change_type,
+            'municipios_afetados': covered_municipalities,
+            'tcp': service.tcp_value,
+            'municipio_referencia': service.reference_city,
+            'pref': service.Pref,
+            'valor_ab': service.Vab,
+            'valor_bc': service.Vbc,
+            'ptot': service.Ptot,
+            'vpc': service.Vpc,
+            'ipca': ipca_value,
+            'data_ipca': ipca_date
+        })
+
+    return results
+
+
+def sweep_form(dataset: CensusDataset, data: dict, path_ipca: Path) -> list[dict]:
+    """Varredura de classes a partir dos dados do formulário (a classe proposta é ignorada)."""
+    data = dict(data, classe_proposta=data.get('classe_proposta', ''))
+    return sweep_classes(dataset, CalculationJob.from_form(prepare_form_data(data)), path_ipca)
@@ -0,0 +1,266 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+import math
+from pathlib import Path
+
+import geopandas as gpd
+from matplotlib import colormaps
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+import numpy as np
+import shapely
+
+from .calculation_job import CalculationJob
+from .calculation_service import CalculationService
+from .census_dataset import CensusDataset
+from .contour import GEOGRAPHIC_CRS, protected_contours
+from .map_renderer import ring_segments
+from .tariff import CLASS_INDEX, vpc_values
+from .utils import decimal_to_dms
+from .workers import init_worker, worker_dataset
+
+# Quilômetros por grau de latitude (espaçamento da grade)
+KM_PER_DEGREE = 111.32
+
+# Lado (em pontos) dos blocos de vizinhos avaliados em cada tarefa do pool
+BLOCK_SIZE = 16
+
+HEATMAP_FIGSIZE = (10, 8)
+HEATMAP_DPI = 100
+HEATMAP_CMAP = colormaps['viridis']
+HEATMAP_OUTLINE_STYLE = {'colors': 'white', 'linewidths': 0.4, 'alpha': 0.6}
+HEATMAP_SEAT_STYLE = {'colors': 'orange', 'linewidths': 0.5}
+HEATMAP_XLABEL = 'Longitude geodésica [grau]'
+HEATMAP_YLABEL = 'Latitude geodésica [grau]'
+
+
+@dataclass(frozen=True, slots=True)
+class CostGrid:
+    """Pontos (EPSG:4674) da grade: latitude de cada linha (do sul para o norte) e longitude de cada coluna."""
+
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.latitudes), len(self.longitudes)
+
+    def extent(self) -> tuple[float, float, float, float]:
+        """Bordas das células (oeste, leste, sul, norte), com os pontos no centro."""
+        half_lat = (self.latitudes[1] - self.latitudes[0]) / 2 if len(self.latitudes) > 1 else 0.0
+        half_lon = (self.longitudes[1] - self.longitudes[0]) / 2 if len(self.longitudes) > 1 else 0.0
+        return (self.longitudes[0] - half_lon, self.longitudes[-1] + half_lon,
+                self.latitudes[0] - half_lat, self.latitudes[-1] + half_lat)
+
+
+def build_grid(bounds: tuple, spacing_km: float) -> CostGrid:
+    """
+    Grade de pontos sobre 'bounds' (oeste, sul, leste, norte, em graus)
+    espaçados de 'spacing_km' quilômetros, a partir do canto sudoeste. O
+    espaçamento em longitude é tomado na latitude central.
+    """
+    minx, miny, maxx, maxy = bounds
+    if minx >= maxx or miny >= maxy:
+        raise ValueError("Retângulo inválido: use oeste < leste e sul < norte.")
+    if spacing_km <= 0:
+        raise ValueError("O espaçamento da grade deve ser positivo.")
+
+    step_lat = spacing_km / KM_PER_DEGREE
+    step_lon = spacing_km / (KM_PER_DEGREE * math.cos(math.radians((miny + maxy) / 2)))
+    rows = int(math.floor((maxy - miny) / step_lat + 1e-9)) + 1
+    columns = int(math.floor((maxx - minx) / step_lon + 1e-9)) + 1
+
+    return CostGrid(miny + np.arange(rows) * step_lat, minx + np.arange(columns) * step_lon)
+
+
+def grid_job(state: str, municipality: str, current_class: str, proposed_class: str, channel: str,
+             latitude: float, longitude: float) -> CalculationJob:
+    """Pedido usado para os valores comuns a todos os pontos (classes, UF e município de referência)."""
+    latitude = decimal_to_dms(latitude, 'N', 'S')
+    longitude = decimal_to_dms(longitude, 'E', 'W')
+
+    return CalculationJob(
+        process_number='',
+        service='',
+        entity='',
+        finality='',
+        public_consultation='',
+        current_municipality=municipality,
+        current_state=state,
+        current_class=current_class,
+        current_channel=channel,
+        current_latitude=latitude,
+        current_longitude=longitude,
+        proposed_municipality=municipality,
+        proposed_state=state,
+        proposed_class=proposed_class,
+        proposed_channel=channel,
+        proposed_latitude=latitude,
+        proposed_longitude=longitude
+    )
+
+
+@lru_cache(maxsize=4)
+def _seat_populations(dataset: CensusDataset) -> np.ndarray:
+    """População do município de cada sede urbana, na ordem do índice de sedes."""
+    table = dataset.municipality_table()
+    positions = table.positions(dataset.coverage_engine.codes)
+    return np.where(positions >= 0, table.populations[positions], 0)
+
+
+def block_coverage(dataset: CensusDataset, latitudes: np.ndarray, longitudes: np.ndarray,
+                   dmax: float) -> tuple[np.ndarray, list[list]]:
+    """
+    Ptot e municípios cobertos em cada ponto de um bloco de vizinhos (linhas
+    'latitudes' x colunas 'longitudes'), com contornos de raio 'dmax'.
+
+    Os pontos do bloco compartilham a triagem: uma única consulta no STRtree
+    (retângulo de todos os contornos) e um único teste das sedes contra a
+    interseção dos contornos, que atinge todos os pontos. Apenas as demais
+    sedes são testadas ponto a ponto.
+    """
+    engine = dataset.coverage_engine
+    populations = _seat_populations(dataset)
+
+    latitude_grid, longitude_grid = np.meshgrid(latitudes, longitudes, indexing='ij')
+    contours = protected_contours(latitude_grid.ravel(), longitude_grid.ravel(), dmax)
+
+    candidates = engine.tree.query(shapely.box(*shapely.total_bounds(contours)))
+    shared = shapely.intersects(shapely.intersection_all(contours), engine.geometries[candidates])
+    common, rest = np.sort(candidates[shared]), np.sort(candidates[~shared])
+
+    reached = shapely.intersects(contours[:, None], engine.geometries[rest][None, :])
+    ptot = populations[common].sum() + reached @ populations[rest]
+
+    seat_codes = engine.codes.astype(np.int64)
+    common_codes = seat_codes[common].tolist()
+    codes = [sorted(common_codes + seat_codes[rest[row]].tolist()) for row in reached]
+
+    return ptot.reshape(latitude_grid.shape), codes
+
+
+def _evaluate_block(row: int, column: int, latitudes: np.ndarray, longitudes: np.ndarray, dmax: float):
+    """Tarefa do pool: cobertura de um bloco com o dataset deste processo."""
+    ptot, codes = block_coverage(worker_dataset(), latitudes, longitudes, dmax)
+    return row, column, ptot, codes
+
+
+def _blocks(grid: CostGrid, block_size: int):
+    rows, columns = grid.shape
+    for row in range(0, rows, block_size):
+        for column in range(0, columns, block_size):
+            yield row, column, grid.latitudes[row:row + block_size], grid.longitudes[column:column + block_size]
+
+
+def run_cost_grid(dataset_paths: dict, job: CalculationJob, grid: CostGrid, max_workers: int | None = None,
+                  block_size: int = BLOCK_SIZE, progress=print, dataset: CensusDataset | None = None) -> gpd.GeoDataFrame:
+    """
+    Calcula os municípios cobertos, Ptot e Vpc em cada ponto da grade para
+    as classes, a UF e o município proposto de 'job'.
+
+    Os blocos de pontos vizinhos são distribuídos em um pool de processos;
+    cada processo carrega o dataset uma única vez ('init_worker') e o usa
+    em todos os seus blocos. Com 'max_workers' = 1 os blocos são avaliados
+    neste processo. 'dataset' (já carregado a partir de 'dataset_paths')
+    evita uma nova carga neste processo. Retorna um GeoDataFrame com um
+    ponto por linha.
+    """
+    if dataset is None:
+        dataset = CensusDataset(**dataset_paths)
+    if dataset.coverage_engine is None:
+        raise ValueError("A grade de custos exige a camada de sedes urbanas (gere as bases com build_data.py).")
+
+    # Valores comuns a todos os pontos: Tcp, Pref, Vab e Vbc do pedido
+    service = CalculationService(dataset, job)
+    service.data_process(service.current_class, service.proposed_class, service.current_latitude,
+                         service.current_longitude, service.proposed_state, service.proposed_municipality_code)
+    service.calculo_promocao_classe([])
+    if service.Vpc == 'não se aplica':
+        raise ValueError(f"A classe {service.proposed_class} não é uma promoção da classe {service.current_class}.")
+    dmax = float(service.dmax_contour)
+
+    ptot = np.zeros(grid.shape, dtype=np.int64)
+    codes = np.empty(grid.shape, dtype=object)
+    blocks = list(_blocks(grid, block_size))
+    progress(f"{grid.shape[0] * grid.shape[1]} pontos ({grid.shape[0]} x {grid.shape[1]}) em {len(blocks)} blocos, dmax = {dmax:g} km.")
+
+    def store(row, column, block_ptot, block_codes):
+        rows, columns = block_ptot.shape
+        ptot[row:row + rows, column:column + columns] = block_ptot
+        for position, point_codes in enumerate(block_codes):
+            codes[row + position // columns, column + position % columns] = point_codes
+
+    if max_workers == 1:
+        for finished, (row, column, latitudes, longitudes) in enumerate(blocks, start=1):
+            store(row, column, *block_coverage(dataset, latitudes, longitudes, dmax))
+            progress(f"[{finished}/{len(blocks)}] blocos")
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(dataset_paths,)) as executor:
+            futures = [executor.submit(_evaluate_block, *block, dmax) for block in blocks]
+            for finished, future in enumerate(as_completed(futures), start=1):
+                store(*future.result())
+                progress(f"[{finished}/{len(blocks)}] blocos")
+
+    current, proposed = CLASS_INDEX[service.current_class], CLASS_INDEX[service.proposed_class]
+    vpc = vpc_values(current, proposed, ptot, service.Pref, service.Vab, service.Vbc)
+    # Pref zero com parcela cobrada: Vpc indefinido (infinito), gravado como NaN
+    vpc = np.where(np.isfinite(vpc), vpc, np.nan)
+
+    rows, columns = np.indices(grid.shape)
+    latitude_grid, longitude_grid = np.meshgrid(grid.latitudes, grid.longitudes, indexing='ij')
+    return gpd.GeoDataFrame({
+        'linha': rows.ravel(),
+        'coluna': columns.ravel(),
+        'latitude': latitude_grid.ravel(),
+        'longitude': longitude_grid.ravel(),
+        'municipios': [len(point_codes) for point_codes in codes.ravel()],
+        'codigos': codes.ravel(),
+        'ptot': ptot.ravel(),
+        'vpc': vpc.ravel()
+    }, geometry=gpd.points_from_xy(longitude_grid.ravel(), latitude_grid.ravel()), crs=GEOGRAPHIC_CRS)
+
+
+def write_cost_grid(gdf_grid: gpd.GeoDataFrame, path_grid: Path):
+    """Grava a grade como GeoParquet (um ponto por linha)."""
+    Path(path_grid).parent.mkdir(parents=True, exist_ok=True)
+    gdf_grid.to_parquet(path_grid, compression='zstd', write_covering_bbox=True)
+
+
+def heatmap_values(gdf_grid: gpd.GeoDataFrame, grid: CostGrid) -> np.ma.MaskedArray:
+    """Vpc da grade em linhas e colunas, sem os valores não finitos (fora da escala de cores)."""
+    vpc = gdf_grid.sort_values(['linha', 'coluna'])['vpc'].to_numpy(dtype=float).reshape(grid.shape)
+    return np.ma.masked_invalid(vpc)
+
+
+def render_heatmap(gdf_grid: gpd.GeoDataFrame, grid: CostGrid, target, title: str,
+                   dataset: CensusDataset | None = None):
+    """
+    Desenha o Vpc de cada célula da grade e grava o PNG em 'target'. Com
+    'dataset', acrescenta as divisas municipais e as sedes urbanas da região.
+    """
+    figure = Figure(figsize=HEATMAP_FIGSIZE, dpi=HEATMAP_DPI)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(1, 1, 1)
+
+    extent = grid.extent()
+    image = ax.imshow(heatmap_values(gdf_grid, grid), origin='lower', extent=extent, cmap=HEATMAP_CMAP, interpolation='nearest')
+    figure.colorbar(image, ax=ax, label='Vpc (R$)', shrink=0.8)
+
+    if dataset is not None:
+        region = shapely.box(extent[0], extent[2], extent[1], extent[3])
+        if dataset.path_municipalities is not None and Path(dataset.path_municipalities).exists():
+            municipalities = gpd.read_parquet(dataset.path_municipalities, columns=['geometry'], bbox=tuple(region.bounds))
+            ax.add_collection(LineCollection(ring_segments(municipalities.geometry.to_numpy()), **HEATMAP_OUTLINE_STYLE))
+        if dataset.coverage_engine is not None:
+            seats = dataset.coverage_engine.geometries[dataset.coverage_engine.tree.query(region)]
+            ax.add_collection(LineCollection(ring_segments(seats), **HEATMAP_SEAT_STYLE))
+
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect(1 / np.cos(np.radians((extent[2] + extent[3]) / 2)))
+    ax.set_xlabel(HEATMAP_XLABEL)
+    ax.set_ylabel(HEATMAP_YLABEL)
+    ax.set_title(title, fontsize=12, y=1.01)
+    figure.savefig(target, format='png')
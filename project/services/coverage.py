@@ -0,0 +1,51 @@
+from functools import lru_cache
+import geopandas as gpd
+import numpy as np
+from pathlib import Path
+import shapely
+
+from .census_store import compact_census_frame
+
+
+class CoverageEngine:
+    """
+    Índice espacial (STRtree) das sedes urbanas.
+
+    Responde quais municípios têm a sede urbana atingida pelo contorno
+    protegido ('protected_contour' de 'contour.py') com uma consulta
+    'intersects' no índice.
+    """
+
+    def __init__(self, gdf_urban_seats: gpd.GeoDataFrame):
+        # Sedes em EPSG:4674 (as mesmas do mapa), indexadas por 'CD_MUN'
+        self.gdf_urban_seats = gdf_urban_seats
+
+        self.codes = np.asarray(gdf_urban_seats.index, dtype=object)
+        self.geometries = np.asarray(gdf_urban_seats.geometry.values)
+        self.tree = shapely.STRtree(self.geometries)
+
+    def query(self, contour: shapely.Geometry) -> np.ndarray:
+        """Retorna as posições (ordenadas) das sedes atingidas pelo contorno."""
+        return np.sort(self.tree.query(contour, predicate='intersects'))
+
+    def covered_codes(self, contour: shapely.Geometry) -> list:
+        """Códigos ('CD_MUN') dos municípios cuja sede urbana é atingida pelo contorno."""
+        return sorted(self.codes[self.query(contour)].tolist())
+
+    def urban_seats(self, codes) -> gpd.GeoDataFrame:
+        """Sedes urbanas dos municípios 'codes' no CRS original."""
+        return self.gdf_urban_seats[self.gdf_urban_seats.index.isin(list(codes))]
+
+
+@lru_cache(maxsize=None)
+def load_coverage_engine(path_urban_seats: Path) -> CoverageEngine | None:
+    """
+    Carrega (uma única vez por caminho) o índice das sedes urbanas.
+    Retorna None se a camada de sedes não tiver sido gerada.
+    """
+    if not Path(path_urban_seats).exists():
+        return None
+
+    gdf_urban_seats = compact_census_frame(gpd.read_parquet(path_urban_seats, columns=['CD_MUN', 'NM_MUN', 'NM_UF', 'geometry']))
+
+    return CoverageEngine(gdf_urban_seats)
@@ -0,0 +1,327 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import json
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import shapely
+
+from .ipca_store import default_cache_path
+
+# Formato das entradas; muda quando o cálculo da cobertura muda (descarta o cache gravado)
+COVERAGE_CACHE_FORMAT = 2
+
+# Entradas mantidas em memória e no arquivo
+MEMORY_ENTRIES = 128
+DISK_ENTRIES = 10_000
+
+# Casas decimais das coordenadas da estação na chave (~0,1 m)
+COORDINATE_DECIMALS = 6
+
+SQLITE_TIMEOUT = 10
+
+# Manifesto com o conteúdo das bases derivadas e tamanho dos blocos lidos ao calcular o SHA-256
+DATA_MANIFEST_NAME = 'versao_dados.json'
+HASH_CHUNK_SIZE = 1 << 20
+
+# Bytes do início e do fim de cada arquivo na impressão digital usada sem o manifesto
+FINGERPRINT_BYTES = 1 << 16
+
+# Arquivos do Shapefile lidos junto com o .shp (atributos, índice e sistema de coordenadas)
+SHAPEFILE_SIBLINGS = ('.shx', '.dbf', '.prj', '.cpg')
+
+
+def default_coverage_cache_path() -> Path:
+    """Arquivo do cache de cobertura, na mesma pasta do cache do IPCA."""
+    return default_cache_path().with_name('cobertura_cache.sqlite')
+
+
+def data_manifest_path(path_census_store: Path) -> Path:
+    """Manifesto das bases derivadas, na pasta da base de setores."""
+    return Path(path_census_store).with_name(DATA_MANIFEST_NAME)
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 do conteúdo do arquivo (lido em blocos)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_data_manifest(paths, path_manifest: Path) -> dict:
+    """Grava em 'path_manifest' o tamanho e o SHA-256 de cada arquivo, por nome."""
+    files = {
+        Path(path).name: {'tamanho': Path(path).stat().st_size, 'sha256': file_digest(path)}
+        for path in paths if path is not None and Path(path).exists()
+    }
+    with open(path_manifest, 'w', encoding='utf-8') as file:
+        json.dump({'arquivos': files}, file, ensure_ascii=False, indent=2)
+    return files
+
+
+def _read_data_manifest(path_manifest: Path | None) -> dict:
+    if path_manifest is None:
+        return {}
+    try:
+        with open(path_manifest, 'r', encoding='utf-8') as file:
+            return json.load(file).get('arquivos', {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def file_fingerprint(path: Path) -> str:
+    """
+    Impressão digital barata do arquivo (sem lê-lo inteiro): tamanho, data
+    de modificação e SHA-256 dos primeiros e dos últimos bytes.
+    """
+    stat = Path(path).stat()
+    digest = hashlib.sha256(f'{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    with open(path, 'rb') as file:
+        digest.update(file.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            file.seek(max(stat.st_size - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _data_files(paths) -> list[Path]:
+    """Arquivos existentes de 'paths', com os arquivos irmãos de cada Shapefile."""
+    files = []
+    for path in paths:
+        if path is None:
+            continue
+        path = Path(path)
+        candidates = [path]
+        if path.suffix.lower() == '.shp':
+            candidates += [path.with_suffix(suffix) for suffix in SHAPEFILE_SIBLINGS]
+        files += [candidate for candidate in candidates if candidate.exists()]
+    return files
+
+
+def dataset_version(paths, path_manifest: Path | None = None) -> str:
+    """
+    Identificador do conteúdo dos arquivos de dados. Usa o SHA-256 gravado
+    pelo build_data.py no manifesto quando nome e tamanho conferem (não
+    depende da data de modificação, que muda a cada extração do executável);
+    para os demais arquivos, usa a impressão digital de 'file_fingerprint'.
+    Um Shapefile inclui os arquivos irmãos (.dbf, .shx...).
+    """
+    manifest = _read_data_manifest(path_manifest)
+    digest = hashlib.sha256(f'formato={COVERAGE_CACHE_FORMAT}'.encode())
+    for path in _data_files(paths):
+        entry = manifest.get(path.name)
+        if isinstance(entry, dict) and entry.get('tamanho') == path.stat().st_size and entry.get('sha256'):
+            content = entry['sha256']
+        else:
+            content = file_fingerprint(path)
+        digest.update(f'|{path.name}:{content}'.encode())
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
+class CoverageResult:
+    """Resultado do geoprocessamento de um contorno protegido."""
+
+    states: tuple[str, ...]           # UFs atingidas pelo contorno
+    touched_codes: tuple[int, ...]    # Municípios atingidos pelo contorno
+    covered_codes: tuple[int, ...]    # Municípios com sede urbana atingida
+    population: int                   # Ptot (população dos municípios cobertos)
+    seat_codes: np.ndarray            # 'CD_MUN' das sedes urbanas dos municípios atingidos
+    seat_geometries: np.ndarray       # Sedes urbanas (EPSG:4674), na ordem de 'seat_codes'
+
+
+class CoverageCache:
+    """
+    Cache em dois níveis (LRU em memória e SQLite em disco) dos resultados do
+    geoprocessamento, por (latitude, longitude, dmax) da estação proposta.
+
+    Cada cache pertence a uma versão dos dados ('version') e só lê as
+    entradas dessa versão; as de outras versões ficam no arquivo até
+    'prune' (ou até saírem pelo limite de entradas). Sem 'path_db', usa
+    apenas a memória. Pode ser usado por várias threads e
+    por vários processos (o arquivo é compartilhado).
+    """
+
+    def __init__(self, version: str, path_db: Path | None = None, max_entries: int = MEMORY_ENTRIES,
+                 max_disk_entries: int = DISK_ENTRIES):
+        self.version = version
+        self.path_db = Path(path_db) if path_db is not None else None
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_ready = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+
+    @staticmethod
+    def key(latitude: float, longitude: float, dmax: float) -> tuple:
+        return round(float(latitude), COORDINATE_DECIMALS), round(float(longitude), COORDINATE_DECIMALS), float(dmax)
+
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Conexão com o arquivo (criado na primeira vez); None se o disco estiver desativado."""
+        if self.path_db is None:
+            return None
+
+        if not self._db_ready:
+            self.path_db.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path_db, timeout=SQLITE_TIMEOUT)
+        if not self._db_ready:
+            with connection:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS cobertura ('
+                    'latitude REAL, longitude REAL, dmax REAL, versao TEXT, estados TEXT, atingidos TEXT, '
+                    'cobertos TEXT, ptot INTEGER, codigos_sedes TEXT, sedes BLOB, usado_em REAL, '
+                    'PRIMARY KEY (latitude, longitude, dmax, versao))'
+                )
+            self._db_ready = True
+        return connection
+
+
+    def _disable_disk(self, error: Exception):
+        print(f"Cache de cobertura em disco desativado: {error}")
+        self.path_db = None
+
+
+    def _read_disk(self, key: tuple) -> CoverageResult | None:
+        try:
+            connection = self._connect()
+            if connection is None:
+                return None
+            with connection:
+                row = connection.execute(
+                    'SELECT estados, atingidos, cobertos, ptot, codigos_sedes, sedes FROM cobertura '
+                    'WHERE latitude = ? AND longitude = ? AND dmax = ? AND versao = ?', (*key, self.version)
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        'UPDATE cobertura SET usado_em = ? WHERE latitude = ? AND longitude = ? AND dmax = ? AND versao = ?',
+                        (time.time(), *key, self.version)
+                    )
+            connection.close()
+        except (sqlite3.Error, OSError) as e:
+            self._disable_disk(e)
+            return None
+
+        if row is None:
+            return None
+
+        states, touched, covered, population, seat_codes, seats = row
+        return CoverageResult(
+            states=tuple(json.loads(states)),
+            touched_codes=tuple(json.loads(touched)),
+            covered_codes=tuple(json.loads(covered)),
+            population=population,
+            seat_codes=np.asarray(json.loads(seat_codes), dtype=np.int32),
+            seat_geometries=shapely.get_parts(shapely.from_wkb(seats))
+        )
+
+
+    def _write_disk(self, key: tuple, result: CoverageResult):
+        try:
+            connection = self._connect()
+            if connection is None:
+                return
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO cobertura VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (*key, self.version, json.dumps(list(result.states), ensure_ascii=False),
+                     json.dumps(list(result.touched_codes)), json.dumps(list(result.covered_codes)),
+                     result.population, json.dumps(result.seat_codes.tolist()),
+                     shapely.to_wkb(shapely.GeometryCollection(list(result.seat_geometries))), time.time())
+                )
+                # Mantém apenas as entradas usadas mais recentemente
+                connection.execute(
+                    'DELETE FROM cobertura WHERE rowid NOT IN (SELECT rowid FROM cobertura ORDER BY usado_em DESC LIMIT ?)',
+                    (self.max_disk_entries,)
+                )
+            connection.close()
+        except (sqlite3.Error, OSError) as e:
+            self._disable_disk(e)
+
+
+    def get(self, key: tuple) -> CoverageResult | None:
+        """Resultado guardado para 'key' (da memória ou, se não estiver lá, do disco)."""
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return result
+
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, result)
+        return result
+
+
+    def _remember(self, key: tuple, result: CoverageResult):
+        """Guarda na memória, descartando a entrada usada há mais tempo (com o lock)."""
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+    def put(self, key: tuple, result: CoverageResult):
+        with self._lock:
+            self._remember(key, result)
+        self._write_disk(key, result)
+
+
+    def stats(self) -> dict:
+        """Acertos (memória e disco), falhas, taxa de acerto e entradas em memória."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'acertos_memoria': self.memory_hits,
+                'acertos_disco': self.disk_hits,
+                'falhas': self.misses,
+                'taxa_acerto': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'entradas_memoria': len(self._memory),
+                'versao_dados': self.version
+            }
+
+
+    def clear(self):
+        """Apaga as entradas da memória e do arquivo."""
+        with self._lock:
+            self._memory.clear()
+        try:
+            connection = self._connect()
+            if connection is not None:
+                with connection:
+                    connection.execute('DELETE FROM cobertura')
+                connection.close()
+        except (sqlite3.Error, OSError) as e:
+            self._disable_disk(e)
+
+
+    def prune(self) -> int:
+        """Apaga do arquivo as entradas de outras versões dos dados (manutenção); devolve quantas apagou."""
+        try:
+            connection = self._connect()
+            if connection is None:
+                return 0
+            with connection:
+                deleted = connection.execute('DELETE FROM cobertura WHERE versao != ?', (self.version,)).rowcount
+            connection.close()
+        except (sqlite3.Error, OSError) as e:
+            self._disable_disk(e)
+            return 0
+        return deleted
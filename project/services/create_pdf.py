@@ -1,13 +1,13 @@
-import json
+import io
 import locale
-import os
-from pathlib import Path
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
 
+from .profiling import profiled, stage
+
 try:
     locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 except locale.Error:
@@ -17,20 +17,17 @@ except locale.Error:
     locale.setlocale(locale.LC_ALL, 'pt_BR')
 
 
-def create_relatorio(path_uf: Path, file_path: str, data: dict):
+@profiled('create_relatorio')
+def create_relatorio(file_path, data: dict) -> bytes | None:
     """
     Gera um PDF com os dados da estação e a imagem fornecida
 
     Args:
-        path_uf (Path): Caminho do arquivo UF.
-        file_path (str): Caminho do arquivo PDF a ser gerado.
-        data (dict): Um dicionário contendo os dados da estação.
+        file_path (str | stream | None): Caminho do arquivo PDF a ser gerado ou
+            arquivo binário aberto. Com None, o PDF é retornado em bytes.
+        data (dict): Um dicionário contendo os dados da estação; o mapa vem
+            em 'mapa' (PNG em bytes ou arquivo binário).
     """
- 
-    with open(path_uf, 'r', encoding='utf-8') as file:
-        sigla_para_nome = json.load(file)
-
-    name_to_abbreviation = {v.strip(): k.strip() for k, v in sigla_para_nome.items()}
     
     # ------------------------------------------------
     # Formantando as variaves
@@ -41,7 +38,7 @@ def create_relatorio(path_uf: Path, file_path: str, data: dict):
     ptot = data['ptot']
     vpc = data['vpc']
     ipca = data['ipca']
-    map_path = data['caminho_mapa_temp']
+    mapa = data.get('mapa')
     
     dmax_normalized = locale.format_string("%.1f", float(dmax), grouping=True)
     pref_normalized = locale.format_string("%d", int(pref), grouping=True)
@@ -52,7 +49,8 @@ def create_relatorio(path_uf: Path, file_path: str, data: dict):
     ipca_normalized = locale.format_string("%.2f", float(ipca), grouping=True)
     # ------------------------------------------------
 
-    doc = SimpleDocTemplate(file_path, pagesize=letter)
+    output = io.BytesIO() if file_path is None else file_path
+    doc = SimpleDocTemplate(output, pagesize=letter)
     story = []
     
     # ------------------------------------------------
@@ -183,9 +181,10 @@ def create_relatorio(path_uf: Path, file_path: str, data: dict):
 
     # ------------------- Página 2 -------------------
     # Adiciona imagem do mapa
-    try:
-        story.append(Image(map_path, width=6.5*inch, height=5*inch))
-    except FileNotFoundError:
+    if mapa is not None:
+        map_image = io.BytesIO(mapa) if isinstance(mapa, (bytes, bytearray)) else mapa
+        story.append(Image(map_image, width=6.5*inch, height=5*inch))
+    else:
         story.append(Paragraph("<i>(Imagem do mapa não encontrada)</i>", styles['Normal']))
 
     story.append(Spacer(1, 0.1 * inch))
@@ -197,20 +196,11 @@ def create_relatorio(path_uf: Path, file_path: str, data: dict):
         ["UF", "Município", "População"]
     ]
 
-    # Processa cada string e adiciona à tabela
-    for item in data['municipios_afetados']:
-        parts = item.split('/')
-        full_state_name = parts[0]
-        municipality = parts[1]
-        population = parts[2]
-        
-        populacao_formatado = locale.format_string("%d", int(population), grouping=True)
+    # Adiciona cada município coberto (MunicipalityRecord) à tabela
+    for municipality in data['municipios_afetados']:
+        populacao_formatado = locale.format_string("%d", municipality.population, grouping=True)
         
-        # Converte o nome completo do estado para a sigla
-        uf_sigla = name_to_abbreviation.get(full_state_name, full_state_name)
-        
-        # Adiciona a nova linha à sua tabela
-        municipalities.append([uf_sigla, municipality, populacao_formatado])
+        municipalities.append([municipality.state, municipality.name, populacao_formatado])
     
     # Estilo para formatação da tabela
     table_municipalities = Table(municipalities, colWidths=[None, None])
@@ -276,13 +266,8 @@ def create_relatorio(path_uf: Path, file_path: str, data: dict):
     story.append(Paragraph(f"Conforme o Ofício nº 35528/2023/MCom, de 01/12/2023, solicitou-se à Anatel que aplicasse a correção monetária pelo IPCA, desde 01/08/2013 até a data de emissão do boleto ({data['data_ipca']}), aos valores decorrentes da alteração de características técnicas que resultem em aumento de potência. Utilizando a calculadora de IPCA fornecida pelo Banco Central, o valor atualizado para a promoção de classe foi calculado em R$ {ipca_normalized}.", styles['Normal']))
     story.append(Paragraph(f"Portanto, o valor a ser cobrado pela promoção de classe é <b>R$ {ipca_normalized}</b>.", styles['Normal']))
     
-    try:
+    with stage('doc.build'):
         doc.build(story)
-    finally:
-        if os.path.exists(map_path):
-            try:
-                os.remove(map_path)
-            except OSError as e:
-                print(f"AVISO: Não foi possível excluir o arquivo temporário '{map_path}': {e}")
-        else:
-            print(f"AVISO: Mapa temporário '{map_path}' não encontrado para exclusão.")
+
+    if file_path is None:
+        return output.getvalue()
@@ -1,3 +1,4 @@
+import io
 import json
 import locale
 import os
@@ -6,6 +7,8 @@ from docx import Document
 from docx.shared import Pt, Inches, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
+from .profiling import profiled, stage
+
 try:
     locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 except locale.Error:
@@ -15,9 +18,11 @@ except locale.Error:
     locale.setlocale(locale.LC_ALL, 'pt_BR')
 
 
-def create_word_doc(file_path_docx: str, data: dict):
+@profiled('create_word_doc')
+def create_word_doc(file_path_docx, data: dict) -> bytes | None:
     """
-    Gera o ofício em formato Word (.docx)
+    Gera o ofício em formato Word (.docx) no caminho ou arquivo binário
+    'file_path_docx'. Com None, o documento é retornado em bytes.
     """
     processo_num = data['numero_processo']
     entidade = data['entidade'].upper()
@@ -185,4 +190,9 @@ def create_word_doc(file_path_docx: str, data: dict):
     p.paragraph_format.space_before = Pt(20)
 
     # --- Salvar ---
-    doc.save(file_path_docx)
\ No newline at end of file
+    output = io.BytesIO() if file_path_docx is None else file_path_docx
+    with stage('docx save'):
+        doc.save(output)
+
+    if file_path_docx is None:
+        return output.getvalue()
\ No newline at end of file
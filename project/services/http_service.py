@@ -0,0 +1,234 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import dataclasses
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+from .report_pipeline import output_file_stem
+from .validation import normalize_form_data, validate_form_data
+from .workers import calculate_results, calculate_sweep, init_worker, ping, render_letter, render_report
+
+# Tamanho máximo aceito para o corpo de uma requisição (bytes)
+MAX_BODY_SIZE = 64 * 1024
+
+PDF_CONTENT_TYPE = 'application/pdf'
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+class ServerBusyError(Exception):
+    """A fila de pedidos do servidor está cheia."""
+
+
+def _json_default(value):
+    """Converte registros, escalares do NumPy (e demais valores) para tipos do JSON."""
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class CalculationServer(ThreadingHTTPServer):
+    """
+    Serviço HTTP local de cálculo. Os pedidos são executados em um pool de
+    processos cujos workers carregam o dataset uma única vez e permanecem
+    aquecidos entre pedidos.
+
+    'max_pending' limita quantos pedidos podem estar na fila ou em execução
+    ao mesmo tempo (acima disso o servidor responde 503) e 'request_timeout'
+    limita, em segundos, a espera por um resultado (acima disso, 504).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, dataset_paths: dict, path_ipca, placeholders: tuple,
+                 max_workers: int = 2, max_pending: int = 8, request_timeout: float = 120.0):
+        super().__init__(address, CalculationRequestHandler)
+
+        self.path_ipca = path_ipca
+        self.placeholders = placeholders
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.request_timeout = request_timeout
+
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(dataset_paths,))
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending_lock = threading.Lock()
+        self.pending = 0
+
+
+    def warm_up(self) -> list[int]:
+        """Inicia todos os processos do pool e aguarda o carregamento do dataset."""
+        futures = [self.executor.submit(ping) for _ in range(self.max_workers)]
+        return [future.result() for future in futures]
+
+
+    def _release(self, _future=None):
+        with self._pending_lock:
+            self.pending -= 1
+        self._slots.release()
+
+
+    def run(self, function, *args):
+        """
+        Executa 'function' no pool e aguarda o resultado. A vaga na fila só é
+        liberada quando a tarefa termina, mesmo que o pedido expire antes.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ServerBusyError("Fila de pedidos cheia.")
+        with self._pending_lock:
+            self.pending += 1
+
+        try:
+            future = self.executor.submit(function, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            # Descarta a tarefa se ela ainda não começou
+            future.cancel()
+            raise
+
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class CalculationRequestHandler(BaseHTTPRequestHandler):
+    """
+    Rotas do serviço. Os pedidos POST recebem o mesmo JSON do formulário
+    (chaves de 'get_form_data'), sem 'output_directory':
+
+    - GET  /saude     estado do servidor
+    - POST /calcular  resultados do cálculo, com o IPCA, em JSON
+    - POST /comparar  resultados de todas as classes acima da atual, em JSON
+    - POST /relatorio relatório em PDF
+    - POST /oficio    ofício em DOCX (exige 'incluir_enderecamento')
+    """
+
+    server_version = 'CalculoPromocaoClasse/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def _send_json(self, status: HTTPStatus, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+        self._send(status, body, 'application/json; charset=utf-8')
+
+
+    def _send_error(self, status: HTTPStatus, message: str, **extra):
+        self._send_json(status, {'erro': message, **extra})
+
+
+    def _read_form_data(self) -> dict:
+        """Lê e normaliza o JSON do corpo da requisição."""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            raise ValueError("Cabeçalho Content-Length inválido.")
+        if length < 0:
+            # rfile.read(-1) esperaria o cliente fechar a conexão
+            raise ValueError("Cabeçalho Content-Length inválido.")
+        if length > MAX_BODY_SIZE:
+            raise ValueError(f"Corpo da requisição maior que {MAX_BODY_SIZE} bytes.")
+
+        try:
+            data = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("O corpo da requisição deve ser um objeto JSON.")
+
+        return normalize_form_data(data)
+
+
+    def do_GET(self):
+        if self.path != '/saude':
+            self._send_error(HTTPStatus.NOT_FOUND, "Rota não encontrada.")
+            return
+
+        self._send_json(HTTPStatus.OK, {
+            'status': 'ok',
+            'processos': self.server.max_workers,
+            'pedidos_em_andamento': self.server.pending,
+            'limite_pedidos': self.server.max_pending
+        })
+
+
+    def do_POST(self):
+        if self.path not in ('/calcular', '/comparar', '/relatorio', '/oficio'):
+            self._send_error(HTTPStatus.NOT_FOUND, "Rota não encontrada.")
+            return
+
+        try:
+            data = self._read_form_data()
+        except ValueError as e:
+            self.close_connection = True
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+
+        campos_invalidos = validate_form_data(data, *self.server.placeholders, require_output_directory=False,
+                                              require_proposed_class=self.path != '/comparar')
+        if campos_invalidos:
+            self._send_error(HTTPStatus.BAD_REQUEST, "Campos obrigatórios não preenchidos.", campos=campos_invalidos)
+            return
+        if self.path == '/oficio' and not data['incluir_enderecamento']:
+            self._send_error(HTTPStatus.BAD_REQUEST, "O ofício exige 'incluir_enderecamento' e os dados de endereçamento.")
+            return
+
+        stem = output_file_stem(data['numero_processo'])
+        server = self.server
+
+        try:
+            if self.path == '/calcular':
+                self._send_json(HTTPStatus.OK, server.run(calculate_results, data, server.path_ipca))
+            elif self.path == '/comparar':
+                self._send_json(HTTPStatus.OK, {'classes': server.run(calculate_sweep, data, server.path_ipca)})
+            elif self.path == '/relatorio':
+                body = server.run(render_report, data, server.path_ipca)
+                self._send(HTTPStatus.OK, body, PDF_CONTENT_TYPE,
+                           {'Content-Disposition': f'attachment; filename="relatorio_{stem}.pdf"'})
+            else:
+                body = server.run(render_letter, data, server.path_ipca)
+                self._send(HTTPStatus.OK, body, DOCX_CONTENT_TYPE,
+                           {'Content-Disposition': f'attachment; filename="oficio_{stem}.docx"'})
+        except ServerBusyError as e:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+        except FutureTimeoutError:
+            self._send_error(HTTPStatus.GATEWAY_TIMEOUT, f"O cálculo excedeu {server.request_timeout:g} s.")
+        except ValueError as e:
+            # Erros nos dados do pedido (ex.: município não encontrado)
+            self._send_error(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+        except Exception as e:
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Erro ao processar o pedido: {e}")
+
+
+def create_server(host: str, port: int, dataset_paths: dict, path_ipca, placeholders: tuple,
+                  max_workers: int = 2, max_pending: int = 8, request_timeout: float = 120.0) -> CalculationServer:
+    """
+    Cria o servidor (porta 0 escolhe uma porta livre) e aquece o pool de
+    processos antes de aceitar pedidos.
+    """
+    server = CalculationServer((host, port), dataset_paths, path_ipca, placeholders,
+                               max_workers=max_workers, max_pending=max_pending, request_timeout=request_timeout)
+    try:
+        server.warm_up()
+    except Exception:
+        server.server_close()
+        raise
+
+    return server
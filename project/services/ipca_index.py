@@ -0,0 +1,104 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Formato das datas da série do IPCA (SGS/BCB e data/ipca.json)
+DATE_FORMAT = '%d/%m/%Y'
+
+
+def _month_of(value) -> int:
+    """Mês (meses desde 01/1970) de uma data em texto, date ou datetime64."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.strptime(value, DATE_FORMAT)
+    return int(np.datetime64(value, 'M').astype(np.int64))
+
+
+def to_months(values) -> np.ndarray:
+    """
+    Converte datas ('dd/mm/aaaa', date, datetime64) ou arrays de datas em
+    meses desde 01/1970. Inteiros são considerados meses já convertidos.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in 'iu':
+        return array.astype(np.int64)
+    if array.dtype.kind == 'M':
+        return array.astype('datetime64[M]').astype(np.int64)
+    if array.dtype.kind in 'US':
+        parsed = pd.to_datetime(array.ravel(), format=DATE_FORMAT).values
+        return parsed.astype('datetime64[M]').astype(np.int64).reshape(array.shape)
+
+    return np.vectorize(_month_of, otypes=[np.int64])(array)
+
+
+def format_month(month: int) -> str:
+    """Primeiro dia do mês no formato 'dd/mm/aaaa'."""
+    return pd.Timestamp(np.datetime64(int(month), 'M')).strftime(DATE_FORMAT)
+
+
+class IPCAIndex:
+    """
+    Série mensal do IPCA guardada como produto acumulado dos fatores
+    (1 + taxa/100). O fator entre dois meses quaisquer é a razão entre duas
+    posições do array, sem percorrer a série.
+    """
+
+    def __init__(self, months, rates):
+        months = to_months(months)
+        rates = np.asarray(rates, dtype=np.float64)
+
+        if months.size == 0:
+            raise ValueError("A série do IPCA está vazia.")
+
+        order = np.argsort(months, kind='stable')
+        months, rates = months[order], rates[order]
+        if np.any(np.diff(months) != 1):
+            raise ValueError("A série do IPCA deve ter todos os meses, sem lacunas ou repetições.")
+
+        self.first_month = int(months[0])
+        self.last_month = int(months[-1])
+        self.rates = rates
+
+        # cumulative[k] = produto dos fatores dos k primeiros meses
+        self.cumulative = np.concatenate(([1.0], np.cumprod(1 + rates / 100)))
+
+    def __len__(self):
+        return len(self.rates)
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> 'IPCAIndex':
+        """Cria o índice a partir da série no formato do SGS: [{'data': 'dd/mm/aaaa', 'valor': '0.24'}, ...]."""
+        return cls([record['data'] for record in records], [float(record['valor']) for record in records])
+
+    @property
+    def last_date(self) -> str:
+        """Data ('dd/mm/aaaa') do mês mais recente da série."""
+        return format_month(self.last_month)
+
+    def _positions(self, start, end):
+        start = to_months(start) - self.first_month
+        end = (to_months(end) if end is not None else np.int64(self.last_month)) - self.first_month
+
+        if np.any(start < 0) or np.any(end >= len(self.rates)) or np.any(end < start - 1):
+            raise ValueError(
+                f"Período fora da série do IPCA disponível ({format_month(self.first_month)} a {self.last_date})."
+            )
+        return start, end
+
+    def factor(self, start, end=None) -> float:
+        """Fator acumulado do mês 'start' ao mês 'end' (inclusive; padrão: último mês da série)."""
+        start, end = self._positions(start, end)
+        return float(self.cumulative[end + 1] / self.cumulative[start])
+
+    def correct(self, value: float, start, end=None) -> float:
+        """Corrige 'value' pelo IPCA do mês 'start' ao mês 'end' (inclusive)."""
+        return value * self.factor(start, end)
+
+    def correct_many(self, values, start, end=None) -> np.ndarray:
+        """
+        Corrige arrays de valores de uma vez. 'start' e 'end' podem ser datas
+        únicas ou arrays de datas (ex.: mês de emissão de cada boleto).
+        """
+        start, end = self._positions(start, end)
+        return np.asarray(values, dtype=np.float64) * (self.cumulative[end + 1] / self.cumulative[start])
@@ -0,0 +1,235 @@
+from datetime import datetime
+from functools import lru_cache
+import json
+import os
+from pathlib import Path
+import threading
+import time
+
+import requests
+
+from .ipca_index import DATE_FORMAT, IPCAIndex
+
+# Série 433 (IPCA mensal) do SGS/BCB
+SGS_URL = 'https://api.bcb.gov.br/dados/serie/bcdata.sgs.433/dados'
+
+# Mês inicial da correção monetária
+IPCA_START_DATE = '01/08/2013'
+
+# Validade do cache antes de uma nova consulta (segundos)
+CACHE_TTL = 24 * 60 * 60
+REQUEST_TIMEOUT = 5
+
+
+def default_cache_path() -> Path:
+    """Arquivo de cache do IPCA na pasta de dados locais do usuário."""
+    base_dir = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base_dir) / 'CalculoPromocaoClasse' / 'ipca_cache.json'
+
+
+def _month_key(date: str) -> datetime:
+    return datetime.strptime(date, DATE_FORMAT)
+
+
+class CircuitBreaker:
+    """
+    Deixa de consultar a fonte remota depois de 'failure_threshold' falhas
+    seguidas. Após 'reset_timeout' segundos, libera uma nova tentativa; um
+    sucesso volta ao funcionamento normal.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 300.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Indica se a fonte remota pode ser consultada agora."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at >= self.reset_timeout:
+                # Uma única tentativa; o próximo resultado decide o estado
+                self.opened_at = self.clock()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class IPCAStore:
+    """
+    Série do IPCA guardada em um cache local (JSON) com validade 'ttl'.
+
+    Os cálculos usam sempre a série local (o cache ou, na primeira execução,
+    o arquivo estático 'path_fallback'); quando o cache está vencido, a
+    atualização é feita em segundo plano, buscando apenas os meses a partir
+    do último já gravado. Falhas seguidas na API abrem o circuito e
+    suspendem novas consultas por um tempo.
+    """
+
+    def __init__(self, path_cache: Path, path_fallback: Path | None = None, url: str = SGS_URL,
+                 ttl: float = CACHE_TTL, timeout: float = REQUEST_TIMEOUT, breaker: CircuitBreaker | None = None,
+                 start_date: str = IPCA_START_DATE):
+        self.path_cache = Path(path_cache)
+        self.path_fallback = path_fallback
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.start_date = start_date
+
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._records = {}
+        self._updated_at = 0.0
+        self._index = None
+
+        self._load()
+
+
+    def _read_cache(self) -> tuple[dict, float] | None:
+        """Lê o cache gravado (pode ter sido atualizado por outro processo)."""
+        try:
+            with open(self.path_cache, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+            return {record['data']: record['valor'] for record in cache['dados']}, float(cache['atualizado_em'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+
+    def _load(self):
+        cache = self._read_cache()
+        if cache is not None:
+            self._records, self._updated_at = cache
+            return
+
+        # Primeira execução: parte do arquivo estático, considerado vencido
+        if self.path_fallback is not None:
+            try:
+                with open(self.path_fallback, 'r', encoding='utf-8') as file:
+                    self._records = {record['data']: record['valor'] for record in json.load(file)}
+            except (OSError, ValueError, KeyError, TypeError):
+                self._records = {}
+
+
+    def _write_cache(self, records: dict, updated_at: float):
+        """Grava o cache de forma atômica (arquivo temporário + substituição)."""
+        self.path_cache.parent.mkdir(parents=True, exist_ok=True)
+        dados = [{'data': date, 'valor': records[date]} for date in sorted(records, key=_month_key)]
+
+        path_tmp = self.path_cache.with_name(f'{self.path_cache.name}.{os.getpid()}.tmp')
+        try:
+            with open(path_tmp, 'w', encoding='utf-8') as file:
+                json.dump({'atualizado_em': updated_at, 'dados': dados}, file, ensure_ascii=False)
+            os.replace(path_tmp, self.path_cache)
+        except OSError:
+            path_tmp.unlink(missing_ok=True)
+            raise
+
+
+    @property
+    def updated_at(self) -> float:
+        return self._updated_at
+
+
+    def is_stale(self) -> bool:
+        return time.time() - self._updated_at >= self.ttl
+
+
+    def refresh(self) -> bool:
+        """
+        Busca na API os meses a partir do último gravado e atualiza o cache.
+        Retorna False se a consulta foi pulada (circuito aberto) ou falhou.
+        """
+        # Outro processo pode já ter atualizado o cache
+        cache = self._read_cache()
+        if cache is not None and cache[1] > self._updated_at:
+            with self._lock:
+                self._records, self._updated_at = cache
+                self._index = None
+            if not self.is_stale():
+                return True
+
+        if not self.breaker.allow():
+            return False
+
+        with self._lock:
+            start_date = max(self._records, key=_month_key) if self._records else self.start_date
+
+        try:
+            response = requests.get(self.url, params={'formato': 'json', 'dataInicial': start_date}, timeout=self.timeout)
+            response.raise_for_status()
+            new_records = {record['data']: record['valor'] for record in response.json()}
+            for date in new_records:
+                _month_key(date)
+        except (requests.exceptions.RequestException, ValueError, KeyError, TypeError):
+            self.breaker.record_failure()
+            return False
+
+        self.breaker.record_success()
+
+        with self._lock:
+            self._records = {**self._records, **new_records}
+            self._updated_at = time.time()
+            self._index = None
+            records, updated_at = dict(self._records), self._updated_at
+
+        try:
+            self._write_cache(records, updated_at)
+        except OSError as e:
+            print(f"Não foi possível gravar o cache do IPCA: {e}")
+
+        return True
+
+
+    def refresh_async(self):
+        """Inicia a atualização em segundo plano (se ainda não houver uma em andamento)."""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.refresh, daemon=True)
+            self._refresh_thread.start()
+
+
+    def index(self) -> IPCAIndex:
+        """
+        Índice da série local. Sem nenhum dado local, consulta a API antes de
+        responder; com o cache vencido, apenas agenda a atualização.
+        """
+        if not self._records:
+            self.refresh()
+        elif self.is_stale():
+            self.refresh_async()
+
+        with self._lock:
+            if not self._records:
+                raise ValueError(
+                    f"ERRO FATAL: A API falhou E o arquivo estático '{self.path_fallback}' não pôde ser lido."
+                )
+            if self._index is None:
+                self._index = IPCAIndex(list(self._records), [float(value) for value in self._records.values()])
+            return self._index
+
+
+@lru_cache(maxsize=None)
+def get_ipca_store(path_fallback: Path, path_cache: Path | None = None) -> IPCAStore:
+    """Cache do IPCA compartilhado pelo processo (um por arquivo estático)."""
+    return IPCAStore(path_cache or default_cache_path(), path_fallback)
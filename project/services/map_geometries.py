@@ -0,0 +1,109 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import shapely
+
+# Tolerâncias de simplificação (graus, EPSG:4674): ~55 m, ~220 m e ~900 m
+SIMPLIFICATION_LEVELS = (0.0005, 0.002, 0.008)
+
+# Camadas simplificadas: municípios e sedes urbanas
+MAP_LAYERS = ('municipios', 'sedes')
+
+
+def simplify_coverage(gdf: gpd.GeoDataFrame, tolerance: float) -> gpd.GeoDataFrame:
+    """
+    Simplifica um conjunto de polígonos sem sobreposição (municípios ou
+    sedes) preservando as divisas compartilhadas, sem abrir frestas nem
+    criar sobreposições entre vizinhos.
+    """
+    geometries = shapely.coverage_simplify(np.asarray(gdf.geometry.values), tolerance)
+    return gpd.GeoDataFrame(index=gdf.index.copy(), geometry=geometries, crs=gdf.crs)
+
+
+def build_simplified_layers(path_municipalities: Path, path_urban_seats: Path, path_simplified: Path,
+                            levels: tuple = SIMPLIFICATION_LEVELS) -> int:
+    """
+    Gera as geometrias simplificadas usadas apenas no mapa, em todos os
+    níveis de 'levels', a partir das camadas de municípios e de sedes
+    urbanas. O cálculo continua usando as geometrias originais.
+    Retorna a quantidade de linhas gravadas.
+    """
+    sources = {
+        'municipios': gpd.read_parquet(path_municipalities, columns=['CD_MUN', 'geometry']),
+        'sedes': gpd.read_parquet(path_urban_seats, columns=['CD_MUN', 'geometry'])
+    }
+
+    frames = []
+    for layer, gdf in sources.items():
+        if 'CD_MUN' not in gdf.columns:
+            gdf = gdf.reset_index()
+        gdf = gdf.set_index('CD_MUN')
+
+        for tolerance in levels:
+            gdf_simplified = simplify_coverage(gdf, tolerance).reset_index()
+            gdf_simplified.insert(0, 'camada', layer)
+            gdf_simplified.insert(1, 'nivel', tolerance)
+            frames.append(gdf_simplified)
+
+    gdf_all = gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), geometry='geometry', crs=frames[0].crs)
+    Path(path_simplified).parent.mkdir(parents=True, exist_ok=True)
+    gdf_all.to_parquet(path_simplified, compression='zstd', write_covering_bbox=True)
+
+    return len(gdf_all)
+
+
+def read_simplified_layers(path_simplified: Path) -> dict:
+    """Lê as geometrias simplificadas: {(camada, nível): GeoSeries indexada por 'CD_MUN' (int32)}."""
+    gdf = gpd.read_parquet(path_simplified, columns=['camada', 'nivel', 'CD_MUN', 'geometry'])
+    gdf['CD_MUN'] = gdf['CD_MUN'].astype(np.int32)
+
+    return {
+        (layer, float(tolerance)): gdf_level.set_index('CD_MUN').geometry
+        for (layer, tolerance), gdf_level in gdf.groupby(['camada', 'nivel'], sort=False)
+    }
+
+
+def choose_tolerance(bounds, width_px: int, levels: tuple = SIMPLIFICATION_LEVELS) -> float | None:
+    """
+    Escolhe o nível mais simplificado cuja tolerância não passa de meio
+    pixel para a extensão 'bounds' (minx, miny, maxx, maxy em graus)
+    desenhada em 'width_px' pixels. Retorna None quando nenhum nível serve
+    (as geometrias originais devem ser usadas).
+    """
+    minx, miny, maxx, maxy = bounds
+    extent = max(maxx - minx, maxy - miny)
+    if not np.isfinite(extent) or extent <= 0:
+        return None
+
+    half_pixel = extent / width_px / 2
+    candidates = [tolerance for tolerance in levels if tolerance <= half_pixel]
+
+    return max(candidates) if candidates else None
+
+
+def replace_geometries(gdf: gpd.GeoDataFrame, geometries: gpd.GeoSeries | None) -> gpd.GeoDataFrame:
+    """
+    Cópia de 'gdf' (indexado ou com coluna 'CD_MUN') com as geometrias
+    simplificadas 'geometries'; municípios sem versão simplificada mantêm a
+    geometria original.
+    """
+    if geometries is None or gdf.empty:
+        return gdf
+
+    codes = gdf['CD_MUN'].to_numpy() if 'CD_MUN' in gdf.columns else gdf.index.to_numpy()
+    simplified = geometries.reindex(codes).to_numpy()
+    original = gdf.geometry.to_numpy()
+
+    result = gdf.copy()
+    result[gdf.geometry.name] = gpd.GeoSeries(
+        np.where(pd.isna(simplified), original, simplified), index=gdf.index, crs=gdf.crs)
+    return result
+
+
+def extent_for_radius(latitude: float, longitude: float, radius_km: float) -> tuple:
+    """Retângulo (em graus) que contém um círculo de 'radius_km' ao redor da estação."""
+    delta_lat = radius_km / 111.32
+    delta_lon = radius_km / (111.32 * max(np.cos(np.radians(latitude)), 0.01))
+
+    return (longitude - delta_lon, latitude - delta_lat, longitude + delta_lon, latitude + delta_lat)
@@ -0,0 +1,146 @@
+from dataclasses import dataclass
+import threading
+
+from matplotlib import colormaps
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+import numpy as np
+import pandas as pd
+import shapely
+
+MAP_FIGSIZE = (12, 10)
+MAP_DPI = 100
+MAP_TITLE = 'Municípios com áreas urbanas atingidas pelo contorno protegido da classe proposta'
+
+# Estilos das camadas (compartilhados entre renderizações, apenas leitura).
+# Todas no mesmo zorder: a ordem de desenho é a ordem em que são adicionadas.
+MUNICIPALITY_STYLE = {'colors': 'black', 'linewidths': 2, 'zorder': 1}
+URBAN_SEAT_STYLE = {'colors': 'orange', 'linewidths': 0.5, 'zorder': 1}
+COVERED_MUNICIPALITY_STYLE = {'edgecolors': 'black', 'linewidths': 0.1, 'alpha': 0.7, 'zorder': 1}
+COVERED_URBAN_SEAT_STYLE = {'colors': 'red', 'linewidths': 0.5, 'zorder': 1}
+CONTOUR_STYLE = {'colors': 'red', 'linewidths': 1.5, 'linestyles': 'dashed', 'zorder': 1}
+STATION_STYLE = {'color': 'yellow', 'edgecolors': 'black', 'linewidths': 1.5, 's': 36, 'zorder': 1}
+COVERED_MUNICIPALITY_CMAP = colormaps['turbo']
+
+# Figura, canvas e eixos de cada thread, reaproveitados entre renderizações
+_local = threading.local()
+
+
+@dataclass(frozen=True, slots=True)
+class MapLayers:
+    """Geometrias (EPSG:4674) de um mapa de cobertura."""
+
+    municipalities: np.ndarray            # Municípios atingidos pelo contorno (contorno preto)
+    urban_seats: np.ndarray               # Sedes urbanas desses municípios (contorno laranja)
+    covered_municipalities: np.ndarray    # Municípios com sede urbana atingida (preenchidos)
+    covered_labels: np.ndarray            # Rótulo ('MUNICIPIO-UF') de cada município preenchido
+    covered_urban_seats: np.ndarray       # Sedes urbanas atingidas (contorno vermelho)
+    contour: shapely.Geometry             # Contorno protegido teórico (tracejado)
+    station: tuple                        # (longitude, latitude) da estação
+
+
+def ring_segments(geometries) -> list[np.ndarray]:
+    """Anéis (externos e internos) dos polígonos como arrays de coordenadas."""
+    parts = shapely.get_parts(np.asarray(geometries, dtype=object))
+    rings = shapely.get_rings(parts)
+    coords, ring_index = shapely.get_coordinates(rings, return_index=True)
+    if len(coords) == 0:
+        return []
+
+    starts = np.flatnonzero(np.diff(ring_index)) + 1
+    return np.split(coords, starts)
+
+
+def _polygon_paths(geometries) -> list[Path]:
+    """Um Path composto (com buracos) por geometria, na mesma ordem de 'geometries'."""
+    # Anéis internos em sentido oposto ao externo: os buracos ficam vazios no preenchimento
+    geometries = shapely.orient_polygons(np.asarray(geometries, dtype=object))
+    parts, part_row = shapely.get_parts(geometries, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+
+    codes = np.full(len(coords), Path.LINETO, dtype=Path.code_type)
+    if len(coords):
+        ring_starts = np.r_[0, np.flatnonzero(np.diff(coord_ring)) + 1]
+        codes[ring_starts] = Path.MOVETO
+        codes[np.r_[ring_starts[1:] - 1, len(coords) - 1]] = Path.CLOSEPOLY
+
+    coord_row = part_row[ring_part][coord_ring]
+    row_starts = np.searchsorted(coord_row, np.arange(1, len(geometries)))
+
+    return [
+        Path(vertices, path_codes)
+        for vertices, path_codes in zip(np.split(coords, row_starts), np.split(codes, row_starts))
+    ]
+
+
+def _category_colors(labels) -> np.ndarray:
+    """Cores categóricas (em ordem alfabética dos rótulos), como no plot categórico do geopandas."""
+    codes = pd.Categorical(labels).codes
+    if len(codes) == 0:
+        return np.empty((0, 4))
+
+    norm = Normalize(vmin=codes.min(), vmax=codes.max())
+    return COVERED_MUNICIPALITY_CMAP(norm(codes))
+
+
+def _thread_canvas() -> FigureCanvasAgg:
+    """Canvas Agg desta thread (criado na primeira renderização)."""
+    canvas = getattr(_local, 'canvas', None)
+    if canvas is None:
+        figure = Figure(figsize=MAP_FIGSIZE, dpi=MAP_DPI)
+        canvas = FigureCanvasAgg(figure)
+        figure.add_subplot(1, 1, 1)
+        _local.canvas = canvas
+    return canvas
+
+
+def axes_width_px() -> float:
+    """Largura, em pixels, da área de desenho do mapa."""
+    return _thread_canvas().figure.axes[0].bbox.width
+
+
+def render_map(layers: MapLayers, target, title: str = MAP_TITLE):
+    """
+    Desenha o mapa de cobertura e grava o PNG em 'target' (caminho ou
+    arquivo binário). Não usa o pyplot: cada thread tem a própria figura,
+    reaproveitada entre chamadas, e pode renderizar ao mesmo tempo que as
+    demais.
+    """
+    canvas = _thread_canvas()
+    figure = canvas.figure
+    ax = figure.axes[0]
+    ax.clear()
+
+    ax.add_collection(LineCollection(ring_segments(layers.municipalities), **MUNICIPALITY_STYLE))
+    ax.add_collection(LineCollection(ring_segments(layers.urban_seats), **URBAN_SEAT_STYLE))
+
+    # Municípios com áreas urbanas atingidas pelo contorno protegido
+    ax.add_collection(PathCollection(
+        _polygon_paths(layers.covered_municipalities),
+        facecolors=_category_colors(layers.covered_labels),
+        **COVERED_MUNICIPALITY_STYLE
+    ))
+
+    # Áreas urbanas atingidas pelo contorno protegido
+    ax.add_collection(LineCollection(ring_segments(layers.covered_urban_seats), **COVERED_URBAN_SEAT_STYLE))
+
+    # Estação na situação proposta
+    ax.scatter([layers.station[0]], [layers.station[1]], **STATION_STYLE)
+
+    # Circunferência do contorno protegido teórico
+    ax.add_collection(LineCollection(ring_segments([layers.contour]), **CONTOUR_STYLE))
+
+    # Mesma proporção usada pelo geopandas para coordenadas geográficas
+    ax.autoscale_view()
+    y_min, y_max = ax.get_ylim()
+    ax.set_aspect(1 / np.cos(np.radians((y_min + y_max) / 2)))
+
+    ax.set_title(title, fontsize=13, y=1.01)
+    figure.savefig(target, format='png')
+
+    # Libera as geometrias desta renderização
+    ax.clear()
@@ -0,0 +1,90 @@
+import difflib
+import geopandas as gpd
+import json
+import pandas as pd
+from pathlib import Path
+import unicodedata
+
+INDEX_COLUMNS = ['CD_MUN', 'NM_MUN', 'NM_UF']
+
+
+def normalize_name(name: str) -> str:
+    """Remove acentos, diferença entre maiúsculas/minúsculas e espaços repetidos."""
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_accents.casefold().split())
+
+
+class MunicipalityIndex:
+    """
+    Índice dos municípios por (UF, nome) normalizados, usado para validar os
+    municípios do formulário antes de qualquer geoprocessamento. A busca é
+    feita em um dicionário e, quando o município não existe, sugere os nomes
+    mais parecidos da mesma UF.
+    """
+
+    def __init__(self, records):
+        # (UF normalizada, nome normalizado) -> (CD_MUN, NM_MUN, NM_UF)
+        self._entries = {}
+        # UF normalizada -> {nome normalizado: NM_MUN}
+        self._names_by_state = {}
+
+        for code, name, state in records:
+            key = (normalize_name(state), normalize_name(name))
+            self._entries.setdefault(key, (str(code), name, state))
+            self._names_by_state.setdefault(key[0], {}).setdefault(key[1], name)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MunicipalityIndex':
+        """Cria o índice a partir de uma tabela com 'CD_MUN', 'NM_MUN' e 'NM_UF' (setores ou municípios)."""
+        if 'CD_MUN' not in df.columns:
+            df = df.reset_index()
+        df = df[INDEX_COLUMNS].drop_duplicates('CD_MUN')
+        return cls(df.itertuples(index=False, name=None))
+
+    @classmethod
+    def from_file(cls, path_index: Path) -> 'MunicipalityIndex':
+        """Carrega o índice pré-gerado (lista de [CD_MUN, NM_MUN, NM_UF] em JSON)."""
+        with open(path_index, 'r', encoding='utf-8') as file:
+            return cls(json.load(file))
+
+    def lookup(self, state_name: str, municipality_name: str) -> str | None:
+        """Código ('CD_MUN') do município ou None se não for encontrado."""
+        entry = self._entries.get((normalize_name(state_name), normalize_name(municipality_name)))
+        return entry[0] if entry else None
+
+    def suggestions(self, state_name: str, municipality_name: str, limit: int = 3) -> list[str]:
+        """Nomes de municípios da UF parecidos com 'municipality_name'."""
+        names = self._names_by_state.get(normalize_name(state_name), {})
+        matches = difflib.get_close_matches(normalize_name(municipality_name), names.keys(), n=limit, cutoff=0.75)
+        return [names[match] for match in matches]
+
+
+def read_municipality_attributes(path: Path) -> pd.DataFrame:
+    """Lê apenas as colunas de atributos dos municípios (GeoParquet ou Shapefile), sem geometria."""
+    if Path(path).suffix.lower() == '.parquet':
+        df = pd.read_parquet(path, columns=INDEX_COLUMNS)
+    else:
+        df = gpd.read_file(path, columns=INDEX_COLUMNS, ignore_geometry=True)
+
+    # Na camada de municípios 'CD_MUN' é o índice da tabela
+    return df.reset_index()[INDEX_COLUMNS]
+
+
+def build_municipality_index(path_source: Path, path_index: Path) -> int:
+    """
+    Gera o índice de municípios em JSON a partir dos atributos da camada de
+    municípios, do GeoParquet de setores ou do Shapefile.
+    Retorna a quantidade de municípios.
+    """
+    df = read_municipality_attributes(path_source).drop_duplicates('CD_MUN').sort_values('CD_MUN')
+    records = [[str(code), name, state] for code, name, state in df.itertuples(index=False, name=None)]
+
+    Path(path_index).parent.mkdir(parents=True, exist_ok=True)
+    with open(path_index, 'w', encoding='utf-8') as file:
+        json.dump(records, file, ensure_ascii=False)
+
+    return len(records)
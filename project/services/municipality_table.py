@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True, slots=True)
+class MunicipalityRecord:
+    """Município coberto pelo contorno protegido, como aparece no relatório."""
+
+    code: str
+    state: str  # Sigla da UF
+    name: str
+    population: int
+
+
+class MunicipalityTable:
+    """
+    Tabela 'CD_MUN' -> (NM_MUN, NM_UF, população) em arrays, calculada uma
+    única vez a partir dos setores ou da camada de municípios. Cada consulta
+    é um acesso por posição, sem filtrar os setores censitários.
+    """
+
+    def __init__(self, codes, names, states, populations):
+        self.codes = np.asarray(codes, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.states = np.asarray(states, dtype=object)
+        self.populations = np.asarray(populations, dtype=np.int64)
+
+        # Código -> posição nos arrays
+        self._positions = {code: position for position, code in enumerate(self.codes.tolist())}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return str(code) in self._positions
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'MunicipalityTable':
+        """
+        Cria a tabela a partir dos setores censitários ou da camada de
+        municípios (colunas 'CD_MUN', 'NM_MUN', 'NM_UF' e 'v0001').
+        """
+        if 'CD_MUN' not in df.columns:
+            df = df.reset_index()
+
+        df_municipalities = df.groupby(df['CD_MUN'].astype(str), sort=True).agg(
+            NM_MUN=('NM_MUN', 'first'),
+            NM_UF=('NM_UF', 'first'),
+            v0001=('v0001', 'sum')
+        )
+
+        return cls(df_municipalities.index, df_municipalities['NM_MUN'], df_municipalities['NM_UF'], df_municipalities['v0001'])
+
+    def positions(self, codes) -> np.ndarray:
+        """Posições dos códigos nos arrays (-1 para código inexistente)."""
+        return np.fromiter((self._positions.get(str(code), -1) for code in codes), dtype=np.intp)
+
+    def record(self, code) -> tuple[str, str, int]:
+        """Nome, UF e população do município 'code'."""
+        position = self._positions[str(code)]
+        return self.names[position], self.states[position], int(self.populations[position])
+
+    def records(self, codes, state_abbreviations: dict) -> list[MunicipalityRecord]:
+        """
+        Registros (código, sigla da UF, nome e população) dos municípios
+        'codes'. 'state_abbreviations' converte o nome da UF em sigla.
+        """
+        records = []
+        for code in codes:
+            name, state, population = self.record(code)
+            records.append(MunicipalityRecord(str(code), state_abbreviations.get(state, state), name, population))
+
+        return records
+
+    def population(self, code) -> int:
+        """População do município 'code' (0 se o código não existir)."""
+        position = self._positions.get(str(code))
+        return 0 if position is None else int(self.populations[position])
+
+    def total_population(self, codes) -> int:
+        """Soma da população dos municípios 'codes'."""
+        positions = self.positions(codes)
+        return int(self.populations[positions[positions >= 0]].sum())
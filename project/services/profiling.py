@@ -0,0 +1,242 @@
+from contextlib import contextmanager, nullcontext
+import contextvars
+import cProfile
+from dataclasses import asdict, dataclass
+import functools
+import itertools
+import json
+import os
+from pathlib import Path
+import re
+import threading
+import time
+import tracemalloc
+
+# Perfil ativo e etapa em andamento no contexto atual (propagados às threads de 'run_stages')
+_active_profiler = contextvars.ContextVar('perfil_ativo', default=None)
+_current_stage = contextvars.ContextVar('etapa_atual', default=None)
+
+# Contexto vazio usado quando não há perfil ativo (custo desprezível)
+_NO_STAGE = nullcontext()
+
+
+@dataclass(slots=True)
+class StageRecord:
+    """Medições de uma etapa (tempos em segundos, memória em bytes)."""
+
+    id: int
+    name: str
+    parent: int | None
+    thread: str
+    start: float                     # Início, em segundos desde o início do perfil
+    wall: float = 0.0                # Tempo decorrido
+    cpu: float = 0.0                 # Tempo de CPU da thread que executou a etapa
+    memory_peak: int | None = None   # Pico de memória alocada acima do uso no início da etapa
+    cprofile_path: str | None = None
+    error: str | None = None
+
+
+class Profiler:
+    """
+    Coleta tempo decorrido, tempo de CPU e pico de memória (tracemalloc) das
+    etapas instrumentadas com 'stage' enquanto está ativo ('with profiler:').
+
+    Com 'cprofile_dir', grava também um arquivo .prof (cProfile) para cada
+    etapa de nível mais alto de cada thread. O pico de memória é do
+    processo: etapas que rodam ao mesmo tempo entram no pico umas das outras.
+    """
+
+    def __init__(self, track_memory: bool = True, cprofile_dir: Path | None = None):
+        self.track_memory = track_memory
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir is not None else None
+
+        self.records = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._peaks = {}
+        self._origin = None
+        self._token = None
+        self._owns_tracemalloc = False
+        self._cprofile_threads = threading.local()
+
+
+    def __enter__(self) -> 'Profiler':
+        self._origin = time.perf_counter()
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.cprofile_dir is not None:
+            self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+
+        self._token = _active_profiler.set(self)
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        _active_profiler.reset(self._token)
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+
+    def _fold_peak(self):
+        """Repassa o pico atual às etapas abertas e reinicia a medição do pico (com o lock)."""
+        _, peak = tracemalloc.get_traced_memory()
+        for stage_id in self._peaks:
+            self._peaks[stage_id] = max(self._peaks[stage_id], peak)
+        tracemalloc.reset_peak()
+
+
+    def _open_memory(self, stage_id: int) -> int | None:
+        if not (self.track_memory and tracemalloc.is_tracing()):
+            return None
+        with self._lock:
+            self._fold_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            self._peaks[stage_id] = current
+            return current
+
+
+    def _close_memory(self, stage_id: int) -> int:
+        with self._lock:
+            self._fold_peak()
+            return self._peaks.pop(stage_id)
+
+
+    def _start_cprofile(self) -> cProfile.Profile | None:
+        """Inicia o cProfile se esta for a etapa mais externa da thread."""
+        if self.cprofile_dir is None or getattr(self._cprofile_threads, 'active', False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Outro profiler já está ativo (em algumas versões do Python, um por processo)
+            return None
+
+        self._cprofile_threads.active = True
+        return profile
+
+
+    def _stop_cprofile(self, profile: cProfile.Profile, record: StageRecord):
+        profile.disable()
+        self._cprofile_threads.active = False
+
+        safe_name = re.sub(r'[^\w.-]+', '_', record.name)
+        path = self.cprofile_dir / f'{record.id:03d}_{safe_name}.prof'
+        profile.dump_stats(path)
+        record.cprofile_path = str(path)
+
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede o bloco como uma etapa, filha da etapa em andamento no contexto."""
+        record = StageRecord(
+            id=next(self._ids),
+            name=name,
+            parent=_current_stage.get(),
+            thread=threading.current_thread().name,
+            start=time.perf_counter() - self._origin
+        )
+        token = _current_stage.set(record.id)
+        memory_base = self._open_memory(record.id)
+        profile = self._start_cprofile()
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+
+        try:
+            yield record
+        except BaseException as e:
+            record.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            record.wall = time.perf_counter() - wall_start
+            record.cpu = time.thread_time() - cpu_start
+            if profile is not None:
+                self._stop_cprofile(profile, record)
+            if memory_base is not None:
+                record.memory_peak = self._close_memory(record.id) - memory_base
+            _current_stage.reset(token)
+
+            with self._lock:
+                self.records.append(record)
+
+
+    def sorted_records(self) -> list[StageRecord]:
+        """Etapas em ordem de início."""
+        with self._lock:
+            return sorted(self.records, key=lambda record: (record.start, record.id))
+
+
+    def to_dict(self) -> dict:
+        return {'etapas': [asdict(record) for record in self.sorted_records()]}
+
+
+    def chrome_trace(self) -> dict:
+        """Etapas no formato Trace Event (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        thread_ids = {}
+        events = []
+
+        for record in self.sorted_records():
+            tid = thread_ids.setdefault(record.thread, len(thread_ids) + 1)
+            args = {'cpu_ms': round(record.cpu * 1000, 3)}
+            if record.memory_peak is not None:
+                args['pico_memoria_bytes'] = record.memory_peak
+            if record.error is not None:
+                args['erro'] = record.error
+
+            events.append({
+                'name': record.name,
+                'cat': 'etapa',
+                'ph': 'X',
+                'ts': round(record.start * 1e6, 1),
+                'dur': round(record.wall * 1e6, 1),
+                'pid': pid,
+                'tid': tid,
+                'args': args
+            })
+
+        events.extend(
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}}
+            for thread, tid in thread_ids.items()
+        )
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+    def export_json(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+
+    def export_chrome_trace(self, path: Path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.chrome_trace(), file, ensure_ascii=False)
+
+
+def active_profiler() -> Profiler | None:
+    return _active_profiler.get()
+
+
+def stage(name: str):
+    """Contexto de uma etapa instrumentada; não faz nada sem um perfil ativo."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return _NO_STAGE
+    return profiler.stage(name)
+
+
+def profiled(name: str | None = None):
+    """Decorador que mede cada chamada da função como uma etapa."""
+    def decorator(function):
+        stage_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,136 @@
+import os
+from pathlib import Path
+
+from .calculation_job import CalculationJob
+from .calculation_service import CalculationService
+from .census_dataset import CensusDataset
+from .create_pdf import create_relatorio
+from .create_pdf_oficio import create_word_doc
+from .ipca import ipca_calculation
+from .ipca_store import IPCAStore, get_ipca_store
+from .stages import Stage, run_stages, stage_executor
+from .utils import capitalizar_string
+
+
+def prepare_form_data(data: dict) -> dict:
+    """Normaliza os campos do formulário (capitalização, UF e classe em maiúsculas)."""
+    return {
+        "numero_processo": data["numero_processo"],
+        "servico": capitalizar_string(data["servico"]),
+        "entidade": capitalizar_string(data["entidade"]),
+        "finalidade": capitalizar_string(data["finalidade"]),
+        "consulta_publica": data["consulta_publica"],
+        "uf_atual": str(data["uf_atual"]).upper(),
+        "municipio_atual": data["municipio_atual"],
+        "classe_atual": str(data["classe_atual"]).upper(),
+        "canal_atual": data["canal_atual"],
+        "latitude_atual": data["latitude_atual"],
+        "longitude_atual": data["longitude_atual"],
+        "uf_proposta": str(data["uf_proposta"]).upper(),
+        "municipio_proposto": data["municipio_proposto"],
+        "classe_proposta": str(data["classe_proposta"]).upper(),
+        "canal_proposto": data["canal_proposto"],
+        "latitude_proposta": data["latitude_proposta"],
+        "longitude_proposta": data["longitude_proposta"]
+    }
+
+
+def output_file_stem(numero_processo: str) -> str:
+    """Número do processo em um formato válido para nome de arquivo."""
+    return numero_processo.replace('/', '-').replace('.', '_')
+
+
+def _add_ipca_and_addressing(resultado: dict, data: dict, path_ipca: Path, store: IPCAStore) -> dict:
+    """Aplica a correção pelo IPCA e acrescenta os dados de endereçamento do ofício."""
+    ipca_value, ipca_date = ipca_calculation(resultado['vpc'], path_ipca, store)
+    resultado['ipca'] = ipca_value
+    resultado['data_ipca'] = ipca_date
+
+    # Adicionamos o estado do checkbox aos resultados.
+    resultado['incluir_enderecamento'] = data['incluir_enderecamento']
+    if data['incluir_enderecamento']:
+        resultado["cnpj"] = data['cnpj']
+        resultado['fistel'] = data['fistel']
+        resultado['endereco'] = data['endereco']
+        resultado['cep'] = data['cep']
+
+    return resultado
+
+
+def calculation_stages(dataset: CensusDataset, data: dict, path_ipca: Path, include_map: bool = True) -> list[Stage]:
+    """
+    Etapas do cálculo: a série do IPCA é carregada enquanto o
+    geoprocessamento roda, e o mapa é desenhado enquanto o IPCA é aplicado
+    aos resultados (e, em 'generate_documents', enquanto o ofício é gerado).
+    """
+    job = CalculationJob.from_form(prepare_form_data(data))
+    store = get_ipca_store(path_ipca)
+
+    def calcular():
+        service = CalculationService(dataset, job)
+        return service, service.get_results(include_map=False)
+
+    def aplicar_ipca(calculo, _indice):
+        return _add_ipca_and_addressing(calculo[1], data, path_ipca, store)
+
+    def desenhar_mapa(calculo):
+        return calculo[0].creat_map()
+
+    stages = [
+        Stage('indice_ipca', store.index),
+        Stage('calculo', calcular),
+        Stage('resultado', aplicar_ipca, ('calculo', 'indice_ipca'))
+    ]
+    if include_map:
+        stages.append(Stage('mapa', desenhar_mapa, ('calculo',)))
+
+    return stages
+
+
+def calculate(dataset: CensusDataset, data: dict, path_ipca: Path, include_map: bool = True) -> dict:
+    """
+    Calcula a promoção de classe e aplica a correção pelo IPCA, sem gerar
+    documentos. Retorna o dicionário de resultados usado pelo relatório e
+    pelo ofício (com o mapa em memória, se 'include_map').
+    """
+    results = run_stages(calculation_stages(dataset, data, path_ipca, include_map), stage_executor())
+
+    resultado = results['resultado']
+    resultado['mapa'] = results.get('mapa')
+
+    return resultado
+
+
+def generate_documents(dataset: CensusDataset, data: dict, output_directory: str, path_ipca: Path) -> tuple[dict, list[str]]:
+    """
+    Executa o fluxo completo: prepara dados, calcula promoção de classe,
+    aplica correção IPCA e gera documentos (relatório PDF e ofício DOCX
+    opcional). Retorna os resultados e os caminhos dos arquivos gerados.
+
+    As etapas independentes rodam ao mesmo tempo: o ofício só depende do
+    Vpc e do IPCA e é gerado enquanto o mapa é desenhado.
+    """
+    numero_processo_tratado = output_file_stem(data["numero_processo"])
+    caminho_arquivo_relatorio = os.path.join(output_directory, f"relatorio_{numero_processo_tratado}.pdf")
+    caminho_arquivo_oficio_editavel = os.path.join(output_directory, f"oficio_{numero_processo_tratado}.docx")
+
+    def gerar_relatorio(resultado, mapa):
+        create_relatorio(caminho_arquivo_relatorio, {**resultado, 'mapa': mapa})
+        return caminho_arquivo_relatorio
+
+    def gerar_oficio(resultado):
+        create_word_doc(caminho_arquivo_oficio_editavel, resultado)
+        return caminho_arquivo_oficio_editavel
+
+    stages = calculation_stages(dataset, data, path_ipca)
+    stages.append(Stage('relatorio', gerar_relatorio, ('resultado', 'mapa')))
+    if data['incluir_enderecamento']:
+        stages.append(Stage('oficio', gerar_oficio, ('resultado',)))
+
+    results = run_stages(stages, stage_executor())
+
+    resultado = results['resultado']
+    resultado['mapa'] = results['mapa']
+    arquivos = [results[name] for name in ('relatorio', 'oficio') if name in results]
+
+    return resultado, arquivos
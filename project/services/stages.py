@@ -0,0 +1,73 @@
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+import contextvars
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+from .profiling import stage as profiling_stage
+
+# Threads do pool compartilhado de etapas
+STAGE_WORKERS = 4
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """
+    Etapa de um fluxo: 'function' recebe, na ordem de 'depends_on', os
+    resultados das etapas das quais depende.
+    """
+
+    name: str
+    function: Callable
+    depends_on: tuple[str, ...] = ()
+
+
+def _run_stage(stage: Stage, arguments: list):
+    with profiling_stage(stage.name):
+        return stage.function(*arguments)
+
+
+def run_stages(stages: list[Stage], executor: Executor) -> dict:
+    """
+    Executa as etapas no 'executor', cada uma assim que as suas dependências
+    terminam; etapas independentes rodam ao mesmo tempo. Retorna os
+    resultados por nome de etapa. Se uma etapa falhar, as que ainda não
+    começaram são canceladas e a exceção é propagada. Cada etapa roda com
+    uma cópia do contexto de quem chamou (inclusive o perfil ativo).
+    """
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Nomes de etapas repetidos: {names}")
+
+    results = {}
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+
+    while pending or running:
+        for name, stage in list(pending.items()):
+            if all(dependency in results for dependency in stage.depends_on):
+                arguments = [results[dependency] for dependency in stage.depends_on]
+                context = contextvars.copy_context()
+                running[executor.submit(context.run, _run_stage, stage, arguments)] = name
+                del pending[name]
+
+        if not running:
+            raise ValueError(f"Etapas com dependências inexistentes ou circulares: {sorted(pending)}")
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            try:
+                results[name] = future.result()
+            except BaseException:
+                for other in running:
+                    other.cancel()
+                raise
+
+    return results
+
+
+@lru_cache(maxsize=None)
+def stage_executor() -> ThreadPoolExecutor:
+    """Pool de threads do processo usado pelas etapas dos fluxos de cálculo."""
+    return ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix='etapa')
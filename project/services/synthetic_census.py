@@ -0,0 +1,202 @@
+import json
+import math
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from .calculation_service import CalculationService
+from .ipca_store import default_cache_path
+
+# Quantidade de setores do Censo 2022 (todo o Brasil) e média de setores por município
+BRAZIL_SECTORS = 452_000
+SECTORS_PER_MUNICIPALITY = 81
+
+# Extensão aproximada do Brasil (graus, EPSG:4674), dividida em uma grade de UFs
+BRAZIL_BOUNDS = (-74.0, -34.0, -34.0, 5.5)
+STATE_GRID_COLUMNS = 6
+
+# Lado de cada município sintético (graus, ~33 km) e amplitude das ondulações das divisas
+MUNICIPALITY_SIZE = 0.3
+BORDER_JITTER = 0.004
+
+
+def reference_cities() -> dict:
+    """Município de referência ('CD_MUN', nome) de cada UF, como usado no cálculo do Vpc."""
+    cities = {}
+    for classification in ('B', 'C'):
+        for state, reference in CalculationService.referencias[classification].items():
+            if isinstance(reference, dict):
+                reference = reference['padrao']
+            cities.setdefault(state, (reference[0], reference[1]))
+    return cities
+
+
+def _state_tiles(states: list) -> dict:
+    """Retângulo de cada UF numa grade sobre a extensão do Brasil."""
+    minx, miny, maxx, maxy = BRAZIL_BOUNDS
+    rows = math.ceil(len(states) / STATE_GRID_COLUMNS)
+    width = (maxx - minx) / STATE_GRID_COLUMNS
+    height = (maxy - miny) / rows
+
+    return {
+        state: (minx + (i % STATE_GRID_COLUMNS) * width, maxy - (i // STATE_GRID_COLUMNS + 1) * height, width, height)
+        for i, state in enumerate(states)
+    }
+
+
+def _ring_offsets(vertices_per_edge: int) -> np.ndarray:
+    """Vértices do contorno de um setor em passos inteiros da grade (anel fechado, sentido anti-horário)."""
+    k = vertices_per_edge
+    steps = np.arange(k)
+    return np.vstack([
+        np.column_stack([steps, np.zeros(k, int)]),
+        np.column_stack([np.full(k, k), steps]),
+        np.column_stack([k - steps, np.full(k, k)]),
+        np.column_stack([np.zeros(k, int), k - steps]),
+        [[0, 0]]
+    ])
+
+
+def _wavy(x: np.ndarray, y: np.ndarray, amplitude: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Desloca cada vértice em função apenas das suas coordenadas: vizinhos têm
+    os mesmos vértices nas divisas comuns, que continuam sem frestas nem
+    sobreposições.
+    """
+    dx = amplitude * np.sin(x * 97.0 + y * 41.0) * np.cos(y * 23.0)
+    dy = amplitude * np.sin(y * 89.0 - x * 37.0) * np.cos(x * 29.0)
+    return x + dx, y + dy
+
+
+def generate_census_sectors(uf_names: dict, n_sectors: int = 20_000, sectors_per_municipality: int = SECTORS_PER_MUNICIPALITY,
+                            vertices_per_edge: int = 8, seed: int = 0) -> gpd.GeoDataFrame:
+    """
+    Gera setores censitários sintéticos com as colunas do Shapefile do IBGE
+    ('CD_SETOR', 'CD_MUN', 'NM_MUN', 'NM_UF', 'NM_DIST', 'NM_NU', 'SITUACAO',
+    'v0001' e polígonos em EPSG:4674).
+
+    Cada UF ocupa um retângulo da grade e recebe a mesma quantidade de
+    municípios (quadrados de ~33 km, como no interior do país), sempre
+    incluindo o município de referência da UF. Cada município é dividido em
+    setores; o bloco central forma a sede urbana e um setor de canto é um
+    distrito urbano fora da sede. A quantidade de setores é arredondada para
+    cima (municípios inteiros em todas as UFs); com 'n_sectors' =
+    BRAZIL_SECTORS o conjunto tem o tamanho do Censo 2022. 'uf_names' mapeia
+    as siglas para os nomes das UFs ('NM_UF').
+    """
+    rng = np.random.default_rng(seed)
+    references = reference_cities()
+    states = sorted(references)
+    tiles = _state_tiles(states)
+
+    side = max(1, round(math.sqrt(sectors_per_municipality)))
+    municipalities_per_state = max(1, math.ceil(n_sectors / (side * side * len(states))))
+    grid = math.ceil(math.sqrt(municipalities_per_state))
+
+    # Bloco central da sede urbana e setor de canto do distrito
+    seat_radius = max(0, side // 6)
+    a, b = np.divmod(np.arange(side * side), side)
+    center = side // 2
+    is_seat = (np.abs(a - center) <= seat_radius) & (np.abs(b - center) <= seat_radius)
+    is_district = (a == 0) & (b == 0) & ~is_seat
+    offsets = _ring_offsets(vertices_per_edge)
+
+    frames = []
+    for state in states:
+        x0, y0, width, height = tiles[state]
+        municipality_size = min(MUNICIPALITY_SIZE, width / grid, height / grid)
+        sector_size = municipality_size / side
+        reference_code, reference_name = references[state]
+        state_code, state_name = reference_code[:2], uf_names[state]
+
+        # Municípios centralizados no retângulo da UF; o de referência fica no centro
+        i, j = np.divmod(np.arange(municipalities_per_state), grid)
+        order = np.argsort((i - (grid - 1) / 2) ** 2 + (j - (grid - 1) / 2) ** 2, kind='stable')
+        origin_x = x0 + (width - grid * municipality_size) / 2
+        origin_y = y0 + (height - grid * municipality_size) / 2
+
+        numbers = [n for n in range(1, municipalities_per_state + 2) if f'{state_code}{n:05d}' != reference_code]
+        codes = [f'{state_code}{n:05d}' for n in numbers[:municipalities_per_state]]
+        names = [f'Município Sintético {state} {n}' for n in numbers[:municipalities_per_state]]
+        codes[order[0]], names[order[0]] = reference_code, reference_name
+
+        mun = np.repeat(np.arange(municipalities_per_state), side * side)
+        sector = np.tile(np.arange(side * side), municipalities_per_state)
+
+        # Vértices calculados a partir de índices inteiros da grade: divisas comuns têm coordenadas idênticas
+        column = (j[mun] * side + b[sector]) * vertices_per_edge
+        row = (i[mun] * side + a[sector]) * vertices_per_edge
+        step = sector_size / vertices_per_edge
+        x = origin_x + (column[:, None] + offsets[:, 0]) * step
+        y = origin_y + (row[:, None] + offsets[:, 1]) * step
+        x, y = _wavy(x, y, min(BORDER_JITTER, sector_size / 20))
+        geometries = shapely.polygons(np.stack([x, y], axis=-1))
+
+        seat, district = is_seat[sector], is_district[sector]
+        mun_codes = np.asarray(codes)[mun]
+        mun_names = np.asarray(names)[mun]
+
+        frames.append(pd.DataFrame({
+            'CD_SETOR': [f'{code}{n:08d}' for code, n in zip(mun_codes, sector)],
+            'CD_MUN': mun_codes,
+            'NM_MUN': mun_names,
+            'NM_UF': state_name,
+            'NM_DIST': np.where(district, np.char.add(mun_names.astype(str), ' - Distrito'), mun_names),
+            'NM_NU': None,
+            'SITUACAO': np.where(seat | district, 'Urbana', 'Rural'),
+            'v0001': np.where(seat, rng.lognormal(7.0, 0.5, len(sector)), rng.lognormal(5.0, 0.7, len(sector))).astype('int64'),
+            'geometry': geometries
+        }))
+
+    return gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), geometry='geometry', crs='EPSG:4674')
+
+
+def write_synthetic_census(path_census_sectors: Path, uf_names: dict, n_sectors: int = 20_000,
+                           sectors_per_municipality: int = SECTORS_PER_MUNICIPALITY, vertices_per_edge: int = 8,
+                           seed: int = 0) -> int:
+    """
+    Grava os setores sintéticos como Shapefile em 'path_census_sectors' e os
+    parâmetros usados em 'parametros.json' na mesma pasta. Retorna a
+    quantidade de setores gravados.
+    """
+    gdf = generate_census_sectors(uf_names, n_sectors, sectors_per_municipality, vertices_per_edge, seed)
+
+    path_census_sectors = Path(path_census_sectors)
+    path_census_sectors.parent.mkdir(parents=True, exist_ok=True)
+    gdf.to_file(path_census_sectors, encoding='utf-8')
+
+    parameters = {
+        'setores': len(gdf),
+        'setores_por_municipio': sectors_per_municipality,
+        'vertices_por_aresta': vertices_per_edge,
+        'semente': seed
+    }
+    with open(path_census_sectors.parent / 'parametros.json', 'w', encoding='utf-8') as file:
+        json.dump(parameters, file, ensure_ascii=False, indent=2)
+
+    return len(gdf)
+
+
+def default_synthetic_path() -> Path:
+    """Pasta da base sintética, junto dos caches do IPCA e da cobertura (fora da árvore do projeto)."""
+    return default_cache_path().with_name('sintetico')
+
+
+def synthetic_dataset_paths(directory: Path, path_uf: Path) -> dict:
+    """
+    Caminhos do Shapefile sintético e das bases derivadas dentro de
+    'directory', com as mesmas chaves usadas pelo CensusDataset.
+    """
+    directory = Path(directory)
+    return {
+        'path_census_sectors': directory / 'mapa' / 'BR_setores_CD2022.shp',
+        'path_uf': path_uf,
+        'path_census_store': directory / 'setores_censitarios.parquet',
+        'path_municipalities': directory / 'municipios.parquet',
+        'path_urban_seats': directory / 'sedes_urbanas.parquet',
+        'path_municipality_index': directory / 'municipios_indice.json',
+        'path_map_geometries': directory / 'geometrias_mapa.parquet'
+    }
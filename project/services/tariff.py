@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+# Classes em ordem crescente (a posição é o índice usado nas matrizes)
+CLASSES = ('C', 'B2', 'B1', 'A4', 'A3', 'A2', 'A1', 'E3', 'E2', 'E1')
+CLASS_INDEX = {classe: index for index, classe in enumerate(CLASSES)}
+
+GROUPS = ('A', 'B', 'C')
+GROUP_INDEX = {grupo: index for index, grupo in enumerate(GROUPS)}
+
+# Grupo de cada classe (inclui as denominações genéricas 'A', 'B' e 'E')
+CLASS_GROUPS = {
+    'B1': 'A', 'B2': 'A', 'C': 'A',
+    'A': 'B', 'A1': 'B', 'A2': 'B', 'A3': 'B', 'A4': 'B', 'B': 'B',
+    'E1': 'C', 'E2': 'C', 'E3': 'C', 'E': 'C'
+}
+
+# Tempo (Tcp) para a promoção entre classes
+PROMOTION_PERIOD = {
+    'C': {'B2': 0, 'B1': 0, 'A4': 2, 'A3': 2, 'A2': 6, 'A1': 6, 'E3': 8, 'E2': 10, 'E1': 12},
+    'B2': {'B1': 0, 'A4': 0, 'A3': 2, 'A2': 4, 'A1': 4, 'E3': 6, 'E2': 8, 'E1': 10},
+    'B1': {'A4': 0, 'A3': 0, 'A2': 2, 'A1': 2, 'E3': 4, 'E2': 6, 'E1': 8},
+    'A4': {'A3': 0, 'A2': 0, 'A1': 2, 'E3': 4, 'E2': 6, 'E1': 8},
+    'A3': {'A2': 0, 'A1': 0, 'E3': 2, 'E2': 4, 'E1': 6},
+    'A2': {'A1': 0, 'E3': 2, 'E2': 4, 'E1': 6},
+    'A1': {'E3': 0, 'E2': 2, 'E1': 4},
+    'E3': {'E2': 0, 'E1': 2},
+    'E2': {'E1': 0}
+}
+
+# Valor usado nas matrizes para "não se aplica"
+NOT_APPLICABLE = -1
+
+# Parcelas cobradas por (grupo atual, grupo proposto, Tcp igual a zero - 0
+# para não, 1 para sim): Vab usa o valor de referência do grupo B e Vbc o do
+# grupo C.
+VAB_BY_GROUP = np.zeros((len(GROUPS), len(GROUPS), 2), dtype=bool)
+VBC_BY_GROUP = np.zeros((len(GROUPS), len(GROUPS), 2), dtype=bool)
+VAB_BY_GROUP[GROUP_INDEX['A'], GROUP_INDEX['B'], :] = True
+VAB_BY_GROUP[GROUP_INDEX['A'], GROUP_INDEX['C'], :] = True
+VAB_BY_GROUP[GROUP_INDEX['B'], GROUP_INDEX['B'], 0] = True
+VBC_BY_GROUP[GROUP_INDEX['A'], GROUP_INDEX['C'], :] = True
+VBC_BY_GROUP[GROUP_INDEX['B'], GROUP_INDEX['C'], :] = True
+VBC_BY_GROUP[GROUP_INDEX['C'], GROUP_INDEX['C'], 0] = True
+
+
+def _build_matrices():
+    """
+    Monta as matrizes de transição entre classes (linha: classe atual,
+    coluna: classe proposta). Cada matriz tem uma linha e uma coluna a mais,
+    na última posição, para classes inexistentes: assim o índice -1
+    devolvido por 'class_indices' cai nessa posição.
+    """
+    size = len(CLASSES) + 1
+    class_group = np.array([GROUP_INDEX[CLASS_GROUPS[classe]] for classe in CLASSES])
+
+    tcp = np.full((size, size), NOT_APPLICABLE, dtype=np.int8)
+    group_change = np.zeros((size, size), dtype=np.int8)
+    payment = np.zeros((size, size), dtype=bool)
+    vab = np.zeros((size, size), dtype=np.float64)
+    vbc = np.zeros((size, size), dtype=np.float64)
+
+    for current, current_class in enumerate(CLASSES):
+        for proposed, proposed_class in enumerate(CLASSES):
+            if current < proposed:
+                tcp[current, proposed] = PROMOTION_PERIOD[current_class][proposed_class]
+
+            current_group, proposed_group = class_group[current], class_group[proposed]
+            group_change[current, proposed] = np.sign(proposed_group - current_group)
+            payment[current, proposed] = proposed_group > current_group or (
+                proposed_group == current_group and tcp[current, proposed] > 0)
+
+            tcp_zero = int(tcp[current, proposed] == 0)
+            vab[current, proposed] = VAB_BY_GROUP[current_group, proposed_group, tcp_zero]
+            vbc[current, proposed] = VBC_BY_GROUP[current_group, proposed_group, tcp_zero]
+
+    return tcp, group_change, payment, vab, vbc
+
+
+# Tcp (NOT_APPLICABLE quando não há promoção), mudança de grupo (-1, 0, 1),
+# cobrança e pesos (0 ou 1) de Vab e Vbc para cada par de classes
+TCP_MATRIX, GROUP_CHANGE_MATRIX, PAYMENT_MATRIX, VAB_WEIGHT, VBC_WEIGHT = _build_matrices()
+
+
+def class_indices(classes) -> np.ndarray:
+    """Converte nomes de classe em índices das matrizes (-1 para classe inexistente)."""
+    return pd.Index(CLASSES).get_indexer(np.asarray(classes, dtype=object).ravel()).astype(np.intp)
+
+
+def tcp_values(current, proposed) -> np.ndarray:
+    """Tcp para arrays de índices de classe (NOT_APPLICABLE quando não há promoção)."""
+    return TCP_MATRIX[current, proposed]
+
+
+def vpc_values(current, proposed, ptot, pref, value_b, value_c) -> np.ndarray:
+    """
+    Calcula Vpc para arrays de pedidos: índices das classes atual e proposta
+    ('class_indices'), população coberta (Ptot), população de referência
+    (Pref) e valores de referência dos grupos B e C da UF proposta.
+
+    Usa a mesma fórmula e arredondamento do cálculo escalar (zero quando
+    nenhuma parcela é cobrada); retorna NaN quando o Vpc não se aplica (não
+    há promoção de classe ou a classe não existe) e infinito quando há
+    parcela cobrada e Pref é zero (o cálculo escalar falharia).
+    """
+    current = np.asarray(current, dtype=np.intp)
+    proposed = np.asarray(proposed, dtype=np.intp)
+
+    tcp = TCP_MATRIX[current, proposed]
+    vab = VAB_WEIGHT[current, proposed] * np.asarray(value_b, dtype=np.float64)
+    vbc = VBC_WEIGHT[current, proposed] * np.asarray(value_c, dtype=np.float64)
+
+    charged = vab + vbc
+    pref = np.asarray(pref)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vpc = (np.asarray(ptot) / pref) * charged * (1 + tcp / 10)
+
+    vpc = np.where(pref != 0, np.round(vpc, 2), np.inf)
+    vpc = np.where(charged != 0, vpc, 0.0)
+    return np.where(tcp != NOT_APPLICABLE, vpc, np.nan)
@@ -16,6 +16,16 @@ def dms_for_decimal(dms):
         return decimal
 
 
+def decimal_to_dms(value: float, positive: str, negative: str) -> str:
+    """Coordenada decimal no formato do formulário (ex.: 22° 50' 0.00" S)."""
+    direction = positive if value >= 0 else negative
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    seconds = (value - degrees - minutes / 60) * 3600
+    return f"{degrees}° {minutes}' {seconds:.2f}\" {direction}"
+
+
 def capitalizar_string(texto):
     """
     Função feita para o tratamento de textos específicos
@@ -0,0 +1,67 @@
+# Valores aceitos como "verdadeiro" em 'incluir_enderecamento' (CSV, JSON)
+TRUE_VALUES = {'1', 'true', 'sim', 's', 'x', 'yes'}
+
+
+def normalize_form_data(row: dict) -> dict:
+    """
+    Converte os valores recebidos fora da interface (lote, serviço HTTP)
+    para texto, como no formulário, e 'incluir_enderecamento' para booleano.
+    """
+    data = {str(key).strip(): ('' if value is None else str(value).strip()) for key, value in row.items() if key is not None}
+    data['incluir_enderecamento'] = data.get('incluir_enderecamento', '').lower() in TRUE_VALUES
+
+    return data
+
+
+def validate_form_data(data: dict, placeholder_lat: str, placeholder_lon: str, require_output_directory: bool = True,
+                       require_proposed_class: bool = True) -> list[str]:
+    """
+    Valida os dados do formulário. Retorna a lista de campos inválidos.
+    A pasta de saída só é exigida quando os documentos são gravados em disco
+    e a classe proposta não é exigida na varredura de classes.
+    """
+    campos_a_validar = [
+        ("numero_processo", "Número do processo", [""]),
+        ("servico", "Serviço", [""]),
+        ("entidade", "Entidade", [""]),
+        ("finalidade", "Finalidade", [""]),
+        ("consulta_publica", "Consulta Pública", [""]),
+        ("uf_atual", "UF Atual", [""]),
+        ("municipio_atual", "Município Atual", [""]),
+        ("classe_atual", "Classe Atual", [""]),
+        ("canal_atual", "Canal Atual", [""]),
+        ("latitude_atual", "Latitude Atual", ["", placeholder_lat]),
+        ("longitude_atual", "Longitude Atual", ["", placeholder_lon]),
+        ("uf_proposta", "UF Proposta", [""]),
+        ("municipio_proposto", "Município Proposto", [""]),
+        ("classe_proposta", "Classe Proposta", [""]),
+        ("canal_proposto", "Canal Proposto", [""]),
+        ("latitude_proposta", "Latitude Proposta", ["", placeholder_lat]),
+        ("longitude_proposta", "Longitude Proposta", ["", placeholder_lon]),
+    ]
+
+    # Campos que são condicionais
+    campos_condicionais = [
+        ("cnpj", "CNPJ", [""]),
+        ("fistel", "Fistel", [""]),
+        ("endereco", "Endereço", [""]),
+        ("cep", "CEP", [""]),
+    ]
+
+    if not require_proposed_class:
+        campos_a_validar = [campo for campo in campos_a_validar if campo[0] != "classe_proposta"]
+
+    # Verifica o valor do checkbox
+    if data.get("incluir_enderecamento"):
+        campos_a_validar.extend(campos_condicionais)
+
+    campos_invalidos = []
+    for key, nome_campo, valores_invalidos in campos_a_validar:
+        valor = data.get(key, "").strip()
+        if valor in valores_invalidos:
+            campos_invalidos.append(nome_campo)
+
+    if require_output_directory and not data.get("output_directory"):
+        campos_invalidos.append("Pasta de Saída")
+
+    return campos_invalidos
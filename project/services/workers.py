@@ -0,0 +1,52 @@
+import os
+
+from .census_dataset import CensusDataset
+from .class_sweep import sweep_form
+from .create_pdf import create_relatorio
+from .create_pdf_oficio import create_word_doc
+from .report_pipeline import calculate
+
+# Dataset de cada processo do pool (carregado uma única vez no inicializador)
+_DATASET = None
+
+
+def init_worker(dataset_paths: dict):
+    """Inicializador dos processos do pool: carrega o dataset e o mantém aquecido."""
+    global _DATASET
+    _DATASET = CensusDataset(**dataset_paths)
+    _DATASET.warm_up()
+
+
+def worker_dataset() -> CensusDataset:
+    """Dataset carregado pelo inicializador deste processo."""
+    if _DATASET is None:
+        raise RuntimeError("O processo não foi inicializado com 'init_worker'.")
+    return _DATASET
+
+
+def calculate_results(data: dict, path_ipca) -> dict:
+    """Calcula os resultados (com IPCA) sem gerar documentos nem o mapa."""
+    return calculate(worker_dataset(), data, path_ipca, include_map=False)
+
+
+def calculate_sweep(data: dict, path_ipca) -> list[dict]:
+    """Resultados de todas as classes acima da classe atual (varredura de classes)."""
+    return sweep_form(worker_dataset(), data, path_ipca)
+
+
+def render_report(data: dict, path_ipca) -> bytes:
+    """Calcula e retorna o relatório PDF em bytes."""
+    resultado = calculate(worker_dataset(), data, path_ipca)
+    return create_relatorio(None, resultado)
+
+
+def render_letter(data: dict, path_ipca) -> bytes:
+    """Calcula e retorna o ofício DOCX em bytes."""
+    resultado = calculate(worker_dataset(), data, path_ipca, include_map=False)
+    return create_word_doc(None, resultado)
+
+
+def ping() -> int:
+    """Tarefa vazia usada para iniciar (e aquecer) os processos do pool."""
+    worker_dataset()
+    return os.getpid()
@@ -0,0 +1,53 @@
+import argparse
+import json
+from pathlib import Path
+
+import config
+from build_data import build_all
+from services.synthetic_census import (BRAZIL_SECTORS, SECTORS_PER_MUNICIPALITY, default_synthetic_path, synthetic_dataset_paths,
+                                       write_synthetic_census)
+
+
+def build_synthetic_data(directory: Path, n_sectors: int, sectors_per_municipality: int = SECTORS_PER_MUNICIPALITY,
+                         vertices_per_edge: int = 8, seed: int = 0) -> dict:
+    """
+    Gera o Shapefile sintético e as bases derivadas em 'directory'. Retorna
+    os caminhos no formato usado pelo CensusDataset.
+    """
+    paths = synthetic_dataset_paths(directory, config.PATH_UF_JSON)
+    with open(config.PATH_UF_JSON, 'r', encoding='utf-8') as file:
+        uf_names = json.load(file)
+
+    total = write_synthetic_census(
+        paths['path_census_sectors'], uf_names, n_sectors, sectors_per_municipality, vertices_per_edge, seed)
+    print(f"Setores sintéticos: {total} linhas gravadas em '{paths['path_census_sectors']}'.")
+
+    build_all(
+        paths['path_census_sectors'],
+        paths['path_census_store'],
+        paths['path_municipalities'],
+        paths['path_urban_seats'],
+        paths['path_municipality_index'],
+        paths['path_map_geometries']
+    )
+    return paths
+
+
+def main():
+    """
+    Gera setores censitários sintéticos (mesmas colunas do Shapefile do IBGE)
+    e as bases derivadas, para testes de desempenho sem os dados reais.
+    """
+    parser = argparse.ArgumentParser(description="Gera uma base de setores censitários sintética e as bases derivadas.")
+    parser.add_argument("--saida", type=Path, default=default_synthetic_path(), help="Pasta onde a base sintética será gravada (padrão: pasta de cache do usuário).")
+    parser.add_argument("--setores", type=int, default=20_000, help=f"Quantidade aproximada de setores (Brasil: {BRAZIL_SECTORS}).")
+    parser.add_argument("--setores-por-municipio", type=int, default=SECTORS_PER_MUNICIPALITY, help="Setores por município.")
+    parser.add_argument("--vertices", type=int, default=8, help="Vértices por lado de cada setor.")
+    parser.add_argument("--semente", type=int, default=0, help="Semente da população aleatória.")
+    args = parser.parse_args()
+
+    build_synthetic_data(args.saida, args.setores, args.setores_por_municipio, args.vertices, args.semente)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import locale
+from pathlib import Path
+import sys
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+import config
+
+# Setores da base sintética dos testes (uma sede urbana por município, todas as UFs)
+TEST_SECTORS = 3000
+
+# Município da estação nos testes (Campinas/SP, presente na base sintética)
+TEST_STATE = 'SP'
+TEST_MUNICIPALITY_CODE = '3509502'
+
+
+def _pt_br_locale_available() -> bool:
+    current = locale.setlocale(locale.LC_ALL)
+    try:
+        for name in ('pt_BR.UTF-8', 'pt_BR'):
+            try:
+                locale.setlocale(locale.LC_ALL, name)
+                return True
+            except locale.Error:
+                continue
+        return False
+    finally:
+        locale.setlocale(locale.LC_ALL, current)
+
+
+# Os geradores de PDF e DOCX (importados pelos workers) exigem o locale pt_BR
+requires_pt_br_locale = pytest.mark.skipif(not _pt_br_locale_available(), reason="Locale pt_BR não instalado.")
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache_dir(tmp_path_factory):
+    """
+    Caches do IPCA e da cobertura em uma pasta temporária: os testes não
+    leem nem gravam os arquivos do usuário. Os processos filhos herdam as
+    variáveis de ambiente.
+    """
+    cache_dir = tmp_path_factory.mktemp('cache')
+    with pytest.MonkeyPatch.context() as patch:
+        patch.delenv('LOCALAPPDATA', raising=False)
+        patch.setenv('XDG_CACHE_HOME', str(cache_dir))
+        yield cache_dir
+
+
+@pytest.fixture(scope='session')
+def synthetic_paths(tmp_path_factory) -> dict:
+    """Base sintética pequena com as bases derivadas (gerada uma vez por sessão)."""
+    from synthetic_data import build_synthetic_data
+
+    return build_synthetic_data(tmp_path_factory.mktemp('sintetico'), TEST_SECTORS)
+
+
+@pytest.fixture(scope='session')
+def station_form(synthetic_paths) -> dict:
+    """Dados do formulário de uma promoção C -> A1 com a estação em Campinas/SP."""
+    from services.census_dataset import CensusDataset
+    from services.census_store import read_municipality_layer
+    from services.utils import decimal_to_dms
+
+    municipalities = read_municipality_layer(synthetic_paths['path_municipalities'])
+    point = municipalities.geometry.loc[int(TEST_MUNICIPALITY_CODE)].representative_point()
+    name, _, _ = CensusDataset(**synthetic_paths).municipality_table().record(TEST_MUNICIPALITY_CODE)
+    latitude, longitude = decimal_to_dms(point.y, 'N', 'S'), decimal_to_dms(point.x, 'E', 'W')
+
+    return {
+        'numero_processo': '53500.000001/2024-11',
+        'servico': 'FM',
+        'entidade': 'Rádio Teste',
+        'finalidade': 'Comercial',
+        'consulta_publica': '1',
+        'uf_atual': TEST_STATE,
+        'municipio_atual': name,
+        'classe_atual': 'C',
+        'canal_atual': '200',
+        'latitude_atual': latitude,
+        'longitude_atual': longitude,
+        'uf_proposta': TEST_STATE,
+        'municipio_proposto': name,
+        'classe_proposta': 'A1',
+        'canal_proposto': '200',
+        'latitude_proposta': latitude,
+        'longitude_proposta': longitude,
+        'incluir_enderecamento': 'nao'
+    }
+
+
+@pytest.fixture(scope='session')
+def fresh_ipca_cache(isolated_cache_dir):
+    """
+    Cache do IPCA (na pasta temporária) com a série estática e recém
+    atualizado, para que os cálculos não consultem a API do BCB.
+    """
+    import time
+
+    from services.ipca_store import default_cache_path, get_ipca_store
+
+    with open(config.PATH_IPCA_JSON, 'r', encoding='utf-8') as file:
+        dados = json.load(file)
+    path_cache = default_cache_path()
+    path_cache.parent.mkdir(parents=True, exist_ok=True)
+    with open(path_cache, 'w', encoding='utf-8') as file:
+        json.dump({'atualizado_em': time.time(), 'dados': dados}, file, ensure_ascii=False)
+
+    get_ipca_store.cache_clear()
+    yield path_cache
+    get_ipca_store.cache_clear()
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import config
+from conftest import requires_pt_br_locale
+
+pytestmark = requires_pt_br_locale
+
+
+@pytest.fixture(scope='module')
+def batch():
+    """Módulo do lote, importado só com o locale pt_BR (importa os geradores de PDF e DOCX)."""
+    from services import batch
+
+    return batch
+
+
+def _run(batch, tmp_path, synthetic_paths, rows: list[dict]) -> tuple[list[dict], list[str]]:
+    path_input = tmp_path / 'lote.json'
+    path_input.write_text(json.dumps(rows, ensure_ascii=False), encoding='utf-8')
+    messages = []
+    records = batch.run_batch(path_input, str(tmp_path / 'saida'), synthetic_paths, config.PATH_IPCA_JSON,
+                              (config.PLACEHOLDER_LAT, config.PLACEHOLDER_LON), max_workers=1,
+                              progress=messages.append)
+    return records, messages
+
+
+def test_row_key(batch, station_form):
+    key = batch.row_key(station_form)
+
+    assert key.startswith(station_form['numero_processo'] + ':')
+    assert batch.row_key(dict(reversed(list(station_form.items())))) == key
+    assert batch.row_key(dict(station_form, classe_proposta='E1')) != key
+
+
+def test_checkpoint_follows_row_content(batch, tmp_path, synthetic_paths, station_form, fresh_ipca_cache):
+    first = dict(station_form, numero_processo='53500.000001/2024-11')
+    second = dict(station_form, numero_processo='53500.000002/2024-22')
+    records, messages = _run(batch, tmp_path, synthetic_paths, [first, second])
+    assert messages[0] == "2 linhas no lote, 0 já processadas, 2 pendentes."
+    assert [record['status'] for record in records] == ['ok', 'ok']
+    first_vpc = records[0]['vpc']
+
+    # Linha nova no início e linhas reordenadas: só a nova é processada
+    invalid = dict(station_form, numero_processo='53500.000003/2024-33', entidade='')
+    records, messages = _run(batch, tmp_path, synthetic_paths, [invalid, second, first])
+    assert messages[0] == "3 linhas no lote, 2 já processadas, 1 pendentes."
+    assert [(record['linha'], record['numero_processo'], record['status']) for record in records] == [
+        (1, invalid['numero_processo'], 'erro'), (2, second['numero_processo'], 'ok'), (3, first['numero_processo'], 'ok')]
+
+    # Linha alterada com o mesmo número de processo: processada de novo; a removida sai do resumo
+    changed = dict(first, classe_proposta='E1')
+    records, messages = _run(batch, tmp_path, synthetic_paths, [changed, invalid])
+    assert messages[0] == "2 linhas no lote, 1 já processadas, 1 pendentes."
+    assert [(record['numero_processo'], record['status']) for record in records] == [
+        (first['numero_processo'], 'ok'), (invalid['numero_processo'], 'erro')]
+    assert records[0]['vpc'] != first_vpc
+
+    summary = (tmp_path / 'saida' / 'lote_resumo.csv').read_text(encoding='utf-8-sig').splitlines()
+    assert len(summary) == 3
+
+
+def test_checkpoint_without_keys_is_pending(batch, tmp_path):
+    path_checkpoint = tmp_path / 'lote_checkpoint.jsonl'
+    path_checkpoint.write_text(
+        json.dumps({'linha': 1, 'numero_processo': '1', 'status': 'ok'}) + '\n'
+        + json.dumps({'linha': 2, 'chave': '2:abc', 'numero_processo': '2', 'status': 'ok'}) + '\n'
+        + '{"linha": 3, "ch', encoding='utf-8')
+
+    assert list(batch.read_checkpoint(path_checkpoint)) == ['2:abc']
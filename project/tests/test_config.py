@@ -0,0 +1,22 @@
+import inspect
+
+import config
+from services.census_dataset import CensusDataset
+from services.coverage_cache import default_coverage_cache_path
+from services.synthetic_census import default_synthetic_path
+
+
+def test_dataset_paths_match_census_dataset(isolated_cache_dir):
+    paths = config.dataset_paths()
+    parameters = inspect.signature(CensusDataset).parameters
+
+    assert set(paths) <= set(parameters)
+    assert {name for name in parameters if name.startswith('path_')} == set(paths)
+    assert paths['path_coverage_cache'] == default_coverage_cache_path()
+    assert paths['path_coverage_cache'].is_relative_to(isolated_cache_dir)
+
+
+def test_synthetic_data_outside_project(isolated_cache_dir):
+    # A base sintética gerada pelo synthetic_data.py e pelo benchmark.py não fica na árvore do projeto
+    assert default_synthetic_path().is_relative_to(isolated_cache_dir)
+    assert not default_synthetic_path().is_relative_to(config.PROJECT_ROOT)
@@ -0,0 +1,87 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from services.contour import (GEOGRAPHIC_CRS, GRS80_GEOD, contour_accuracy, geodesic_circles, protected_contour,
+                              protected_contours)
+from services.coverage import CoverageEngine
+
+# Estações de teste: Campinas/SP, Recife/PE (longe do meridiano central da policônica), Manaus/AM e Porto Alegre/RS
+STATIONS = [(-22.9, -47.06), (-8.05, -34.9), (-3.1, -60.0), (-30.03, -51.2)]
+RADII = [7.5, 40.0, 78.5, 100.0]
+RECIFE = STATIONS[1]
+
+
+def _original_contour(latitude, longitude, radius):
+    """'create_circle_gdf' da versão original: ponto em EPSG:5880, buffer e volta para EPSG:4674."""
+    center = gpd.GeoDataFrame(geometry=[shapely.Point(longitude, latitude)], crs=GEOGRAPHIC_CRS).to_crs(epsg=5880)
+    return center.buffer(radius * 1000).to_crs(GEOGRAPHIC_CRS).iloc[0]
+
+
+@pytest.mark.parametrize('latitude, longitude', STATIONS)
+@pytest.mark.parametrize('radius', RADII)
+def test_protected_contour_matches_original_buffer(latitude, longitude, radius):
+    assert shapely.equals_exact(protected_contour(latitude, longitude, radius),
+                                _original_contour(latitude, longitude, radius), tolerance=0)
+
+
+def test_vectorized_contours_match_single_station():
+    latitudes, longitudes = np.array(STATIONS).T
+    contours = protected_contours(latitudes, longitudes, RADII)
+    for contour, latitude, longitude, radius in zip(contours, latitudes, longitudes, RADII):
+        assert shapely.equals_exact(contour, protected_contour(latitude, longitude, radius), tolerance=0)
+
+
+def test_smaller_contours_are_nested():
+    # A varredura de classes testa só as sedes atingidas pelo maior contorno
+    contours = protected_contours(*RECIFE, RADII)
+    for smaller, larger in zip(contours, contours[1:]):
+        assert larger.contains(smaller)
+
+
+def test_contour_accuracy():
+    latitudes, longitudes = np.repeat(np.array(STATIONS).T, len(RADII), axis=1)
+    radii = np.tile(RADII, len(STATIONS))
+    accuracy = contour_accuracy(latitudes, longitudes, radii)
+
+    # Círculo geodésico: erro do raio abaixo de 3 m até 100 km
+    assert (accuracy['erro_geodesico_max_m'] < 3).all()
+    # Buffer em EPSG:5880: nunca maior que o raio, encolhe longe do meridiano central (-54°)
+    assert (accuracy['erro_5880_max_m'] < 10).all()
+    shrink = accuracy.set_index(['latitude', 'longitude', 'raio_km'])['erro_5880_min_m']
+    assert shrink[(-22.9, -47.06, 78.5)] == pytest.approx(-487, abs=5)
+    assert shrink[(-8.05, -34.9, 78.5)] == pytest.approx(-4074, abs=5)
+    assert shrink[(-30.03, -51.2, 78.5)] > -100
+
+
+def _seat(latitude, longitude, azimuth, distance_km):
+    """Sede urbana pequena (~200 m) a 'distance_km' da estação na direção 'azimuth'."""
+    lon, lat, _ = GRS80_GEOD.fwd(longitude, latitude, azimuth, distance_km * 1000)
+    return shapely.Point(lon, lat).buffer(0.001)
+
+
+def test_coverage_uses_original_contour():
+    """
+    Na direção em que o buffer em EPSG:5880 mais encolhe perto do Recife,
+    uma sede a 77 km da estação fica fora do contorno protegido (como no
+    cálculo original) e dentro do círculo geodésico de 78,5 km.
+    """
+    latitude, longitude = RECIFE
+    radius = 78.5
+    contour = protected_contour(latitude, longitude, radius)
+
+    coords = shapely.get_coordinates(contour)
+    azimuths, _, distances = GRS80_GEOD.inv(np.full(len(coords), longitude), np.full(len(coords), latitude),
+                                            coords[:, 0], coords[:, 1])
+    azimuth = azimuths[np.argmin(distances)]
+
+    gdf_seats = gpd.GeoDataFrame(
+        {'NM_MUN': ['Dentro', 'Borda'], 'NM_UF': ['Pernambuco', 'Pernambuco']},
+        geometry=[_seat(latitude, longitude, azimuth, 70), _seat(latitude, longitude, azimuth, 77)],
+        index=pd.Index(np.array([2600001, 2600002], dtype=np.int32), name='CD_MUN'), crs=GEOGRAPHIC_CRS)
+    engine = CoverageEngine(gdf_seats)
+
+    assert engine.covered_codes(contour) == [2600001]
+    assert engine.covered_codes(geodesic_circles(latitude, longitude, radius)[0]) == [2600001, 2600002]
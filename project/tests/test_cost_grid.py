@@ -0,0 +1,131 @@
+from dataclasses import replace
+import io
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from conftest import TEST_MUNICIPALITY_CODE, TEST_STATE, requires_pt_br_locale
+from services.contour import GEOGRAPHIC_CRS
+from services.map_renderer import ring_segments
+
+pytestmark = requires_pt_br_locale
+
+
+@pytest.fixture(scope='module')
+def cost_grid():
+    """Módulo da grade, importado só com o locale pt_BR (importa os geradores de PDF e DOCX)."""
+    from services import cost_grid
+
+    return cost_grid
+
+
+@pytest.fixture(scope='module')
+def grid_case(cost_grid, synthetic_paths):
+    """Grade de 5 x 5 pontos a 40 km ao redor da estação de teste, promoção C -> E1, em blocos de 2 x 2."""
+    from services.census_dataset import CensusDataset
+    from services.census_store import read_municipality_layer
+
+    dataset = CensusDataset(**synthetic_paths)
+    point = read_municipality_layer(synthetic_paths['path_municipalities']).geometry.loc[
+        int(TEST_MUNICIPALITY_CODE)].representative_point()
+    name, _, _ = dataset.municipality_table().record(TEST_MUNICIPALITY_CODE)
+    spacing = 40.0
+    half_lat = 2.01 * spacing / cost_grid.KM_PER_DEGREE
+    half_lon = half_lat / np.cos(np.radians(point.y))
+    grid = cost_grid.build_grid((point.x - half_lon, point.y - half_lat, point.x + half_lon, point.y + half_lat), spacing)
+    job = cost_grid.grid_job(TEST_STATE, name, 'C', 'E1', '', point.y, point.x)
+    gdf_grid = cost_grid.run_cost_grid(synthetic_paths, job, grid, max_workers=1, block_size=2,
+                                       progress=lambda message: None, dataset=dataset)
+    return dataset, job, grid, gdf_grid
+
+
+def _single_request(dataset, job, latitude, longitude):
+    """Cálculo de um pedido isolado (mesmo caminho da interface) com a estação proposta no ponto."""
+    from services.calculation_service import CalculationService
+    from services.utils import decimal_to_dms
+
+    service = CalculationService(dataset, replace(job, proposed_latitude=decimal_to_dms(latitude, 'N', 'S'),
+                                                  proposed_longitude=decimal_to_dms(longitude, 'E', 'W')))
+    service.data_process(service.current_class, service.proposed_class, service.current_latitude,
+                         service.current_longitude, service.proposed_state, service.proposed_municipality_code)
+    service.geo_process()
+    service.calculo_promocao_classe(service.municipality_table.records(service.covered_municipalities_codes,
+                                                                     service.state_abbreviations))
+    return service
+
+
+def test_grid_matches_single_requests(grid_case):
+    dataset, job, grid, gdf_grid = grid_case
+
+    assert grid.shape == (5, 5)
+    assert set(gdf_grid['municipios']) == {0, 1, 2}
+    # Pontos com sede urbana atingida, em todos os blocos da grade
+    covered = gdf_grid[gdf_grid['municipios'] > 0]
+    assert covered.groupby([covered['linha'] // 2, covered['coluna'] // 2]).ngroups > 2
+    for point in covered.itertuples():
+        service = _single_request(dataset, job, point.latitude, point.longitude)
+
+        assert list(point.codigos) == sorted(int(code) for code in service.covered_municipalities_codes)
+        assert point.ptot == service.Ptot
+        assert point.vpc == pytest.approx(service.Vpc, abs=0.01)
+
+    # Sem sede urbana atingida: nenhuma população coberta e Vpc zero
+    uncovered = gdf_grid[gdf_grid['municipios'] == 0]
+    assert (uncovered['ptot'] == 0).all() and (uncovered['vpc'] == 0).all()
+
+
+def test_grid_blocks_and_pool_match(cost_grid, synthetic_paths, grid_case):
+    _, job, grid, gdf_grid = grid_case
+
+    # Um único bloco (sem reaproveitamento entre blocos) e o pool de processos dão a mesma grade
+    single_block = cost_grid.run_cost_grid(synthetic_paths, job, grid, max_workers=1, block_size=8,
+                                           progress=lambda message: None)
+    pooled = cost_grid.run_cost_grid(synthetic_paths, job, grid, max_workers=2, block_size=2,
+                                     progress=lambda message: None)
+    for other in (single_block, pooled):
+        assert other['codigos'].map(list).tolist() == gdf_grid['codigos'].map(list).tolist()
+        assert other['ptot'].tolist() == gdf_grid['ptot'].tolist()
+        assert other['vpc'].tolist() == gdf_grid['vpc'].tolist()
+
+
+def _grid_frame(grid, vpc):
+    rows, columns = np.indices(grid.shape)
+    latitudes, longitudes = np.meshgrid(grid.latitudes, grid.longitudes, indexing='ij')
+    return gpd.GeoDataFrame({'linha': rows.ravel(), 'coluna': columns.ravel(), 'vpc': vpc},
+                            geometry=gpd.points_from_xy(longitudes.ravel(), latitudes.ravel()), crs=GEOGRAPHIC_CRS)
+
+
+def test_heatmap_masks_non_finite_vpc(cost_grid):
+    grid = cost_grid.build_grid((-47.2, -23.0, -47.0, -22.8), 10.0)
+    size = grid.shape[0] * grid.shape[1]
+    vpc = np.linspace(1000.0, 2000.0, size)
+    vpc[[0, size - 1]] = np.inf, np.nan
+
+    values = cost_grid.heatmap_values(_grid_frame(grid, vpc), grid)
+
+    assert values.shape == grid.shape
+    assert values.mask.sum() == 2 and values.mask[0, 0] and values.mask[-1, -1]
+    assert np.isfinite(values.compressed()).all()
+
+
+def test_render_heatmap_with_infinite_vpc(cost_grid):
+    grid = cost_grid.build_grid((-47.2, -23.0, -47.0, -22.8), 10.0)
+    vpc = np.full(grid.shape[0] * grid.shape[1], np.inf)
+    vpc[1] = 1500.0
+
+    target = io.BytesIO()
+    cost_grid.render_heatmap(_grid_frame(grid, vpc), grid, target, 'Vpc')
+    assert target.getvalue().startswith(b'\x89PNG')
+
+
+def test_ring_segments():
+    square = shapely.box(0, 0, 1, 1)
+    donut = square.buffer(1).difference(square)
+
+    segments = ring_segments([square, donut])
+
+    assert len(segments) == 3
+    assert all(np.array_equal(segment[0], segment[-1]) for segment in segments)
+    assert ring_segments([]) == []
@@ -0,0 +1,164 @@
+import json
+import os
+
+import numpy as np
+import shapely
+
+from services.coverage_cache import (FINGERPRINT_BYTES, CoverageCache, CoverageResult, data_manifest_path,
+                                     dataset_version, file_digest, file_fingerprint, write_data_manifest)
+
+RESULT = CoverageResult(states=('SP',), touched_codes=(3509502,), covered_codes=(3509502,), population=1000,
+                        seat_codes=np.array([3509502], dtype=np.int32),
+                        seat_geometries=np.array([shapely.Point(-47.06, -22.9).buffer(0.01)]))
+KEY = CoverageCache.key(-22.9, -47.06, 78.5)
+
+
+def _data_files(tmp_path):
+    paths = [tmp_path / 'setores.parquet', tmp_path / 'municipios.parquet', tmp_path / 'sedes.parquet']
+    for index, path in enumerate(paths):
+        path.write_bytes(bytes([index]) * 1000)
+    return paths
+
+
+def _manifest(paths):
+    path_manifest = data_manifest_path(paths[0])
+    write_data_manifest(paths, path_manifest)
+    return path_manifest
+
+
+def test_manifest_version_ignores_modification_time(tmp_path):
+    paths = _data_files(tmp_path)
+    path_manifest = _manifest(paths)
+    version = dataset_version(paths, path_manifest)
+
+    # Extração do executável ou cópia: mesmo conteúdo com outra data de modificação
+    for path in paths:
+        os.utime(path, ns=(0, 0))
+    assert dataset_version(paths, path_manifest) == version
+
+
+def test_manifest_matches_file_content(tmp_path):
+    paths = _data_files(tmp_path)
+    files = write_data_manifest(paths, data_manifest_path(paths[0]))
+
+    assert data_manifest_path(paths[0]).name == 'versao_dados.json'
+    assert files[paths[1].name] == {'tamanho': 1000, 'sha256': file_digest(paths[1])}
+
+
+def test_manifest_is_used_when_size_matches(tmp_path, monkeypatch):
+    paths = _data_files(tmp_path)
+    path_manifest = _manifest(paths)
+    version = dataset_version(paths, path_manifest)
+
+    # Com o manifesto, nenhum arquivo é lido
+    def unexpected_read(path):
+        raise AssertionError(f"'{path}' não deveria ser lido")
+
+    monkeypatch.setattr('services.coverage_cache.file_fingerprint', unexpected_read)
+    monkeypatch.setattr('services.coverage_cache.file_digest', unexpected_read)
+    assert dataset_version(paths, path_manifest) == version
+    monkeypatch.undo()
+
+    # Arquivo com outro tamanho: o manifesto não vale para ele
+    paths[0].write_bytes(b'\x00' * 999)
+    assert dataset_version(paths, path_manifest) != version
+
+
+def test_fingerprint_without_manifest(tmp_path):
+    paths = _data_files(tmp_path)
+    path_manifest = data_manifest_path(paths[0])
+    version = dataset_version(paths)
+
+    assert dataset_version(paths, path_manifest) == version
+    path_manifest.write_text('[]', encoding='utf-8')
+    assert dataset_version(paths, path_manifest) == version
+
+    # Sem o manifesto, a data de modificação entra na impressão digital
+    os.utime(paths[1], ns=(0, 0))
+    assert dataset_version(paths) != version
+
+
+def test_fingerprint_follows_content(tmp_path):
+    paths = _data_files(tmp_path)
+    version = dataset_version(paths)
+    stat = paths[2].stat()
+
+    # Mesmo tamanho e mesma data de modificação, conteúdo diferente
+    paths[2].write_bytes(b'\x09' * 1000)
+    os.utime(paths[2], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert dataset_version(paths) != version
+
+
+def test_fingerprint_reads_only_the_ends(tmp_path):
+    path = tmp_path / 'grande.bin'
+    size = 4 * FINGERPRINT_BYTES
+    path.write_bytes(bytes(size))
+    fingerprint = file_fingerprint(path)
+    stat = path.stat()
+
+    # O meio do arquivo não entra na impressão digital; o fim, sim
+    with open(path, 'r+b') as file:
+        file.seek(size // 2)
+        file.write(b'\x01')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert file_fingerprint(path) == fingerprint
+
+    with open(path, 'r+b') as file:
+        file.seek(size - 1)
+        file.write(b'\x01')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert file_fingerprint(path) != fingerprint
+
+
+def test_shapefile_version_includes_siblings(tmp_path):
+    path_shp = tmp_path / 'setores.shp'
+    for suffix in ('.shp', '.shx', '.dbf'):
+        path_shp.with_suffix(suffix).write_bytes(b'\x00' * 100)
+    version = dataset_version([path_shp])
+
+    # Atributos (SITUACAO, v0001) alterados só no .dbf
+    path_shp.with_suffix('.dbf').write_bytes(b'\x01' * 100)
+    assert dataset_version([path_shp]) != version
+
+
+def test_other_versions_are_kept_until_pruned(tmp_path):
+    path_db = tmp_path / 'cobertura_cache.sqlite'
+    old = CoverageCache('antiga', path_db)
+    old.put(KEY, RESULT)
+
+    # Abrir o cache de outra versão não apaga as entradas gravadas
+    new = CoverageCache('nova', path_db)
+    assert new.get(KEY) is None
+    new.put(KEY, RESULT)
+    assert CoverageCache('antiga', path_db).get(KEY).population == RESULT.population
+
+    assert new.prune() == 1
+    assert CoverageCache('antiga', path_db).get(KEY) is None
+    assert CoverageCache('nova', path_db).get(KEY).covered_codes == RESULT.covered_codes
+    assert CoverageCache('nova').prune() == 0
+
+
+def test_build_writes_manifest(synthetic_paths):
+    from services.census_dataset import CensusDataset
+
+    path_manifest = data_manifest_path(synthetic_paths['path_census_store'])
+    dataset = CensusDataset(**dict(synthetic_paths, path_coverage_cache=None))
+    files = [synthetic_paths[name] for name in ('path_census_store', 'path_municipalities', 'path_urban_seats')]
+
+    manifest = json.loads(path_manifest.read_text(encoding='utf-8'))['arquivos']
+    assert manifest[files[0].name]['sha256'] == file_digest(files[0])
+    assert dataset.version == dataset_version(files, path_manifest)
+
+
+def test_dataset_version_is_computed_once_on_first_use(synthetic_paths, monkeypatch):
+    from services.census_dataset import CensusDataset
+
+    calls = []
+    monkeypatch.setattr('services.census_dataset.dataset_version', lambda *args: calls.append(args) or 'v1')
+    dataset = CensusDataset(**dict(synthetic_paths, path_coverage_cache=None))
+
+    # Construir o dataset (GUI, processos do lote e do serviço) não calcula a versão
+    assert calls == []
+    assert dataset.coverage_cache.version == 'v1'
+    assert dataset.version == 'v1'
+    assert len(calls) == 1
@@ -0,0 +1,156 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import http.client
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import config
+from conftest import requires_pt_br_locale
+
+pytestmark = requires_pt_br_locale
+
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+
+@pytest.fixture(scope='module')
+def server(synthetic_paths, fresh_ipca_cache):
+    from services.http_service import create_server
+
+    server = create_server('127.0.0.1', 0, synthetic_paths, config.PATH_IPCA_JSON,
+                           (config.PLACEHOLDER_LAT, config.PLACEHOLDER_LON),
+                           max_workers=1, max_pending=2, request_timeout=60)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(server, path: str, payload: dict | None = None) -> tuple[int, str, bytes]:
+    url = f'http://127.0.0.1:{server.server_address[1]}{path}'
+    data = None if payload is None else json.dumps(payload).encode('utf-8')
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, response.headers['Content-Type'], response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers['Content-Type'], e.read()
+
+
+def _sleep_task(server, seconds: float):
+    try:
+        server.run(time.sleep, seconds)
+    except FutureTimeoutError:
+        pass
+
+
+def _occupy(server, count: int, seconds: float) -> list[threading.Thread]:
+    """Ocupa 'count' vagas da fila com tarefas que só dormem."""
+    threads = [threading.Thread(target=_sleep_task, args=(server, seconds)) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while server.pending < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return threads
+
+
+def test_health(server):
+    status, content_type, body = _request(server, '/saude')
+
+    assert status == 200
+    assert content_type == JSON_CONTENT_TYPE
+    assert json.loads(body) == {'status': 'ok', 'processos': 1, 'pedidos_em_andamento': 0, 'limite_pedidos': 2}
+
+
+def test_calculate(server, station_form):
+    status, content_type, body = _request(server, '/calcular', station_form)
+
+    assert status == 200
+    assert content_type == JSON_CONTENT_TYPE
+    resultado = json.loads(body)
+    assert resultado['vpc'] > 0
+    assert resultado['ipca'] > resultado['vpc']
+    assert resultado['municipios_afetados']
+
+
+def test_report_is_pdf(server, station_form):
+    status, content_type, body = _request(server, '/relatorio', station_form)
+
+    assert status == 200
+    assert content_type == 'application/pdf'
+    assert body.startswith(b'%PDF')
+
+
+def test_missing_fields(server, station_form):
+    status, content_type, body = _request(server, '/calcular', dict(station_form, entidade=''))
+
+    assert status == 400
+    assert content_type == JSON_CONTENT_TYPE
+    assert json.loads(body)['campos'] == ['Entidade']
+
+
+def test_unknown_municipality(server, station_form):
+    status, content_type, body = _request(server, '/calcular', dict(station_form, municipio_proposto='Inexistente'))
+
+    assert status == 422
+    assert content_type == JSON_CONTENT_TYPE
+    assert 'erro' in json.loads(body)
+
+
+def test_negative_content_length(server):
+    # Mesmo erro dos demais corpos inválidos; sem a verificação, o servidor esperaria o cliente fechar a conexão
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    try:
+        connection.putrequest('POST', '/calcular')
+        connection.putheader('Content-Type', 'application/json')
+        connection.putheader('Content-Length', '-1')
+        connection.endheaders(b'{}')
+        response = connection.getresponse()
+        status, content_type, body = response.status, response.headers['Content-Type'], response.read()
+    finally:
+        connection.close()
+
+    assert status == 400
+    assert content_type == JSON_CONTENT_TYPE
+    assert json.loads(body)['erro'] == "Cabeçalho Content-Length inválido."
+
+
+def test_unknown_route(server):
+    status, content_type, _ = _request(server, '/inexistente')
+
+    assert status == 404
+    assert content_type == JSON_CONTENT_TYPE
+
+
+def test_busy_server(server, station_form):
+    threads = _occupy(server, server.max_pending, 1.0)
+    try:
+        status, content_type, body = _request(server, '/calcular', station_form)
+    finally:
+        for thread in threads:
+            thread.join()
+
+    assert status == 503
+    assert content_type == JSON_CONTENT_TYPE
+    assert 'erro' in json.loads(body)
+
+
+def test_request_timeout(server, station_form):
+    # O único processo está ocupado: o pedido fica na fila até expirar
+    threads = _occupy(server, 1, 1.0)
+    request_timeout, server.request_timeout = server.request_timeout, 0.2
+    try:
+        status, content_type, body = _request(server, '/calcular', station_form)
+    finally:
+        server.request_timeout = request_timeout
+        for thread in threads:
+            thread.join()
+
+    assert status == 504
+    assert content_type == JSON_CONTENT_TYPE
+    assert 'erro' in json.loads(body)
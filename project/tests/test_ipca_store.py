@@ -0,0 +1,228 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from services.ipca import ipca_calculation
+from services.ipca_store import CircuitBreaker, IPCAStore, get_ipca_store
+
+# Série completa do servidor local e a parte já conhecida pelo arquivo estático
+SERIES = [
+    {'data': '01/08/2013', 'valor': '0.24'},
+    {'data': '01/09/2013', 'valor': '0.35'},
+    {'data': '01/10/2013', 'valor': '0.57'},
+    {'data': '01/11/2013', 'valor': '0.54'},
+    {'data': '01/12/2013', 'valor': '0.92'},
+]
+FALLBACK = SERIES[:3]
+
+
+class SGSStandIn(ThreadingHTTPServer):
+    """Substituto local da API do SGS: guarda os parâmetros de cada consulta e pode falhar de propósito."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SGSHandler)
+        self.requests = []
+        self.fail = False
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/dados'
+
+
+class SGSHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        self.server.requests.append(params)
+        if self.server.fail:
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start = [record['data'] for record in SERIES].index(params['dataInicial'])
+        body = json.dumps(SERIES[start:]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def sgs():
+    server = SGSStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def path_fallback(tmp_path):
+    path = tmp_path / 'ipca.json'
+    path.write_text(json.dumps(FALLBACK), encoding='utf-8')
+    return path
+
+
+def _write_cache(path, records, updated_at):
+    path.write_text(json.dumps({'atualizado_em': updated_at, 'dados': records}), encoding='utf-8')
+
+
+def _store(tmp_path, path_fallback, sgs, **kwargs) -> IPCAStore:
+    return IPCAStore(tmp_path / 'cache' / 'ipca_cache.json', path_fallback, url=sgs.url, timeout=2, **kwargs)
+
+
+def test_first_run_uses_fallback(tmp_path, path_fallback, sgs):
+    store = _store(tmp_path, path_fallback, sgs)
+
+    assert store.is_stale()
+    assert store.index().last_date == '01/10/2013'
+
+
+def test_incremental_refresh(tmp_path, path_fallback, sgs):
+    store = _store(tmp_path, path_fallback, sgs)
+
+    assert store.refresh()
+    # Apenas os meses a partir do último já conhecido
+    assert sgs.requests == [{'formato': 'json', 'dataInicial': '01/10/2013'}]
+    assert store.index().last_date == '01/12/2013'
+    assert not store.is_stale()
+
+    cache = json.loads(store.path_cache.read_text(encoding='utf-8'))
+    assert cache['dados'] == SERIES
+    assert cache['atualizado_em'] == store.updated_at
+
+    assert store.refresh()
+    assert sgs.requests[-1]['dataInicial'] == '01/12/2013'
+
+
+def test_fresh_cache_is_not_refreshed(tmp_path, path_fallback, sgs):
+    path_cache = tmp_path / 'cache' / 'ipca_cache.json'
+    path_cache.parent.mkdir()
+    _write_cache(path_cache, SERIES[:4], time.time())
+    store = _store(tmp_path, path_fallback, sgs, ttl=3600)
+
+    assert store.index().last_date == '01/11/2013'
+    time.sleep(0.1)
+    assert sgs.requests == []
+
+
+def test_stale_cache_refreshes_in_background(tmp_path, path_fallback, sgs):
+    path_cache = tmp_path / 'cache' / 'ipca_cache.json'
+    path_cache.parent.mkdir()
+    _write_cache(path_cache, SERIES[:4], time.time() - 7200)
+    store = _store(tmp_path, path_fallback, sgs, ttl=3600)
+
+    # Responde com a série local e atualiza em segundo plano
+    assert store.index().last_date == '01/11/2013'
+    store._refresh_thread.join(timeout=5)
+    assert sgs.requests == [{'formato': 'json', 'dataInicial': '01/11/2013'}]
+    assert store.index().last_date == '01/12/2013'
+
+
+def test_cache_written_by_another_process(tmp_path, path_fallback, sgs):
+    store = _store(tmp_path, path_fallback, sgs, ttl=3600)
+    store.path_cache.parent.mkdir()
+    _write_cache(store.path_cache, SERIES, time.time())
+
+    # O cache mais novo do outro processo é aproveitado sem consultar a API
+    assert store.refresh()
+    assert sgs.requests == []
+    assert store.index().last_date == '01/12/2013'
+
+
+def test_atomic_write(tmp_path, path_fallback, sgs):
+    store = _store(tmp_path, path_fallback, sgs)
+    store.path_cache.parent.mkdir()
+    _write_cache(store.path_cache, FALLBACK, 0.0)
+
+    assert store.refresh()
+    assert [path.name for path in store.path_cache.parent.iterdir()] == ['ipca_cache.json']
+    assert json.loads(store.path_cache.read_text(encoding='utf-8'))['dados'] == SERIES
+
+
+def test_failed_write_keeps_previous_cache(tmp_path, path_fallback, sgs, monkeypatch):
+    store = _store(tmp_path, path_fallback, sgs)
+    store.path_cache.parent.mkdir()
+    _write_cache(store.path_cache, FALLBACK, 0.0)
+
+    def failing_replace(source, target):
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr('services.ipca_store.os.replace', failing_replace)
+    assert store.refresh()
+    # A série nova fica em memória; o arquivo anterior continua íntegro
+    assert store.index().last_date == '01/12/2013'
+    assert json.loads(store.path_cache.read_text(encoding='utf-8'))['dados'] == FALLBACK
+    assert [path.name for path in store.path_cache.parent.iterdir()] == ['ipca_cache.json']
+
+
+def test_circuit_breaker_states():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    # Meio aberto: uma única tentativa depois de 'reset_timeout'
+    now[0] = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # Nova falha reabre o circuito; um sucesso o fecha
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open and breaker.allow() and breaker.failures == 0
+
+
+def test_open_circuit_skips_remote_source(tmp_path, path_fallback, sgs):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, clock=lambda: now[0])
+    store = _store(tmp_path, path_fallback, sgs, breaker=breaker)
+    sgs.fail = True
+
+    assert not store.refresh()
+    assert not store.refresh()
+    assert not store.refresh()
+    assert len(sgs.requests) == 2
+
+    # Depois do tempo de espera, uma nova tentativa bem-sucedida fecha o circuito
+    sgs.fail = False
+    now[0] = 60.0
+    assert store.refresh()
+    assert len(sgs.requests) == 3
+    assert not breaker.is_open
+    # A série local continua servindo os cálculos durante as falhas
+    assert store.index().last_date == '01/12/2013'
+
+
+def test_get_ipca_store_uses_given_cache(tmp_path, path_fallback):
+    path_cache = tmp_path / 'ipca_cache.json'
+    _write_cache(path_cache, SERIES, time.time())
+    get_ipca_store.cache_clear()
+    try:
+        store = get_ipca_store(path_fallback, path_cache)
+        assert store.path_cache == path_cache
+        assert get_ipca_store(path_fallback, path_cache) is store
+
+        value, date = ipca_calculation(100.0, path_fallback, store)
+        assert date == '01/12/2013'
+        assert value == pytest.approx(100 * 1.0024 * 1.0035 * 1.0057 * 1.0054 * 1.0092, abs=0.01)
+    finally:
+        get_ipca_store.cache_clear()
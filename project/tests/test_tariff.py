@@ -0,0 +1,131 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from services.tariff import (CLASSES, GROUP_CHANGE_MATRIX, NOT_APPLICABLE, PAYMENT_MATRIX, PROMOTION_PERIOD, TCP_MATRIX,
+                             VAB_WEIGHT, VBC_WEIGHT, class_indices, tcp_values, vpc_values)
+
+# Regras escalares do CalculationService antes das matrizes (referência dos testes)
+REFERENCE_GROUPS = {
+    'A': ['B1', 'B2', 'C'],
+    'B': ['A', 'A1', 'A2', 'A3', 'A4', 'B'],
+    'C': ['E1', 'E2', 'E3', 'E']
+}
+REFERENCE_CLASSES = ['C', 'B2', 'B1', 'A4', 'A3', 'A2', 'A1', 'E3', 'E2', 'E1']
+
+# Classes das matrizes mais uma classe inexistente (última linha e coluna)
+ALL_CLASSES = list(CLASSES) + ['X9']
+PAIRS = list(itertools.product(ALL_CLASSES, ALL_CLASSES))
+
+
+def _reference_group(classe):
+    for grupo, classes in REFERENCE_GROUPS.items():
+        if classe in classes:
+            return grupo
+    return 'classe inexistente'
+
+
+def _reference_tcp(current_class, proposed_class):
+    if current_class not in REFERENCE_CLASSES or proposed_class not in REFERENCE_CLASSES:
+        return 'não se aplica'
+    if REFERENCE_CLASSES.index(current_class) >= REFERENCE_CLASSES.index(proposed_class):
+        return 'não se aplica'
+    return PROMOTION_PERIOD.get(current_class, {}).get(proposed_class, 'não se aplica')
+
+
+def _reference_group_change(current_class, proposed_class):
+    if current_class not in REFERENCE_CLASSES or proposed_class not in REFERENCE_CLASSES:
+        return None
+    grupos = ['A', 'B', 'C']
+    return int(np.sign(grupos.index(_reference_group(proposed_class)) - grupos.index(_reference_group(current_class))))
+
+
+def _reference_payment(current_class, proposed_class):
+    change = _reference_group_change(current_class, proposed_class)
+    if change is None or change < 0:
+        return False
+    if change > 0:
+        return True
+    return _reference_tcp(current_class, proposed_class) not in (0, 'não se aplica')
+
+
+def _reference_charges(current_class, proposed_class, value_b, value_c):
+    """Árvore de Vab/Vbc do 'calculo_promocao_classe' escalar."""
+    current_group, proposed_group = _reference_group(current_class), _reference_group(proposed_class)
+    tcp = _reference_tcp(current_class, proposed_class)
+    if current_group == 'A':
+        return {'A': (0, 0), 'B': (value_b, 0), 'C': (value_b, value_c)}.get(proposed_group, (0, 0))
+    if current_group == 'B':
+        if proposed_group == 'B':
+            return (0, 0) if tcp == 0 else (value_b, 0)
+        return (0, value_c) if proposed_group == 'C' else (0, 0)
+    if current_group == 'C' and proposed_group == 'C':
+        return (0, 0) if tcp == 0 else (0, value_c)
+    return 0, 0
+
+
+def test_class_indices():
+    assert class_indices(CLASSES).tolist() == list(range(len(CLASSES)))
+    assert class_indices(['E1', 'X9', '', 'c']).tolist() == [len(CLASSES) - 1, -1, -1, -1]
+
+
+@pytest.mark.parametrize('current_class, proposed_class', PAIRS)
+def test_matrices_match_scalar_rules(current_class, proposed_class):
+    current, proposed = class_indices([current_class, proposed_class])
+
+    tcp = _reference_tcp(current_class, proposed_class)
+    assert TCP_MATRIX[current, proposed] == (NOT_APPLICABLE if tcp == 'não se aplica' else tcp)
+    assert PAYMENT_MATRIX[current, proposed] == _reference_payment(current_class, proposed_class)
+
+    change = _reference_group_change(current_class, proposed_class)
+    assert GROUP_CHANGE_MATRIX[current, proposed] == (0 if change is None else change)
+
+    if tcp != 'não se aplica':
+        value_b, value_c = _reference_charges(current_class, proposed_class, 1.0, 1.0)
+        assert VAB_WEIGHT[current, proposed] == value_b
+        assert VBC_WEIGHT[current, proposed] == value_c
+
+
+def test_missing_class_row_and_column():
+    # Índice -1 (classe inexistente): nunca há promoção, cobrança ou parcela
+    for matrix in (GROUP_CHANGE_MATRIX, PAYMENT_MATRIX, VAB_WEIGHT, VBC_WEIGHT):
+        assert not matrix[-1, :].any()
+        assert not matrix[:, -1].any()
+    assert (TCP_MATRIX[-1, :] == NOT_APPLICABLE).all()
+    assert (TCP_MATRIX[:, -1] == NOT_APPLICABLE).all()
+    assert tcp_values(class_indices(['X9', 'C']), class_indices(['E1', 'X9'])).tolist() == [NOT_APPLICABLE] * 2
+
+
+def test_vpc_matches_scalar_formula():
+    rng = np.random.default_rng(0)
+    current_classes, proposed_classes = zip(*PAIRS)
+    size = len(PAIRS)
+    ptot = rng.integers(0, 5_000_000, size)
+    pref = rng.integers(10_000, 12_000_000, size)
+    value_b = rng.uniform(1e5, 5e6, size).round(2)
+    value_c = rng.uniform(1e5, 9e6, size).round(2)
+
+    vpc = vpc_values(class_indices(current_classes), class_indices(proposed_classes), ptot, pref, value_b, value_c)
+
+    for row, (current_class, proposed_class) in enumerate(PAIRS):
+        tcp = _reference_tcp(current_class, proposed_class)
+        if tcp == 'não se aplica':
+            assert np.isnan(vpc[row])
+            continue
+        vab, vbc = _reference_charges(current_class, proposed_class, value_b[row], value_c[row])
+        expected = round((ptot[row] / pref[row]) * (vab + vbc) * (1 + int(tcp) / 10), 2) if vab + vbc else 0.0
+        assert vpc[row] == expected
+
+
+def test_vpc_conventions():
+    c, a1, b1, e1 = class_indices(['C', 'A1', 'B1', 'E1'])
+
+    # Sem promoção (redução, mesma classe ou classe inexistente): NaN
+    assert np.isnan(vpc_values([e1, c, -1], [c, c, e1], 1000, 1000, 1.0, 1.0)).all()
+    # Promoção dentro do grupo A: nenhuma parcela cobrada, Vpc zero (mesmo com Pref zero)
+    assert vpc_values([c, c], [b1, b1], [1000, 1000], [2000, 0], 1.0, 1.0).tolist() == [0.0, 0.0]
+    # Parcela cobrada com Pref zero: infinito, com ou sem população coberta
+    assert np.isposinf(vpc_values([c, c], [a1, a1], [1000, 0], 0, 1.0, 1.0)).all()
+    # Escalares e arrays se combinam por broadcasting
+    assert vpc_values(c, [a1, e1], 1000, 1000, 10.0, 20.0).shape == (2,)